@@ -1,23 +1,51 @@
 """FastAPI dependencies for authentication and database sessions."""
 from fastapi import Depends, HTTPException, status, Request, Response
-from sqlalchemy.orm import Session
-from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncGenerator, Callable, Optional
 
 from app.database import get_db
 from app.models import User
-from app.storage import Storage
+from app.storage import AsyncStorage
+from app.core.admission import AdmissionRejected, get_admission_controller
+from app.core.telemetry import tracer
 from app.core.session import get_cart_id_from_session, set_cart_id_in_session
 from app.config import settings
 
 
-def get_storage(db: Session = Depends(get_db)) -> Storage:
+def admit(route_class: str) -> Callable[[], AsyncGenerator[None, None]]:
+    """
+    Dependency factory holding an admission slot of `route_class` for the
+    duration of the request. Shed requests get 503 with Retry-After.
+    """
+    async def dependency() -> AsyncGenerator[None, None]:
+        controller = get_admission_controller()
+        if controller is None:
+            yield
+            return
+        try:
+            with tracer.span("admission.acquire", route_class=route_class):
+                await controller.acquire(route_class)
+        except AdmissionRejected as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, please retry",
+                headers={"Retry-After": str(int(e.retry_after))}
+            )
+        try:
+            yield
+        finally:
+            controller.release(route_class)
+    return dependency
+
+
+def get_storage(db: AsyncSession = Depends(get_db)) -> AsyncStorage:
     """Get storage instance."""
-    return Storage(db)
+    return AsyncStorage(db)
 
 
-def get_current_user(
+async def get_current_user(
     request: Request,
-    storage: Storage = Depends(get_storage)
+    storage: AsyncStorage = Depends(get_storage)
 ) -> Optional[User]:
     """
     Get current authenticated user from session.
@@ -25,7 +53,8 @@ def get_current_user(
     """
     user_id = request.session.get("user_id")
     if user_id:
-        return storage.get_user(user_id)
+        with tracer.span("dependency.get_current_user"):
+            return await storage.get_user(user_id)
     return None
 
 
@@ -45,7 +74,7 @@ async def get_or_create_cart_id(
     request: Request,
     response: Response,
     current_user: Optional[User] = Depends(get_current_user),
-    storage: Storage = Depends(get_storage)
+    storage: AsyncStorage = Depends(get_storage)
 ) -> int:
     """
     Get or create cart ID for current user/guest.
@@ -53,9 +82,9 @@ async def get_or_create_cart_id(
     """
     # If user is logged in, use their cart
     if current_user:
-        cart = storage.get_cart(current_user.id)
+        cart = await storage.get_cart(current_user.id)
         if not cart:
-            cart = storage.create_cart(current_user.id)
+            cart = await storage.create_cart(current_user.id)
         return cart.id
     
     # For guests, use session cart
@@ -64,7 +93,7 @@ async def get_or_create_cart_id(
         return cart_id
     
     # Create new guest cart
-    cart = storage.create_cart()
+    cart = await storage.create_cart()
     set_cart_id_in_session(response, cart.id, settings.SESSION_SECRET)
     return cart.id
 
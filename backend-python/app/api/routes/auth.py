@@ -1,16 +1,19 @@
 """Authentication routes matching Express.js implementation."""
+import math
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_storage, get_current_user, require_auth
-from app.storage import Storage
+from app.api.deps import admit, get_storage, get_current_user, require_auth
+from app.storage import AsyncStorage
 from app.schemas import RegisterRequest, LoginRequest, AuthResponse, MessageResponse, ErrorResponse
 from app.models import User
-from app.core.security import hash_password, verify_password
+from app.core.security import hash_password, verify_password, dummy_verify_password
+from app.core.rate_limit import get_login_throttle
+from app.core.proxies import client_address
 from app.database import get_db
 
-router = APIRouter(prefix="/api/auth", tags=["auth"])
+router = APIRouter(prefix="/api/auth", tags=["auth"], dependencies=[Depends(admit("default"))])
 
 
 @router.post("/register", response_model=AuthResponse, status_code=status.HTTP_201_CREATED)
@@ -18,14 +21,14 @@ async def register(
     user_data: RegisterRequest,
     request: Request,
     response: Response,
-    storage: Storage = Depends(get_storage)
+    storage: AsyncStorage = Depends(get_storage)
 ):
     """
     Register a new user.
     Matches POST /api/auth/register
     """
     # Check if email already exists
-    existing = storage.get_user_by_email(user_data.email)
+    existing = await storage.get_user_by_email(user_data.email)
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -36,7 +39,7 @@ async def register(
     hashed_password = hash_password(user_data.password)
     
     # Create user
-    user = storage.create_user(user_data, hashed_password)
+    user = await storage.create_user(user_data, hashed_password)
     
     # Set session
     request.session["user_id"] = user.id
@@ -48,13 +51,27 @@ async def register(
 async def login(
     credentials: LoginRequest,
     request: Request,
-    storage: Storage = Depends(get_storage)
+    storage: AsyncStorage = Depends(get_storage)
 ):
     """
     Login with email and password.
     Matches POST /api/auth/login
     """
-    user = storage.get_user_by_email(credentials.email)
+    # Throttle before touching the KDF so rejected attempts cost ~nothing
+    throttle = get_login_throttle()
+    if throttle:
+        retry_after = await throttle.acheck(client_address(request.scope), credentials.email)
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+            )
+    
+    user = await storage.get_user_by_email(credentials.email)
+    if not user:
+        # Same KDF cost as a wrong password to avoid an account-existence oracle
+        dummy_verify_password(credentials.password)
     if not user or not verify_password(credentials.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -71,15 +88,15 @@ async def login(
     guest_cart_id = get_cart_id_from_session(request, settings.SESSION_SECRET)
     if guest_cart_id:
         # Check if user has an existing cart
-        user_cart = storage.get_cart(user.id)
+        user_cart = await storage.get_cart(user.id)
         if user_cart:
             # Merge guest cart into user cart
             # But only if they are different carts (prevent self-merge)
             if guest_cart_id != user_cart.id:
-                 storage.merge_carts(guest_cart_id, user_cart.id)
+                 await storage.merge_carts(guest_cart_id, user_cart.id)
         else:
             # Check if guest cart exists in DB and assign it
-            storage.assign_cart_to_user(guest_cart_id, user.id)
+            await storage.assign_cart_to_user(guest_cart_id, user.id)
              
     return AuthResponse(id=user.id, email=user.email, name=user.name, role=user.role)
 
@@ -0,0 +1,140 @@
+"""Internal operational endpoints (not part of the public API); admins only."""
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field
+
+from app.core.access_control import require_role
+from app.core.admission import get_admission_controller
+from app.core.cache import get_query_cache
+from app.core.db_pool import pool_status
+from app.core.invalidation import broadcast
+from app.core.metrics import loop_lag_monitor
+from app.core.profiler import profiler
+from app.core.query_stats import route_query_metrics
+from app.core.slow_queries import slow_query_log
+from app.core.stalls import stall_detector
+from app.database import engine, async_engine, async_read_engines
+
+router = APIRouter(prefix="/internal", tags=["internal"], dependencies=[Depends(require_role("admin"))])
+
+# Changes made here are sent to the other workers, which apply them with these
+PROFILER_SAMPLING = "profiler.sampling"
+SLOW_QUERIES_RESET = "slow_queries.reset"
+worker_messages = {
+    PROFILER_SAMPLING: lambda sampling: profiler.configure_sampling(**sampling),
+    SLOW_QUERIES_RESET: lambda _: slow_query_log.reset(),
+}
+
+
+@router.get("/startup")
+async def startup_stats(request: Request):
+    """Startup phase timings for this worker."""
+    return request.app.state.startup.summary()
+
+
+@router.get("/admission")
+async def admission_stats():
+    """Admission controller queue depth, in-flight counts and wait times."""
+    controller = get_admission_controller()
+    if controller is None:
+        return {"enabled": False}
+    return {"enabled": True, **controller.stats()}
+
+
+@router.get("/cache")
+async def cache_stats():
+    """Query cache hits, misses and hit ratio per Storage method."""
+    cache = get_query_cache()
+    if cache is None:
+        return {"enabled": False}
+    report = {"enabled": True, "backend": type(cache.backend).__name__, "methods": cache.stats()}
+    if cache.channel is not None:
+        report["invalidation"] = cache.channel.stats()
+    return report
+
+
+@router.get("/loop")
+async def loop_stalls(limit: int = Query(20, ge=1, le=200)):
+    """Event-loop lag and the code that blocked it longest, with stacks."""
+    return {
+        "lag_ms": round(loop_lag_monitor.lag * 1000, 2),
+        "lag_max_ms": round(loop_lag_monitor.lag_max * 1000, 2),
+        "threshold_ms": stall_detector.threshold * 1000,
+        "stalls": stall_detector.count,
+        "stalled_seconds_total": round(stall_detector.seconds_total, 4),
+        "dropped": stall_detector.dropped,
+        "offenders": stall_detector.worst(limit),
+    }
+
+
+@router.get("/db/pool")
+async def db_pool_stats():
+    """Connection pool occupancy, overflow and checkout wait times."""
+    return {
+        "async": pool_status(async_engine.sync_engine.pool),
+        "async_read": [pool_status(e.sync_engine.pool) for e in async_read_engines],
+        "sync": pool_status(engine.pool),
+    }
+
+
+@router.get("/db/queries")
+async def db_query_stats():
+    """SQL statement counts and DB time per route since the worker started."""
+    return route_query_metrics.snapshot()
+
+
+@router.get("/db/slow-queries")
+async def slow_queries(limit: int = Query(50, ge=1, le=500)):
+    """Slow statements by fingerprint, worst total time first, with their plans (this worker's)."""
+    return {
+        "threshold_ms": slow_query_log.threshold * 1000,
+        "dropped": slow_query_log.dropped,
+        "fingerprints": slow_query_log.snapshot(limit),
+    }
+
+
+@router.delete("/db/slow-queries")
+async def reset_slow_queries():
+    """Start aggregating afresh in every worker, e.g. after adding an index."""
+    slow_query_log.reset()
+    return {"reset": True, "workers": 1 + broadcast(SLOW_QUERIES_RESET)}
+
+
+class ProfilerSampling(BaseModel):
+    rate: float = Field(ge=0.0, le=1.0)  # fraction of requests; 0 switches sampling off
+    mode: Literal["cprofile", "sampler"] = "cprofile"
+    path_prefix: str = ""
+
+
+@router.get("/profiler")
+async def profiler_status():
+    """Current sampling toggle (X-Profile headers from admins always apply)."""
+    return profiler.status()
+
+
+@router.put("/profiler")
+async def configure_profiler(sampling: ProfilerSampling):
+    """Profile a fraction of requests (optionally under one path prefix) in every worker."""
+    profiler.configure_sampling(sampling.rate, sampling.mode, sampling.path_prefix)
+    reached = broadcast(PROFILER_SAMPLING, {
+        "rate": sampling.rate, "mode": sampling.mode, "path_prefix": sampling.path_prefix,
+    })
+    return {**profiler.status(), "workers": 1 + reached}
+
+
+@router.get("/profiles")
+async def list_profiles():
+    """Stored profiles, newest first."""
+    return profiler.list_profiles()
+
+
+@router.get("/profiles/{name}")
+async def download_profile(name: str):
+    """Download a .prof (pstats) or .speedscope.json profile."""
+    path = profiler.path_for(name)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    media_type = "application/octet-stream" if name.endswith(".prof") else "application/json"
+    return FileResponse(path, media_type=media_type, filename=name)
@@ -1,40 +1,52 @@
 """Product routes matching Express.js implementation."""
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from pydantic import TypeAdapter
 
-from app.api.deps import get_storage
+from app.api.deps import admit, get_storage
+from app.core.compression import precompressed
 from app.schemas import ProductResponse
-from app.storage import Storage
+from app.storage import AsyncStorage
 
-router = APIRouter(prefix="/api/products", tags=["products"])
+router = APIRouter(prefix="/api/products", tags=["products"], dependencies=[Depends(admit("catalog"))])
+
+_product_list = TypeAdapter(List[ProductResponse])
 
 
 @router.get("", response_model=List[ProductResponse])
 async def list_products(
-    storage: Storage = Depends(get_storage)
-):
+    request: Request,
+    storage: AsyncStorage = Depends(get_storage)
+) -> Response:
     """
     List all products with variants.
     Matches GET /api/products
     """
-    products = storage.get_products()
-    return products
+    async def render() -> bytes:
+        products = await storage.get_products()
+        return _product_list.dump_json(_product_list.validate_python(products, from_attributes=True))
+
+    # Serialized and compressed once per catalog version
+    return await precompressed(request, "products", render)
 
 
 @router.get("/{slug}", response_model=ProductResponse)
 async def get_product(
     slug: str,
-    storage: Storage = Depends(get_storage)
-):
+    request: Request,
+    storage: AsyncStorage = Depends(get_storage)
+) -> Response:
     """
     Get product by slug.
     Matches GET /api/products/:slug
     """
-    product = storage.get_product_by_slug(slug)
-    if not product:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Product not found"
-        )
-    return product
+    async def render() -> bytes:
+        product = await storage.get_product_by_slug(slug)
+        if not product:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found"
+            )
+        return ProductResponse.model_validate(product).model_dump_json().encode()
 
+    return await precompressed(request, f"product:{slug}", render)
@@ -0,0 +1,77 @@
+"""
+Operational commands.
+
+    python -m app.cli init        # migrate to head and seed; run once per deploy
+    python -m app.cli generate    # replace the data with a synthetic store
+    python -m app.cli serve       # production server, one worker per CPU
+"""
+import argparse
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def cmd_init(args: argparse.Namespace) -> None:
+    from app.core.startup import init_database
+    from app.database import engine
+
+    start = time.perf_counter()
+    init_database(engine)
+    engine.dispose()
+    logger.info(f"Database initialized in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+
+def cmd_generate(args: argparse.Namespace) -> None:
+    from app.config import settings
+    from app.core.datagen import Volumes, generate
+    from app.database import engine
+
+    if settings.ENVIRONMENT == "production" and not args.force:
+        raise SystemExit("Refusing to replace production data without --force")
+    volumes = Volumes.for_rows(args.rows)._replace(
+        **{name: value for name in Volumes._fields if (value := getattr(args, name)) is not None}
+    )
+    start = time.perf_counter()
+    counts = generate(engine, volumes, seed=args.seed)
+    engine.dispose()
+    rows = ", ".join(f"{table} {count}" for table, count in counts.items())
+    logger.info(f"Generated {sum(counts.values())} rows in {time.perf_counter() - start:.1f}s ({rows})")
+
+
+def cmd_serve(args: argparse.Namespace) -> None:
+    from app.server import run
+
+    run(args.workers)
+
+
+def main(argv=None) -> None:
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    init = commands.add_parser("init", help="Migrate the schema to head and seed initial data")
+    init.set_defaults(func=cmd_init)
+
+    generate = commands.add_parser(
+        "generate", help="Replace the store's contents with generated data (deterministic per seed)"
+    )
+    generate.add_argument("--rows", type=int, default=100_000, help="Approximate total rows; sets the defaults below")
+    generate.add_argument("--users", type=int)
+    generate.add_argument("--products", type=int)
+    generate.add_argument("--orders", type=int)
+    generate.add_argument("--carts", type=int)
+    generate.add_argument("--seed", type=int, default=42)
+    generate.add_argument("--force", action="store_true", help="Allow running with ENVIRONMENT=production")
+    generate.set_defaults(func=cmd_generate)
+
+    serve = commands.add_parser("serve", help="Run the production server (gunicorn with uvicorn workers)")
+    serve.add_argument("--workers", type=int, default=0, help="Worker processes (default: WORKERS or the available CPUs)")
+    serve.set_defaults(func=cmd_serve)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,16 +9,182 @@ class Settings(BaseSettings):
     # Server
     PORT: int = 5001
     HOST: str = "0.0.0.0"
+    # Production launcher (`python -m app.cli serve`); WORKERS defaults to the available CPUs
+    WORKERS: Optional[int] = None
+    WORKER_MAX_REQUESTS: int = 10000  # recycle a worker after this many requests; 0 never
+    WORKER_MAX_REQUESTS_JITTER: int = 1000
+    WORKER_TIMEOUT: int = 60  # seconds a worker may go silent before it is killed
+    WORKER_GRACEFUL_TIMEOUT: int = 30
     
     # Database
     DATABASE_URL: Optional[str] = None
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 1800  # seconds; -1 disables
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # 0 keeps the server default
+    DB_LOCK_TIMEOUT_MS: int = 0
+    DB_ECHO: bool = False  # log every SQL statement
+    # Run pending migrations on startup (defaults to on in development only)
+    DB_AUTO_MIGRATE: Optional[bool] = None
+    
+    # Read replicas (comma-separated URLs) for read-only Storage methods
+    DATABASE_REPLICA_URLS: str = ""
+    DB_REPLICA_STICKY_SECONDS: float = 5.0  # stay on the primary after a write
+    
+    # SQLite fallback profile (used when DATABASE_URL is unset)
+    SQLITE_PATH: Optional[str] = None  # defaults to urbanturban.db in backend-python/
+    SQLITE_PRODUCTION_PROFILE: bool = True  # WAL + pragmas + reader/writer split
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE: int = -65536  # negative = KiB, i.e. 64 MiB
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MiB
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    SQLITE_READ_POOL_SIZE: int = 4
+    SQLITE_CHECKPOINT_INTERVAL: float = 300.0  # seconds; 0 disables
+    SQLITE_CHECKPOINT_MODE: str = "PASSIVE"
     
     # Session
     SESSION_SECRET: str = "urban-turban-secret"
+    # Public routes that never write the session: decoded only if read, never re-signed
+    SESSION_SKIP_PREFIXES: str = "/api/products,/health,/metrics,/static"
     
     # Environment
     ENVIRONMENT: str = "development"
     
+    # Readiness probe (/health/ready) and graceful shutdown
+    READINESS_CACHE_SECONDS: float = 2.0
+    READINESS_DB_TIMEOUT: float = 1.0
+    READINESS_MIN_POOL_HEADROOM: int = 1  # free connections required in each pool
+    SHUTDOWN_DRAIN_TIMEOUT: float = 25.0  # seconds to wait for in-flight requests; keep below WORKER_GRACEFUL_TIMEOUT
+    
+    # Startup (defaults: seed in development only, warm caches in production only;
+    # production schema/seed work belongs to `python -m app.cli init`)
+    SEED_ON_STARTUP: Optional[bool] = None
+    CACHE_WARM_ON_STARTUP: Optional[bool] = None
+    
+    # Prometheus metrics (/metrics); set a shared directory to merge workers
+    METRICS_ENABLED: bool = True
+    METRICS_MULTIPROC_DIR: Optional[str] = None
+    METRICS_FLUSH_INTERVAL: float = 5.0
+    EVENT_LOOP_LAG_INTERVAL: float = 0.5
+    # Stalls longer than this capture the blocking stack and route (0 disables)
+    LOOP_STALL_THRESHOLD_MS: float = 100.0
+    LOOP_STALL_MAX_OFFENDERS: int = 200
+    
+    # Sampled tracing (fraction of requests; 0 disables), exported to a local file
+    TRACING_SAMPLE_RATE: float = 0.0
+    TRACING_EXPORTER: str = "json"  # "json" or "otlp-file"
+    TRACING_EXPORT_PATH: str = "logs/traces.jsonl"
+    TRACING_BUFFER_SIZE: int = 10000
+    TRACING_FLUSH_INTERVAL: float = 5.0
+    
+    # On-demand profiling (X-Profile header from admins, or the admin sampling toggle)
+    PROFILER_ENABLED: bool = True
+    PROFILE_DIR: str = "logs/profiles"
+    PROFILER_MAX_FILES: int = 50
+    PROFILER_SAMPLE_INTERVAL: float = 0.001  # statistical sampler period, seconds
+    
+    # Response compression (gzip; brotli too when the `brotli` package is installed)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # bytes
+    COMPRESSION_GZIP_LEVEL: int = 6  # per-response; precompressed catalog payloads use the maximum
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    
+    # Logging: records are queued and written in batches by a background thread
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "text"  # "text" or "json"
+    LOG_QUEUE_SIZE: int = 10000  # records beyond this are dropped rather than blocking
+    LOG_BATCH_SIZE: int = 256
+    LOG_FLUSH_INTERVAL: float = 0.5
+    # Add the pid to log file names (access, slow-query, trace files) so workers
+    # never append to or rotate each other's files; `app.cli serve` sets it
+    LOG_FILES_PER_WORKER: bool = False
+    
+    # Structured JSON access log; 2xx on the sampled prefixes are kept at ACCESS_LOG_SAMPLE_RATE
+    ACCESS_LOG_ENABLED: bool = True
+    ACCESS_LOG_PATH: str = "logs/access.jsonl"  # empty writes to stdout
+    ACCESS_LOG_MAX_BYTES: int = 50_000_000
+    ACCESS_LOG_BACKUPS: int = 5
+    ACCESS_LOG_SAMPLED_PREFIXES: str = "/api/products,/health,/metrics"
+    ACCESS_LOG_SAMPLE_RATE: float = 0.1
+    ACCESS_LOG_SLOW_MS: float = 500.0  # slower requests are always logged
+    
+    # Per-request access log line
+    ENABLE_PERFORMANCE_LOGGING: bool = False
+    
+    # Per-request SQL statement counting
+    QUERY_STATS_ENABLED: bool = True
+    QUERY_STATS_HEADERS: Optional[bool] = None  # X-DB-* headers; defaults to off in production
+    N_PLUS_ONE_THRESHOLD: int = 5  # warn when one statement repeats this often per request
+    
+    # Slow-query log: statements over the threshold, with EXPLAIN output per fingerprint
+    SLOW_QUERY_THRESHOLD_MS: float = 100.0  # 0 disables
+    SLOW_QUERY_EXPLAIN: bool = True
+    SLOW_QUERY_LOG_PATH: str = "logs/slow_queries.jsonl"
+    SLOW_QUERY_LOG_MAX_BYTES: int = 10_000_000
+    SLOW_QUERY_LOG_BACKUPS: int = 5
+    SLOW_QUERY_MAX_FINGERPRINTS: int = 500
+    
+    # Storage read cache ("memory" is per worker, "redis" is shared)
+    CACHE_ENABLED: bool = True
+    CACHE_BACKEND: str = "memory"
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_TTL_CATALOG: float = 300.0
+    CACHE_TTL_USER: float = 60.0
+    CACHE_TTL_CART: float = 30.0
+    CACHE_TTL_ORDER: float = 30.0
+    # Shared directory for cross-worker sockets (memory cache invalidation, admin changes)
+    CACHE_INVALIDATION_DIR: Optional[str] = None
+    
+    # Reverse proxies (IPs/CIDRs, comma-separated) whose X-Forwarded-For gives the client address
+    TRUSTED_PROXIES: str = ""
+    
+    # Login throttling (token buckets; "memory" is per worker, "sql" is shared)
+    LOGIN_THROTTLE_ENABLED: bool = True
+    LOGIN_THROTTLE_BACKEND: str = "memory"
+    LOGIN_THROTTLE_IP_BURST: int = 20
+    LOGIN_THROTTLE_IP_PER_MINUTE: float = 10.0
+    LOGIN_THROTTLE_EMAIL_BURST: int = 5
+    LOGIN_THROTTLE_EMAIL_PER_MINUTE: float = 2.0
+    
+    # Admission control (concurrent requests allowed to hold a DB connection)
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_CAPACITY: Optional[int] = None  # defaults to DB_POOL_SIZE + DB_MAX_OVERFLOW
+    ADMISSION_CHECKOUT_LIMIT: int = 15
+    ADMISSION_CART_LIMIT: int = 10
+    ADMISSION_DEFAULT_LIMIT: int = 8
+    ADMISSION_CATALOG_LIMIT: int = 8
+    ADMISSION_MAX_QUEUE: int = 100
+    ADMISSION_QUEUE_TIMEOUT: float = 2.0
+    ADMISSION_RETRY_AFTER: int = 1
+    
+    @property
+    def query_stats_headers(self) -> bool:
+        if self.QUERY_STATS_HEADERS is not None:
+            return self.QUERY_STATS_HEADERS
+        return self.ENVIRONMENT != "production"
+    
+    @property
+    def auto_migrate(self) -> bool:
+        if self.DB_AUTO_MIGRATE is not None:
+            return self.DB_AUTO_MIGRATE
+        return self.ENVIRONMENT == "development"
+    
+    @property
+    def seed_on_startup(self) -> bool:
+        if self.SEED_ON_STARTUP is not None:
+            return self.SEED_ON_STARTUP
+        return self.ENVIRONMENT == "development"
+    
+    @property
+    def warm_cache_on_startup(self) -> bool:
+        if self.CACHE_WARM_ON_STARTUP is not None:
+            return self.CACHE_WARM_ON_STARTUP
+        return self.ENVIRONMENT == "production"
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
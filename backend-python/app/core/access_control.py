@@ -1,9 +1,9 @@
 from fastapi import Depends, HTTPException, status
-from app.api.deps import get_current_user
+from app.api.deps import require_auth
 from app.models import User
 
 def require_role(role: str):
-    def role_checker(user: User = Depends(get_current_user)):
+    def role_checker(user: User = Depends(require_auth)):
         if user.role != role:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,191 @@
+"""Request admission control in front of the database pool."""
+import asyncio
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of queued."""
+
+    def __init__(self, route_class: str, reason: str, retry_after: float):
+        super().__init__(f"{route_class}: {reason}")
+        self.route_class = route_class
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class RouteClass:
+    """Concurrency budget and wait queue for one class of routes."""
+
+    def __init__(self, name: str, limit: int, priority: int, max_queue: int):
+        self.name = name
+        self.limit = limit
+        # Lower value is served first when a slot frees up
+        self.priority = priority
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.queue: "deque[asyncio.Future]" = deque()
+
+        # Metrics
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, waited: float) -> None:
+        self.admitted += 1
+        self.wait_seconds_total += waited
+        if waited > self.wait_seconds_max:
+            self.wait_seconds_max = waited
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "priority": self.priority,
+            "in_flight": self.in_flight,
+            "queue_depth": len(self.queue),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "wait_seconds_max": round(self.wait_seconds_max, 6),
+        }
+
+
+class AdmissionController:
+    """
+    Caps the number of requests holding a database connection.
+
+    `capacity` is the total number of concurrent admitted requests (normally
+    the pool size plus overflow). Each route class additionally has its own
+    limit, so a catalog burst cannot take every slot. When a slot frees up,
+    waiters are served by class priority, FIFO within a class. Requests that
+    would queue past `max_queue` or wait past `queue_timeout` are rejected.
+
+    All state is touched from the event loop only, so no locking is needed.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        classes: List[RouteClass],
+        queue_timeout: float,
+        retry_after: float = 1.0,
+    ):
+        self.capacity = capacity
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.classes: Dict[str, RouteClass] = {c.name: c for c in classes}
+        self._by_priority = sorted(classes, key=lambda c: c.priority)
+
+    def _has_room(self, route_class: RouteClass) -> bool:
+        return self.in_flight < self.capacity and route_class.in_flight < route_class.limit
+
+    def _grant(self, route_class: RouteClass) -> None:
+        self.in_flight += 1
+        route_class.in_flight += 1
+
+    def _wake(self) -> None:
+        for route_class in self._by_priority:
+            queue = route_class.queue
+            while queue and self._has_room(route_class):
+                waiter = queue.popleft()
+                if waiter.done():
+                    continue
+                self._grant(route_class)
+                waiter.set_result(None)
+            if self.in_flight >= self.capacity:
+                return
+
+    def _abandon(self, route_class: RouteClass, waiter: asyncio.Future) -> None:
+        waiter.cancel()
+        try:
+            route_class.queue.remove(waiter)
+        except ValueError:
+            pass
+
+    def _reject(self, route_class: RouteClass, reason: str) -> AdmissionRejected:
+        route_class.rejected += 1
+        return AdmissionRejected(route_class.name, reason, self.retry_after)
+
+    async def acquire(self, name: str) -> float:
+        """
+        Wait for a slot for route class `name`.
+        Returns the seconds spent queued; raises AdmissionRejected when shed.
+        """
+        route_class = self.classes[name]
+        if not route_class.queue and self._has_room(route_class):
+            self._grant(route_class)
+            route_class.record_wait(0.0)
+            return 0.0
+
+        if len(route_class.queue) >= route_class.max_queue:
+            raise self._reject(route_class, "queue full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        route_class.queue.append(waiter)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait((waiter,), timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # Client went away; hand the slot back if we had just been granted it
+            if waiter.done() and not waiter.cancelled():
+                self.release(name)
+            else:
+                self._abandon(route_class, waiter)
+            raise
+
+        waited = time.perf_counter() - start
+        if not waiter.done():
+            self._abandon(route_class, waiter)
+            route_class.timed_out += 1
+            raise self._reject(route_class, "queue timeout")
+
+        route_class.record_wait(waited)
+        return waited
+
+    def release(self, name: str) -> None:
+        route_class = self.classes[name]
+        route_class.in_flight -= 1
+        self.in_flight -= 1
+        self._wake()
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "queue_depth": sum(len(c.queue) for c in self.classes.values()),
+            "classes": {name: c.stats() for name, c in self.classes.items()},
+        }
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """Get the process-wide admission controller, or None if disabled."""
+    global _controller
+    if not settings.ADMISSION_ENABLED:
+        return None
+    if _controller is None:
+        max_queue = settings.ADMISSION_MAX_QUEUE
+        capacity = settings.ADMISSION_CAPACITY
+        if capacity is None:
+            capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+        _controller = AdmissionController(
+            capacity=capacity,
+            classes=[
+                RouteClass("checkout", settings.ADMISSION_CHECKOUT_LIMIT, 0, max_queue),
+                RouteClass("cart", settings.ADMISSION_CART_LIMIT, 1, max_queue),
+                RouteClass("default", settings.ADMISSION_DEFAULT_LIMIT, 2, max_queue),
+                RouteClass("catalog", settings.ADMISSION_CATALOG_LIMIT, 3, max_queue),
+            ],
+            queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+            retry_after=settings.ADMISSION_RETRY_AFTER,
+        )
+    return _controller
@@ -0,0 +1,354 @@
+"""
+Result cache for Storage reads with tag-based invalidation.
+
+Values are stored as JSON, never pickled: whoever can write to a shared
+cache (Redis) can then forge results but not run code in the workers.
+ORM objects are encoded with the attributes that were loaded, and decoded
+into detached instances of the mapped model classes only. Columns marked
+`info={"cache": False}`, such as password hashes, are left out; they stay
+unloaded on a cached copy.
+"""
+import asyncio
+import base64
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.config import settings
+from app.core.invalidation import InvalidationChannel
+
+try:
+    import orjson
+except ImportError:  # stdlib json
+    orjson = None
+
+# Values are JSON scalars and lists; everything else is a tagged object
+TAG = "@"
+
+
+def _encode_value(value: Any, seen: Dict[int, int]) -> Any:
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_encode_value(item, seen) for item in value]
+    state = getattr(value, "_sa_instance_state", None)
+    if state is not None:
+        return _encode_instance(value, state, seen)
+    if isinstance(value, dict):
+        if not all(isinstance(key, str) for key in value):
+            raise TypeError("Cached dicts need string keys")
+        return {TAG: "dict", "v": {key: _encode_value(item, seen) for key, item in value.items()}}
+    if isinstance(value, Decimal):
+        return {TAG: "decimal", "v": str(value)}
+    if isinstance(value, datetime):
+        return {TAG: "datetime", "v": value.isoformat()}
+    if isinstance(value, date):
+        return {TAG: "date", "v": value.isoformat()}
+    if isinstance(value, bytes):
+        return {TAG: "bytes", "v": base64.b64encode(value).decode("ascii")}
+    raise TypeError(f"{type(value).__name__} cannot be cached")
+
+
+def _encode_instance(instance: Any, state, seen: Dict[int, int]) -> dict:
+    # Shared and back-references (variant.product.variants) become refs
+    ref = seen.get(id(instance))
+    if ref is not None:
+        return {TAG: "ref", "v": ref}
+    ref = seen[id(instance)] = len(seen)
+    mapper = state.mapper
+    loaded = state.dict
+    attrs = {}
+    for prop in mapper.column_attrs:
+        if prop.key in loaded and prop.columns[0].info.get("cache", True):
+            attrs[prop.key] = _encode_value(loaded[prop.key], seen)
+    for prop in mapper.relationships:
+        if prop.key in loaded:
+            attrs[prop.key] = _encode_value(loaded[prop.key], seen)
+    return {TAG: "model", "class": mapper.class_.__name__, "ref": ref, "v": attrs}
+
+
+_models: Dict[str, Any] = {}
+
+
+def _model_mapper(name: str):
+    if not _models:
+        from app.database import Base
+
+        _models.update({mapper.class_.__name__: mapper for mapper in Base.registry.mappers})
+    mapper = _models.get(name)
+    if mapper is None:
+        raise ValueError(f"{name} is not a mapped model")
+    return mapper
+
+
+def _decode_value(value: Any, refs: Dict[int, Any]) -> Any:
+    if isinstance(value, list):
+        return [_decode_value(item, refs) for item in value]
+    if not isinstance(value, dict):
+        return value
+    tag = value[TAG]
+    if tag == "model":
+        instance = _model_mapper(value["class"]).class_manager.new_instance()
+        refs[value["ref"]] = instance
+        for key, item in value["v"].items():
+            # No events: back-references are already in the payload
+            set_committed_value(instance, key, _decode_value(item, refs))
+        make_transient_to_detached(instance)
+        return instance
+    if tag == "ref":
+        return refs[value["v"]]
+    if tag == "dict":
+        return {key: _decode_value(item, refs) for key, item in value["v"].items()}
+    if tag == "decimal":
+        return Decimal(value["v"])
+    if tag == "datetime":
+        return datetime.fromisoformat(value["v"])
+    if tag == "date":
+        return date.fromisoformat(value["v"])
+    if tag == "bytes":
+        return base64.b64decode(value["v"])
+    raise ValueError(f"Unknown cached value tag {tag!r}")
+
+
+def encode(value: Any) -> bytes:
+    """Serialize a Storage result; raises TypeError for values the cache does not support."""
+    data = _encode_value(value, {})
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def decode(payload: bytes) -> Any:
+    """A fresh copy of an encoded value; ORM objects come back detached."""
+    return _decode_value(orjson.loads(payload) if orjson is not None else json.loads(payload), {})
+
+
+class MemoryLRUBackend:
+    """Per-process LRU with per-entry expiry and a tag -> keys index."""
+
+    blocking = False
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, bytes, Tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value, _ = entry
+            if expires_at < time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str]) -> None:
+        tags = tuple(tags)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_tags(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisBackend:
+    """
+    Shared cache for multi-worker deployments. Requires the optional `redis`
+    package. Each tag is a Redis set of the keys it covers.
+    """
+
+    # Network round trips: QueryCache's async methods run them in a thread
+    blocking = True
+
+    def __init__(self, url: str, prefix: str = "ut:cache:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from e
+        self._redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._redis.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str]) -> None:
+        pipe = self._redis.pipeline()
+        pipe.set(self.prefix + key, value, px=int(ttl * 1000))
+        for tag in tags:
+            tag_key = f"{self.prefix}tag:{tag}"
+            pipe.sadd(tag_key, self.prefix + key)
+            pipe.expire(tag_key, int(ttl) + 60)
+        pipe.execute()
+
+    def invalidate_tags(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            tag_key = f"{self.prefix}tag:{tag}"
+            keys = self._redis.smembers(tag_key)
+            self._redis.delete(tag_key, *keys)
+
+    def clear(self) -> None:
+        keys = list(self._redis.scan_iter(self.prefix + "*"))
+        if keys:
+            self._redis.delete(*keys)
+
+
+class QueryCache:
+    """
+    Caches encoded read results. Every hit decodes a fresh, detached copy,
+    so requests never share ORM instances or their owning session.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._stats: Dict[str, Dict[str, int]] = {}
+        # Tells the other workers about invalidations (memory backend, multi-worker)
+        self.channel: Optional[InvalidationChannel] = None
+
+    @staticmethod
+    def make_key(method: str, args: tuple, kwargs: dict) -> str:
+        return f"{method}:{args!r}:{sorted(kwargs.items())!r}"
+
+    def _count(self, method: str, field: str) -> None:
+        stats = self._stats.get(method)
+        if stats is None:
+            stats = self._stats.setdefault(method, {"hits": 0, "misses": 0, "sets": 0})
+        stats[field] += 1
+
+    def _fetch(self, key: str) -> Optional[bytes]:
+        try:
+            return self.backend.get(key)
+        except Exception:
+            return None
+
+    def _load(self, method: str, value: Optional[bytes]) -> Tuple[bool, Any]:
+        if value is None:
+            self._count(method, "misses")
+            return False, None
+        try:
+            result = decode(value)
+        except Exception:
+            # Unreadable entry (e.g. written by another version): treat as a miss
+            self._count(method, "misses")
+            return False, None
+        self._count(method, "hits")
+        return True, result
+
+    def _store(self, key: str, value: bytes, ttl: float, tags: Iterable[str]) -> bool:
+        try:
+            self.backend.set(key, value, ttl, tags)
+            return True
+        except Exception:
+            # A cache that cannot store must never fail the request
+            return False
+
+    def get(self, method: str, key: str) -> Tuple[bool, Any]:
+        return self._load(method, self._fetch(key))
+
+    def set(self, method: str, key: str, result: Any, ttl: float, tags: Iterable[str]) -> None:
+        try:
+            value = encode(result)
+        except Exception:
+            return
+        if self._store(key, value, ttl, tags):
+            self._count(method, "sets")
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        tags = list(tags)
+        self.backend.invalidate_tags(tags)
+        if self.channel is not None:
+            self.channel.publish(tags)
+
+    # For the event loop: the same operations, with a blocking backend's
+    # calls made from a worker thread
+
+    async def aget(self, method: str, key: str) -> Tuple[bool, Any]:
+        if not self.backend.blocking:
+            return self.get(method, key)
+        return self._load(method, await asyncio.to_thread(self._fetch, key))
+
+    async def aset(self, method: str, key: str, result: Any, ttl: float, tags: Iterable[str]) -> None:
+        if not self.backend.blocking:
+            self.set(method, key, result, ttl, tags)
+            return
+        try:
+            value = encode(result)
+        except Exception:
+            return
+        if await asyncio.to_thread(self._store, key, value, ttl, list(tags)):
+            self._count(method, "sets")
+
+    async def ainvalidate(self, tags: Iterable[str]) -> None:
+        if not self.backend.blocking:
+            self.invalidate(tags)
+            return
+        tags = list(tags)
+        await asyncio.to_thread(self.backend.invalidate_tags, tags)
+        if self.channel is not None:
+            self.channel.publish(tags)
+
+    def clear(self) -> None:
+        self.backend.clear()
+        self._stats.clear()
+
+    def stats(self) -> Dict[str, dict]:
+        report = {}
+        for method, stats in self._stats.items():
+            lookups = stats["hits"] + stats["misses"]
+            report[method] = {
+                **stats,
+                "hit_ratio": round(stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
+        return report
+
+
+_query_cache: Optional[QueryCache] = None
+
+
+def get_query_cache() -> Optional[QueryCache]:
+    """Get the process-wide query cache, or None if disabled."""
+    global _query_cache
+    if not settings.CACHE_ENABLED:
+        return None
+    if _query_cache is None:
+        if settings.CACHE_BACKEND == "redis":
+            backend = RedisBackend(settings.CACHE_REDIS_URL)
+        else:
+            backend = MemoryLRUBackend(settings.CACHE_MAX_ENTRIES)
+        _query_cache = QueryCache(backend)
+    return _query_cache
@@ -0,0 +1,190 @@
+"""
+Response compression.
+
+CompressionMiddleware negotiates brotli or gzip for compressible responses
+over COMPRESSION_MIN_SIZE. Cacheable payloads (the catalog) are instead
+encoded once per cache version at maximum compression and stored in the
+query cache, one entry per encoding, so a hit reads the bytes it sends
+instead of compressing them; such responses carry Content-Encoding and the middleware
+leaves them alone. Brotli needs the optional `brotli` package.
+"""
+import gzip
+import zlib
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.config import settings
+from app.core.cache import get_query_cache
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def accepted_encoding(accept_encoding: str) -> Optional[str]:
+    """Best encoding we support from an Accept-Encoding header, or None for identity."""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip()] = q
+    wildcard = weights.get("*", 0.0)
+    br = weights.get("br", wildcard) if brotli is not None else 0.0
+    gz = weights.get("gzip", wildcard)
+    if br > 0 and br >= gz:
+        return "br"
+    return "gzip" if gz > 0 else None
+
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if best else settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=9 if best else settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def encode_variants(raw: bytes) -> Dict[str, bytes]:
+    """The raw body plus every encoding worth serving, at maximum compression."""
+    variants = {"identity": raw}
+    if len(raw) >= settings.COMPRESSION_MIN_SIZE:
+        variants["gzip"] = compress(raw, "gzip", best=True)
+        if brotli is not None:
+            variants["br"] = compress(raw, "br", best=True)
+    return variants
+
+
+def _variant(variants: Dict[str, bytes], encoding: Optional[str]) -> Tuple[Optional[str], bytes, bool]:
+    """(Content-Encoding, body, whether it varies by Accept-Encoding) for a negotiated encoding."""
+    if encoding not in variants:
+        encoding = None
+    return encoding, variants[encoding or "identity"], len(variants) > 1
+
+
+class PrecompressedResponse(Response):
+    """An already encoded body, with its Content-Encoding and Vary headers."""
+
+    def __init__(
+        self, encoding: Optional[str], body: bytes, vary: bool, media_type: str = "application/json"
+    ):
+        super().__init__(body, media_type=media_type)
+        if vary:
+            self.headers["Vary"] = "Accept-Encoding"
+        if encoding:
+            self.headers["Content-Encoding"] = encoding
+
+
+async def precompressed(request: Request, key: str, render: Callable[[], Awaitable[bytes]]) -> Response:
+    """
+    Response for a cacheable payload: `render` produces the JSON body on a
+    miss. Each encoding is cached under its own key, so a hit decodes only
+    the bytes it sends; the entries live under the "catalog" cache tag, so
+    catalog writes drop them together with the Storage reads they came from.
+    """
+    encoding = None
+    if settings.COMPRESSION_ENABLED:
+        encoding = accepted_encoding(request.headers.get("accept-encoding", ""))
+    cache = get_query_cache()
+    if cache is None:
+        return PrecompressedResponse(None, await render(), False)
+    hit, entry = await cache.aget("catalog_response", f"response:{key}:{encoding or 'identity'}")
+    if hit:
+        return PrecompressedResponse(*entry)
+    variants = encode_variants(await render())
+    # Every encoding a client may negotiate, so the next request for another one hits too
+    for name in ("identity", "gzip", "br") if brotli is not None else ("identity", "gzip"):
+        await cache.aset(
+            "catalog_response", f"response:{key}:{name}",
+            list(_variant(variants, None if name == "identity" else name)),
+            settings.CACHE_TTL_CATALOG, ["catalog"],
+        )
+    return PrecompressedResponse(*_variant(variants, encoding))
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        self._brotli = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY) if encoding == "br" else None
+        self._zlib = None if self._brotli else zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._brotli.process(data) if self._brotli else self._zlib.compress(data)
+
+    def finish(self) -> bytes:
+        return self._brotli.finish() if self._brotli else self._zlib.flush()
+
+
+class CompressionMiddleware:
+    """Pure ASGI gzip/brotli for compressible responses over the size threshold."""
+
+    def __init__(self, app, min_size: int = 1024):
+        self.app = app
+        self.min_size = min_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = accepted_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor: Optional[_StreamCompressor] = None
+
+        async def send_compressed(message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if "content-encoding" in headers or not content_type.startswith(COMPRESSIBLE_TYPES):
+                    await send(message)
+                else:
+                    # Held until the first body chunk shows whether it is worth compressing
+                    start = message
+                return
+            if message["type"] != "http.response.body" or (start is None and compressor is None):
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(raw=list(start["headers"]))
+                start["headers"] = headers.raw
+                if not more_body and len(body) < self.min_size:
+                    # Small single-chunk body: send as is
+                    await send(start)
+                    start = None
+                    await send(message)
+                    return
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                    compressor = _StreamCompressor(encoding)
+                    body = compressor.compress(body)
+                else:
+                    body = compress(body, encoding)
+                    headers["Content-Length"] = str(len(body))
+                await send(start)
+                start = None
+                await send({"type": "http.response.body", "body": body, "more_body": more_body})
+                return
+
+            body = compressor.compress(body)
+            if not more_body:
+                body += compressor.finish()
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
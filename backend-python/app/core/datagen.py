@@ -0,0 +1,312 @@
+"""
+Synthetic store data for scaling tests.
+
+Replaces the store's contents with generated users, products, variants,
+carts and order history. Output is identical for a given seed and set of
+volumes: ids are explicit, timestamps are relative to a fixed date and
+password hashes use salts drawn from the seeded generator. Rows are
+streamed in chunks through executemany inserts, or COPY on
+PostgreSQL/psycopg2.
+
+Distributions: product popularity is Zipf-like, a minority of customers
+places most orders (Pareto), signups and orders grow over time, order
+status follows order age, and totals match their items.
+"""
+import csv
+import hashlib
+import io
+import json
+import random
+import re
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from itertools import accumulate
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.schema import upgrade_to_head
+from app.models import Cart, CartItem, Order, OrderItem, Payment, Product, ProductVariant, User
+
+CHUNK = 10_000
+AS_OF = datetime(2026, 1, 1, tzinfo=timezone.utc)
+HISTORY_DAYS = 730
+# Every generated account logs in with this password
+GENERATED_PASSWORD = "generated-password"
+# Distinct salts, as with real accounts; each one costs a PBKDF2 run
+HASH_POOL = 8
+
+FIRST_NAMES = ["Aarav", "Diya", "Kabir", "Meera", "Rohan", "Isha", "Arjun", "Anaya", "Vihaan", "Sara",
+               "Dev", "Tara", "Nikhil", "Zoya", "Aditya", "Riya"]
+LAST_NAMES = ["Sharma", "Iyer", "Khan", "Patel", "Reddy", "Das", "Mehta", "Nair", "Gupta", "Singh",
+              "Rao", "Kapoor"]
+ADJECTIVES = ["Urban", "Classic", "Street", "Vintage", "Everyday", "Washed", "Corded", "Trail",
+              "Minimal", "Heritage", "Canvas", "Midnight"]
+NOUNS = ["Cap", "Bucket Hat", "Beanie", "Snapback", "Trucker", "Visor", "Dad Cap", "Five Panel"]
+COLORS = ["Black", "Beige", "Olive", "Navy", "Grey", "White", "Maroon", "Sand"]
+PROVIDERS = ["upi_mock"] * 5 + ["razorpay_mock"] * 2 + ["stripe_mock", "cod", "cod"]
+
+
+class Volumes(NamedTuple):
+    users: int
+    products: int
+    orders: int
+    carts: int
+
+    @classmethod
+    def for_rows(cls, rows: int) -> "Volumes":
+        """Volumes totalling roughly `rows` rows across all tables."""
+        return cls(
+            users=max(10, rows // 10),
+            products=max(5, rows // 1000),
+            orders=max(10, rows // 5),
+            carts=max(5, rows // 50),
+        )
+
+
+def _password_hash(password: str, salt: str) -> str:
+    """The app's stored format (app.core.security.hash_password) with a chosen salt."""
+    key = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt.encode("utf-8"), 100000, dklen=64)
+    return f"{key.hex()}.{salt}"
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+def _csv_value(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return str(value)
+
+
+class _Writer:
+    """Chunked inserts on one connection; COPY when the driver supports it."""
+
+    def __init__(self, conn: Connection):
+        self.conn = conn
+        self.copy = conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2"
+        self.counts: Dict[str, int] = {}
+
+    def write(self, model, rows: List[dict]) -> None:
+        table = model.__tablename__
+        self.counts[table] = self.counts.get(table, 0) + len(rows)
+        if not rows:
+            return
+        if not self.copy:
+            self.conn.execute(model.__table__.insert(), rows)
+            return
+        columns = list(rows[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([_csv_value(row[c]) for c in columns])
+        buffer.seek(0)
+        cursor = self.conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer
+            )
+        finally:
+            cursor.close()
+
+    def write_stream(self, model, rows: Iterable[dict]) -> None:
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == CHUNK:
+                self.write(model, chunk)
+                chunk = []
+        self.write(model, chunk)
+
+
+class _Picker:
+    """Weighted choice by bisecting cumulative weights."""
+
+    def __init__(self, rng: random.Random, population: List[int], weights: Iterable[float]):
+        self.rng = rng
+        self.population = population
+        self.cumulative = list(accumulate(weights))
+
+    def pick(self) -> int:
+        index = bisect_left(self.cumulative, self.rng.random() * self.cumulative[-1])
+        return self.population[min(index, len(self.population) - 1)]
+
+    def pick_distinct(self, k: int) -> List[int]:
+        chosen = []
+        for _ in range(k * 4):
+            value = self.pick()
+            if value not in chosen:
+                chosen.append(value)
+                if len(chosen) == k:
+                    break
+        return chosen
+
+
+def _order_status(rng: random.Random, age: timedelta, provider: str) -> Tuple[str, Optional[str]]:
+    """(status, refund status) for an order placed `age` ago."""
+    unpaid = "pending" if provider == "cod" else "paid"
+    if rng.random() < 0.05:
+        if provider == "cod":
+            return "cancelled", "none"
+        return "cancelled", "processing" if age.days < 7 else "refunded"
+    if age.days < 2:
+        return unpaid, None
+    if age.days < 7:
+        return rng.choice([unpaid, "shipped"]), None
+    return "delivered", None
+
+
+def clear_store(conn: Connection) -> None:
+    """Delete every row the generator writes, children first."""
+    if conn.dialect.name == "postgresql":
+        tables = ", ".join(m.__tablename__ for m in (Payment, OrderItem, Order, CartItem, Cart,
+                                                      ProductVariant, Product, User))
+        conn.exec_driver_sql(f"TRUNCATE {tables} RESTART IDENTITY CASCADE")
+        return
+    for model in (Payment, OrderItem, Order, CartItem, Cart, ProductVariant, Product, User):
+        conn.execute(delete(model))
+
+
+def generate(engine: Engine, volumes: Volumes, seed: int = 42) -> Dict[str, int]:
+    """
+    Migrate `engine` to head and replace the store with generated data.
+    Returns the number of rows written per table.
+    """
+    upgrade_to_head(engine)
+    rng = random.Random(seed)
+    history = timedelta(days=HISTORY_DAYS)
+    password_hashes = [
+        _password_hash(GENERATED_PASSWORD, f"{rng.getrandbits(128):032x}") for _ in range(HASH_POOL)
+    ]
+
+    with engine.begin() as conn:
+        clear_store(conn)
+        writer = _Writer(conn)
+
+        # Signups accelerate towards AS_OF
+        signups = sorted(AS_OF - history * (1 - rng.random() ** 0.5) for _ in range(volumes.users))
+        users = []
+        for i, created_at in enumerate(signups, start=1):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            users.append({
+                "id": i, "email": f"{first}.{last}.{i}@example.com".lower(),
+                "password": password_hashes[i % HASH_POOL], "name": f"{first} {last}",
+                "role": "admin" if i == 1 else "customer", "is_active": i == 1 or rng.random() > 0.01,
+                "created_at": created_at,
+            })
+        writer.write_stream(User, users)
+
+        products, variants = [], []
+        variant_prices: Dict[int, Decimal] = {}
+        for i in range(1, volumes.products + 1):
+            name = f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}"
+            slug = f"{_slug(name)}-{i}"
+            # Log-normal around 1,499, rounded to a x99 price point
+            price = Decimal(min(9999, max(299, int(rng.lognormvariate(7.3, 0.45)) // 100 * 100 + 99)))
+            products.append({
+                "id": i, "name": name, "slug": slug, "price": price,
+                "description": f"{name} in breathable cotton twill with an adjustable strap.",
+                "micro_story": f"The {name.lower()} for everyday city miles.",
+                "images": [f"/products/{slug}-{n}.jpg" for n in range(1, rng.randint(1, 4) + 1)],
+                "is_active": rng.random() > 0.05,
+                "created_at": AS_OF - history * rng.random(),
+            })
+            for color in rng.sample(COLORS, rng.choices([1, 2, 3, 4, 5], [10, 20, 35, 20, 15])[0]):
+                variant_id = len(variants) + 1
+                variant_prices[variant_id] = price
+                variants.append({
+                    "id": variant_id, "product_id": i, "color": color,
+                    "sku": f"GEN-{i:06d}-{color[:3].upper()}",
+                    "stock_quantity": 0 if rng.random() < 0.1 else rng.randint(1, 500),
+                })
+        writer.write_stream(Product, products)
+        writer.write_stream(ProductVariant, variants)
+
+        # Popularity is Zipf-like over a shuffled ranking, so it is not tied to ids
+        ranking = list(variant_prices)
+        rng.shuffle(ranking)
+        popular = _Picker(rng, ranking, (1 / rank ** 1.1 for rank in range(1, len(ranking) + 1)))
+        buyers = _Picker(rng, [u["id"] for u in users], (rng.paretovariate(1.16) for _ in users))
+
+        # Each order falls between its buyer's signup and AS_OF; ids follow time
+        placed = []
+        for _ in range(volumes.orders):
+            user_id = buyers.pick()
+            signup = users[user_id - 1]["created_at"]
+            placed.append((signup + (AS_OF - signup) * rng.random(), user_id))
+        placed.sort()
+        item_id = 0
+        for start in range(0, len(placed), CHUNK):
+            orders, items, payments = [], [], []
+            for order_id, (created_at, user_id) in enumerate(placed[start:start + CHUNK], start=start + 1):
+                provider = rng.choice(PROVIDERS)
+                status, refund = _order_status(rng, AS_OF - created_at, provider)
+                total = Decimal(0)
+                for variant_id in popular.pick_distinct(rng.choices([1, 2, 3, 4], [55, 25, 12, 8])[0]):
+                    item_id += 1
+                    quantity = rng.choices([1, 2, 3], [80, 15, 5])[0]
+                    total += variant_prices[variant_id] * quantity
+                    items.append({
+                        "id": item_id, "order_id": order_id, "product_variant_id": variant_id,
+                        "quantity": quantity, "price_at_purchase": variant_prices[variant_id],
+                    })
+                orders.append({
+                    "id": order_id, "user_id": user_id, "status": status, "total_amount": total,
+                    "payment_provider": provider,
+                    "tracking_number": f"TRK{order_id:010d}" if status in ("shipped", "delivered") else None,
+                    "cancellation_reason": "User cancelled" if status == "cancelled" else None,
+                    "refund_status": refund, "created_at": created_at,
+                })
+                # As at checkout: cash on delivery records no payment
+                if provider != "cod":
+                    payments.append({
+                        "id": order_id, "order_id": order_id, "provider": provider, "status": "success",
+                        "external_id": f"mock_{provider}_{order_id}", "created_at": created_at,
+                    })
+            writer.write(Order, orders)
+            writer.write(OrderItem, items)
+            writer.write(Payment, payments)
+
+        # Open carts from the last 30 days; most belong to guests
+        carts, cart_items = [], []
+        for cart_id in range(1, volumes.carts + 1):
+            carts.append({
+                "id": cart_id, "user_id": buyers.pick() if rng.random() < 0.4 else None,
+                "created_at": AS_OF - timedelta(days=30) * rng.random(),
+            })
+            for variant_id in popular.pick_distinct(rng.randint(1, 6)):
+                cart_items.append({
+                    "id": len(cart_items) + 1, "cart_id": cart_id, "product_variant_id": variant_id,
+                    "quantity": rng.choices([1, 2], [85, 15])[0],
+                })
+        writer.write_stream(Cart, carts)
+        writer.write_stream(CartItem, cart_items)
+
+    if engine.dialect.name == "postgresql":
+        # Explicit ids leave the sequences behind
+        with engine.begin() as conn:
+            for table in writer.counts:
+                conn.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) FROM {table}"
+                )
+            conn.exec_driver_sql("ANALYZE")
+    return writer.counts
+
+
+def table_counts(engine: Engine) -> Dict[str, int]:
+    """Current row count of every table the generator writes."""
+    with engine.connect() as conn:
+        return {
+            model.__tablename__: conn.scalar(select(func.count()).select_from(model.__table__))
+            for model in (User, Product, ProductVariant, Order, OrderItem, Payment, Cart, CartItem)
+        }
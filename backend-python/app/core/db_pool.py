@@ -0,0 +1,118 @@
+"""Instrumented connection pools and pool metrics."""
+import threading
+import time
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolMetrics:
+    """Checkout counters and wait times for one named pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_errors = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.connects = 0
+        self.invalidations = 0
+        self.peak_in_use = 0
+
+    def record_checkout(self, waited: float, in_use: int) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            if waited > self.wait_seconds_max:
+                self.wait_seconds_max = waited
+            if in_use > self.peak_in_use:
+                self.peak_in_use = in_use
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.checkout_errors += 1
+
+    def stats(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "checkout_errors": self.checkout_errors,
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "wait_seconds_max": round(self.wait_seconds_max, 6),
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "peak_in_use": self.peak_in_use,
+        }
+
+
+# Keyed by pool logging name, which survives Pool.recreate()
+_pool_metrics: Dict[str, PoolMetrics] = {}
+
+
+def get_pool_metrics(name: str) -> PoolMetrics:
+    metrics = _pool_metrics.get(name)
+    if metrics is None:
+        metrics = _pool_metrics.setdefault(name, PoolMetrics(name))
+    return metrics
+
+
+class _WaitTimingMixin:
+    """Times how long each checkout waits for a free connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics = get_pool_metrics(self._orig_logging_name or "default")
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except Exception:
+            self._metrics.record_error()
+            raise
+        self._metrics.record_checkout(time.perf_counter() - start, self.checkedout())
+        return record
+
+
+class InstrumentedQueuePool(_WaitTimingMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_WaitTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def attach_pool_listeners(engine: Engine) -> None:
+    """Count new and invalidated DBAPI connections for an instrumented engine."""
+    pool = engine.pool
+    if not isinstance(pool, _WaitTimingMixin):
+        return
+    metrics = pool._metrics
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        metrics.connects += 1
+
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.invalidations += 1
+
+
+def pool_status(pool) -> dict:
+    """Live pool occupancy plus accumulated metrics."""
+    status = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "in_use": pool.checkedout(),
+            # QueuePool.overflow() starts at -size; clamp to connections opened beyond size
+            "overflow": max(0, pool.overflow()),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+        })
+    if isinstance(pool, _WaitTimingMixin):
+        status.update(pool._metrics.stats())
+    return status
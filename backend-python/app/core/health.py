@@ -0,0 +1,180 @@
+"""
+Liveness, readiness and graceful draining.
+
+/health/live only says the process is serving requests. /health/ready says
+whether this worker should get traffic. It fails while the worker is
+starting or draining, when the database does not answer, when its pool has
+no headroom left, and until the startup cache warm-up has finished. The
+result is cached for a moment, so frequent probes cost one check.
+
+Draining starts on SIGTERM, before the server stops listening, or at
+lifespan shutdown at the latest. Readiness then fails, new requests get 503
+with `Connection: close`, and shutdown waits up to SHUTDOWN_DRAIN_TIMEOUT
+for the requests in flight, such as checkouts, to finish.
+"""
+import asyncio
+import json
+import logging
+import signal
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.core.db_pool import pool_status
+from app.core.query_stats import route_template
+
+logger = logging.getLogger(__name__)
+
+PROBE_PATHS = ("/health",)
+
+
+class Health:
+    """Readiness checks and the in-flight requests a drain waits for."""
+
+    def __init__(self, cache_seconds: float = 2.0, db_timeout: float = 1.0, min_pool_headroom: int = 1):
+        self.cache_seconds = cache_seconds
+        self.db_timeout = db_timeout
+        self.min_pool_headroom = min_pool_headroom
+        self.started = False
+        self.draining = False
+        self.warm_task: Optional[asyncio.Task] = None
+        self.in_flight: Dict[int, dict] = {}
+        self._result: Optional[Tuple[float, dict]] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._previous_sigterm = None
+
+    def start(self, warm_task: Optional[asyncio.Task] = None) -> None:
+        """Call on the event loop once startup is complete."""
+        self.started = True
+        self.draining = False
+        self.warm_task = warm_task
+        self._result = None
+        self._lock = asyncio.Lock()
+        self._install_sigterm()
+
+    def stop(self) -> None:
+        self.started = False
+        if self._previous_sigterm is not None:
+            signal.signal(signal.SIGTERM, self._previous_sigterm)
+            self._previous_sigterm = None
+
+    def _install_sigterm(self) -> None:
+        # Chained in front of the server's own handler, which stops listening
+        if threading.current_thread() is not threading.main_thread():
+            return
+        previous = signal.getsignal(signal.SIGTERM)
+        if not callable(previous):
+            return
+
+        def on_sigterm(signum, frame):
+            self.begin_drain()
+            previous(signum, frame)
+
+        self._previous_sigterm = previous
+        signal.signal(signal.SIGTERM, on_sigterm)
+
+    def begin_drain(self) -> None:
+        if not self.draining:
+            self.draining = True
+            logger.info(f"Draining: refusing new requests, {len(self.in_flight)} in flight")
+
+    async def drain(self, timeout: float) -> List[str]:
+        """Wait for in-flight requests; returns those still running at the deadline."""
+        self.begin_drain()
+        deadline = time.monotonic() + timeout
+        while self.in_flight and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        remaining = [f"{scope['method']} {route_template(scope)}" for scope in list(self.in_flight.values())]
+        if remaining:
+            logger.warning(f"Shutting down with {len(remaining)} requests still in flight: {', '.join(remaining)}")
+        return remaining
+
+    async def readiness(self) -> dict:
+        if self.draining:
+            return {"ready": False, "status": "draining"}
+        if not self.started:
+            return {"ready": False, "status": "starting"}
+        cached = self._result
+        if cached is None or time.monotonic() - cached[0] >= self.cache_seconds:
+            # Concurrent probes share one check
+            async with self._lock:
+                cached = self._result
+                if cached is None or time.monotonic() - cached[0] >= self.cache_seconds:
+                    cached = self._result = (time.monotonic(), await self._check())
+        return cached[1]
+
+    async def _check(self) -> dict:
+        checks = {
+            "database": await self._check_database(),
+            "pool": self._check_pool(),
+            "cache": "warming" if self.warm_task is not None and not self.warm_task.done() else "ok",
+        }
+        ready = all(result == "ok" for result in checks.values())
+        return {"ready": ready, "status": "ready" if ready else "not ready", "checks": checks}
+
+    async def _check_database(self) -> str:
+        try:
+            await asyncio.wait_for(self._ping(), self.db_timeout)
+        except asyncio.TimeoutError:
+            return "timeout"
+        except Exception as e:
+            return f"error: {type(e).__name__}"
+        return "ok"
+
+    async def _ping(self) -> None:
+        from app.database import async_engine
+
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    def _pools(self) -> list:
+        from app.database import async_engine, async_read_engines
+
+        return [async_engine.sync_engine.pool, *(e.sync_engine.pool for e in async_read_engines)]
+
+    def _check_pool(self) -> str:
+        for pool in self._pools():
+            status = pool_status(pool)
+            if "size" not in status or status["max_overflow"] < 0:
+                continue  # not a bounded QueuePool
+            headroom = status["size"] + status["max_overflow"] - status["in_use"]
+            if headroom < self.min_pool_headroom:
+                return f"exhausted: {status['in_use']} connections in use"
+        return "ok"
+
+
+health = Health(settings.READINESS_CACHE_SECONDS, settings.READINESS_DB_TIMEOUT, settings.READINESS_MIN_POOL_HEADROOM)
+
+
+class DrainMiddleware:
+    """
+    Pure ASGI middleware; tracks requests in flight and, while draining,
+    answers new ones (other than probes) with 503 and closes the connection.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if health.draining and not scope["path"].startswith(PROBE_PATHS):
+            body = json.dumps({"detail": "Server is shutting down"}).encode()
+            await send({"type": "http.response.start", "status": 503, "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", b"1"),
+                (b"connection", b"close"),
+            ]})
+            await send({"type": "http.response.body", "body": body})
+            return
+        key = id(scope)
+        health.in_flight[key] = scope
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            health.in_flight.pop(key, None)
@@ -0,0 +1,130 @@
+"""
+Cross-worker cache invalidation and admin changes.
+
+With the memory cache backend every worker holds its own copy of the cached
+reads, so a write handled by one worker would leave the others serving the
+old rows until their TTL ran out. Each worker binds a Unix datagram socket
+in a shared directory (CACHE_INVALIDATION_DIR); the tags a write invalidates
+are sent to every other socket there, and receivers drop the same tags from
+their own cache. Sockets left behind by workers that exited are removed by
+the first sender that finds them dead.
+
+Admin changes to per-worker state (profiler sampling, slow-query resets)
+travel the same way, as messages on their own topic.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SUFFIX = ".sock"
+MAX_MESSAGE = 65_536
+# Topic of cache invalidations; the message data is the list of tags
+TAGS = "tags"
+
+
+class InvalidationChannel:
+    """One worker's end of the broadcast: publishes its invalidations, applies everyone else's."""
+
+    def __init__(self, directory: str, name: Optional[str] = None):
+        self.directory = directory
+        self.path = os.path.join(directory, f"{name or os.getpid()}{SUFFIX}")
+        self.sent = 0
+        self.received = 0
+        self.dropped = 0
+        self._sock: Optional[socket.socket] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._handlers: Dict[str, Callable[[Any], None]] = {}
+
+    def open(self, handlers: Dict[str, Callable[[Any], None]]) -> None:
+        """Call on the event loop; `handlers[topic]` receives the data of each message another worker sent."""
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(self.path)
+        sock.setblocking(False)
+        self._sock = sock
+        self._handlers = handlers
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(sock.fileno(), self._receive)
+
+    def close(self) -> None:
+        if self._sock is None:
+            return
+        self._loop.remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def peers(self) -> List[str]:
+        return [
+            os.path.join(self.directory, name) for name in os.listdir(self.directory)
+            if name.endswith(SUFFIX) and os.path.join(self.directory, name) != self.path
+        ]
+
+    def publish(self, tags: List[str]) -> None:
+        """Send invalidated `tags` to every other worker; never blocks."""
+        if tags:
+            self.broadcast(TAGS, list(tags))
+
+    def broadcast(self, topic: str, data: Any = None) -> int:
+        """Send a message to every other worker; never blocks. Returns how many it reached."""
+        if self._sock is None:
+            return 0
+        payload = json.dumps({"topic": topic, "data": data}).encode()
+        reached = 0
+        for peer in self.peers():
+            try:
+                self._sock.sendto(payload, peer)
+                self.sent += 1
+                reached += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Nobody bound to it any more
+                try:
+                    os.unlink(peer)
+                except FileNotFoundError:
+                    pass
+            except OSError:
+                # Receiver's buffer is full; its TTLs still bound the staleness
+                self.dropped += 1
+        return reached
+
+    def _receive(self) -> None:
+        while True:
+            try:
+                payload = self._sock.recv(MAX_MESSAGE)
+            except BlockingIOError:
+                return
+            self.received += 1
+            try:
+                message = json.loads(payload)
+                handler = self._handlers.get(message["topic"])
+                if handler is not None:
+                    handler(message["data"])
+            except Exception as e:
+                logger.warning(f"Applying a message from another worker failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "peers": len(self.peers()) if self._sock is not None else 0,
+            "sent": self.sent, "received": self.received, "dropped": self.dropped,
+        }
+
+
+# This worker's channel, opened by the app's lifespan when workers share a directory
+worker_channel: Optional[InvalidationChannel] = None
+
+
+def broadcast(topic: str, data: Any = None) -> int:
+    """Send a message to the other workers, if any; returns how many it reached."""
+    if worker_channel is None:
+        return 0
+    return worker_channel.broadcast(topic, data)
@@ -0,0 +1,295 @@
+"""
+Non-blocking log pipeline.
+
+Loggers on the request path only enqueue records; a background thread per
+sink drains the queue in batches, formats them and writes each batch with
+one call. A full queue drops records (counted) instead of blocking the
+event loop. Access logs are structured JSON, with 2xx responses on hot
+routes sampled.
+"""
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, RotatingFileHandler
+from typing import List, Optional, Sequence
+
+from app.config import settings
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; structured fields come from `extra={"fields": {...}}`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        else:
+            entry["message"] = record.getMessage()
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class BatchStreamHandler(logging.StreamHandler):
+    def emit_batch(self, records: List[logging.LogRecord]) -> None:
+        self.stream.write("".join(self.format(r) + self.terminator for r in records))
+        self.flush()
+
+
+class BatchRotatingFileHandler(RotatingFileHandler):
+    """Size-based rotation, checked once per batch rather than per record."""
+
+    def emit_batch(self, records: List[logging.LogRecord]) -> None:
+        text = "".join(self.format(r) + self.terminator for r in records)
+        if self.stream is None:
+            self.stream = self._open()
+        if self.maxBytes > 0 and self.stream.tell() + len(text) >= self.maxBytes and self.stream.tell() > 0:
+            self.doRollover()
+        self.stream.write(text)
+        self.flush()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Enqueues without ever blocking; counts what a full queue refused."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Structured records are formatted by the sink; keep them as they are
+        if getattr(record, "fields", None):
+            return record
+        return super().prepare(record)
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogSink:
+    """A bounded queue drained in batches by a thread into one target handler."""
+
+    def __init__(self, target: logging.Handler, max_queue: int = 10_000,
+                 batch_size: int = 256, flush_interval: float = 0.5):
+        self.target = target
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: queue.Queue = queue.Queue(max_queue)
+        self.handler = DroppingQueueHandler(self.queue)
+        self.batches = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "LogSink":
+        self._thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Write everything queued so far, then stop the thread."""
+        if self._thread is None:
+            return
+        self.queue.put(None)
+        self._thread.join()
+        self._thread = None
+        self.target.close()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued so far is written."""
+        if self._thread is None:
+            return True
+        written = threading.Event()
+        try:
+            self.queue.put(written, timeout=timeout)
+        except queue.Full:
+            return False
+        return written.wait(timeout)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = []
+            flushed = None
+            stopping = False
+            while True:
+                if item is None:
+                    stopping = True
+                    break
+                if isinstance(item, threading.Event):
+                    flushed = item
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            if flushed is not None:
+                flushed.set()
+            if stopping:
+                return
+
+    def _write(self, batch: List[logging.LogRecord]) -> None:
+        try:
+            if hasattr(self.target, "emit_batch"):
+                self.target.emit_batch(batch)
+            else:
+                for record in batch:
+                    self.target.handle(record)
+            self.batches += 1
+        except Exception:
+            self.target.handleError(batch[-1])
+
+
+def _sink(target: logging.Handler, formatter: logging.Formatter) -> LogSink:
+    target.setFormatter(formatter)
+    return LogSink(target, settings.LOG_QUEUE_SIZE, settings.LOG_BATCH_SIZE, settings.LOG_FLUSH_INTERVAL).start()
+
+
+def stream_sink(stream) -> LogSink:
+    """JSON lines to a stream such as stdout, for log collectors."""
+    return _sink(BatchStreamHandler(stream), JsonFormatter())
+
+
+def file_sink(path: str, max_bytes: int, backups: int) -> LogSink:
+    """JSON lines to a rotating file; creates the directory."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return _sink(BatchRotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups), JsonFormatter())
+
+
+def worker_path(path: str) -> str:
+    """
+    This process's log file: with LOG_FILES_PER_WORKER the pid goes before
+    the extension (logs/access.1234.jsonl).
+    """
+    if not path or not settings.LOG_FILES_PER_WORKER:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{os.getpid()}{ext}"
+
+
+_app_sink: Optional[LogSink] = None
+
+
+def configure_logging() -> LogSink:
+    """
+    Route the root logger through a queue to stderr (text or JSON). Called by
+    the launcher and at startup, not on import, so importing the app leaves
+    the embedding process's logging alone.
+    """
+    global _app_sink
+    if _app_sink is not None:
+        return _app_sink
+    formatter = (JsonFormatter() if settings.LOG_FORMAT == "json"
+                 else logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+    _app_sink = _sink(BatchStreamHandler(sys.stderr), formatter)
+    root = logging.getLogger()
+    root.setLevel(settings.LOG_LEVEL)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_app_sink.handler)
+    return _app_sink
+
+
+def flush_logging(timeout: float = 5.0) -> None:
+    """Write out the application log queued so far (at shutdown)."""
+    if _app_sink is not None:
+        _app_sink.flush(timeout)
+
+
+def restart_after_fork() -> None:
+    """
+    Sink threads do not survive fork(). A worker forked from a preloading
+    master starts its own; records still queued belong to the master.
+    """
+    global _app_sink
+    if _app_sink is None:
+        return
+    old = _app_sink
+    root = logging.getLogger()
+    root.removeHandler(old.handler)
+    _app_sink = LogSink(old.target, old.queue.maxsize, old.batch_size, old.flush_interval).start()
+    root.addHandler(_app_sink.handler)
+
+
+class AccessLog:
+    """Structured per-request log lines, with 2xx on hot routes sampled."""
+
+    def __init__(self, sampled_prefixes: Sequence[str] = (), sample_rate: float = 1.0, slow_ms: float = 0.0):
+        self.sampled_prefixes = tuple(sampled_prefixes)
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.logger = logging.getLogger("app.access")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.sink: Optional[LogSink] = None
+
+    def open(self, sink: LogSink) -> None:
+        self.close()
+        self.sink = sink
+        self.logger.addHandler(sink.handler)
+
+    def close(self) -> None:
+        if self.sink is not None:
+            self.logger.removeHandler(self.sink.handler)
+            self.sink.stop()
+            self.sink = None
+
+    def sample_rate_for(self, path: str, status: int, duration_ms: float) -> float:
+        """Probability of keeping this request's line; errors and slow requests are always kept."""
+        if status < 200 or status >= 300 or (self.slow_ms and duration_ms >= self.slow_ms):
+            return 1.0
+        return self.sample_rate if path.startswith(self.sampled_prefixes) else 1.0
+
+    def log(self, method: str, path: str, route: str, status: int, duration_ms: float, **fields) -> bool:
+        if self.sink is None:
+            return False
+        rate = self.sample_rate_for(path, status, duration_ms)
+        if rate < 1.0 and random.random() >= rate:
+            return False
+        self.logger.info("", extra={"fields": {
+            "method": method, "path": path, "route": route, "status": status,
+            "duration_ms": round(duration_ms, 2), "sample_rate": rate, **fields,
+        }})
+        return True
+
+    @property
+    def dropped(self) -> int:
+        return self.sink.handler.dropped if self.sink is not None else 0
+
+
+access_log = AccessLog(
+    [p.strip() for p in settings.ACCESS_LOG_SAMPLED_PREFIXES.split(",") if p.strip()],
+    settings.ACCESS_LOG_SAMPLE_RATE,
+    settings.ACCESS_LOG_SLOW_MS,
+)
+
+
+def dropped_records() -> int:
+    """Records refused by full queues since startup."""
+    total = access_log.dropped
+    if _app_sink is not None:
+        total += _app_sink.handler.dropped
+    return total
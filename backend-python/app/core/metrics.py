@@ -0,0 +1,378 @@
+"""
+Prometheus text-format metrics.
+
+Request counters are plain dict/list updates made on the event loop thread,
+so the hot path takes no locks. Everything else (query stats, pools, cache,
+admission) is read from its owner at scrape time. With METRICS_MULTIPROC_DIR
+set, every worker periodically writes its samples to that directory and a
+scrape of any worker merges all of them.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.admission import get_admission_controller
+from app.core.cache import get_query_cache
+from app.core.db_pool import pool_status
+from app.core.logs import dropped_records
+from app.core.query_stats import route_query_metrics
+from app.core.stalls import StallDetector, stall_detector
+from app.database import engine, async_engine, async_read_engines
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class MetricFamily:
+    """
+    One metric name and its samples. `merge` says how samples from several
+    workers combine: "sum" for counters/histograms and additive gauges,
+    "max" for gauges like loop lag, "live" is "sum" over live workers only.
+    """
+
+    __slots__ = ("name", "kind", "help", "merge", "samples")
+
+    def __init__(self, name: str, kind: str, help: str, merge: str = "sum"):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.merge = merge
+        self.samples: Dict[Tuple[str, Labels], float] = {}
+
+    def add(self, value: float, suffix: str = "", **labels) -> None:
+        key = (suffix, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        self.samples[key] = self.samples.get(key, 0) + value
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name, "kind": self.kind, "help": self.help, "merge": self.merge,
+            "samples": [[suffix, list(labels), value] for (suffix, labels), value in self.samples.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MetricFamily":
+        family = cls(data["name"], data["kind"], data["help"], data["merge"])
+        for suffix, labels, value in data["samples"]:
+            family.samples[(suffix, tuple(tuple(pair) for pair in labels))] = value
+        return family
+
+
+class RequestMetrics:
+    """Per-worker request counts, latency histograms and in-flight gauge."""
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        # (method, route, status) -> [bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, str, str], List[float]] = {}
+        self.in_flight = 0
+
+    def observe(self, method: str, route: str, status: int, seconds: float) -> None:
+        key = (method, route, str(status))
+        series = self._series.get(key)
+        if series is None:
+            series = self._series.setdefault(key, [0] * (len(self.buckets) + 2))
+        # Non-cumulative buckets; the exporter accumulates them
+        series[bisect_left(self.buckets, seconds)] += 1
+        series[-1] += seconds
+
+    def collect(self) -> List[MetricFamily]:
+        requests = MetricFamily("http_requests_total", "counter", "HTTP requests handled.")
+        latency = MetricFamily(
+            "http_request_duration_seconds", "histogram", "HTTP request latency by route and status."
+        )
+        for (method, route, status), series in list(self._series.items()):
+            labels = {"method": method, "route": route, "status": status}
+            count = 0
+            for bound, hits in zip(self.buckets, series):
+                count += hits
+                latency.add(count, "_bucket", le=repr(bound), **labels)
+            count += series[len(self.buckets)]
+            latency.add(count, "_bucket", le="+Inf", **labels)
+            latency.add(count, "_count", **labels)
+            latency.add(series[-1], "_sum", **labels)
+            requests.add(count, **labels)
+        in_flight = MetricFamily(
+            "http_requests_in_flight", "gauge", "Requests currently being handled.", merge="live"
+        )
+        in_flight.add(self.in_flight)
+        return [requests, latency, in_flight]
+
+
+request_metrics = RequestMetrics()
+
+
+class LoopLagMonitor:
+    """
+    Measures how late a periodic sleep wakes up, i.e. event-loop blocking.
+    With a stall detector, the probe also serves as its heartbeat and runs
+    at least twice per stall threshold.
+    """
+
+    def __init__(self, interval: float = 0.5, stalls: Optional[StallDetector] = None):
+        self.interval = interval
+        self.stalls = stalls
+        self.lag = 0.0
+        self.lag_max = 0.0
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stalls = self.stalls if self.stalls is not None and self.stalls.enabled else None
+        interval = min(self.interval, stalls.threshold / 2) if stalls else self.interval
+        if stalls:
+            stalls.start(interval)
+        try:
+            while True:
+                start = loop.time()
+                if stalls:
+                    stalls.beat()
+                await asyncio.sleep(interval)
+                self.lag = max(0.0, loop.time() - start - interval)
+                if self.lag > self.lag_max:
+                    self.lag_max = self.lag
+                if stalls and self.lag >= stalls.threshold:
+                    stalls.record(self.lag)
+        finally:
+            if stalls:
+                stalls.stop()
+
+    def collect(self) -> List[MetricFamily]:
+        lag = MetricFamily(
+            "event_loop_lag_seconds", "gauge", "Last measured event-loop wake-up delay.", merge="max"
+        )
+        lag.add(self.lag)
+        lag_max = MetricFamily(
+            "event_loop_lag_max_seconds", "gauge", "Largest event-loop wake-up delay seen.", merge="max"
+        )
+        lag_max.add(self.lag_max)
+        families = [lag, lag_max]
+        if self.stalls is not None and self.stalls.enabled:
+            stalls = MetricFamily(
+                "event_loop_stalls_total", "counter", "Event-loop stalls over the threshold, by route."
+            )
+            stalled = MetricFamily(
+                "event_loop_stall_seconds_total", "counter", "Time the event loop spent stalled, by route."
+            )
+            for route, (count, seconds) in self.stalls.by_route().items():
+                stalls.add(count, route=route)
+                stalled.add(seconds, route=route)
+            families += [stalls, stalled]
+        return families
+
+
+loop_lag_monitor = LoopLagMonitor(stalls=stall_detector)
+
+
+def collect_process() -> List[MetricFamily]:
+    """All samples owned by this worker."""
+    families = request_metrics.collect() + loop_lag_monitor.collect()
+
+    queries = MetricFamily("db_queries_total", "counter", "SQL statements issued, by route.")
+    db_seconds = MetricFamily("db_query_seconds_total", "counter", "Time spent in SQL statements, by route.")
+    for route, entry in route_query_metrics.snapshot().items():
+        queries.add(entry["queries"], route=route)
+        db_seconds.add(entry["db_seconds"], route=route)
+    families += [queries, db_seconds]
+
+    pool_in_use = MetricFamily(
+        "db_pool_connections_in_use", "gauge", "Checked-out pool connections.", merge="live"
+    )
+    pool_checkouts = MetricFamily("db_pool_checkouts_total", "counter", "Pool checkouts.")
+    pool_wait = MetricFamily(
+        "db_pool_checkout_wait_seconds_total", "counter", "Time spent waiting for a pooled connection."
+    )
+    pools = [("sync", engine.pool), ("async", async_engine.sync_engine.pool)]
+    pools += [(f"async-read-{i}", e.sync_engine.pool) for i, e in enumerate(async_read_engines)]
+    for name, pool in pools:
+        status = pool_status(pool)
+        if "in_use" in status:
+            pool_in_use.add(status["in_use"], pool=name)
+        if "checkouts" in status:
+            pool_checkouts.add(status["checkouts"], pool=name)
+            pool_wait.add(status["wait_seconds_total"], pool=name)
+    families += [pool_in_use, pool_checkouts, pool_wait]
+
+    cache = get_query_cache()
+    if cache is not None:
+        hits = MetricFamily("cache_hits_total", "counter", "Query cache hits, by Storage method.")
+        misses = MetricFamily("cache_misses_total", "counter", "Query cache misses, by Storage method.")
+        for method, stats in cache.stats().items():
+            hits.add(stats["hits"], method=method)
+            misses.add(stats["misses"], method=method)
+        families += [hits, misses]
+
+    dropped = MetricFamily("log_records_dropped_total", "counter", "Log records dropped by full log queues.")
+    dropped.add(dropped_records())
+    families.append(dropped)
+
+    controller = get_admission_controller()
+    if controller is not None:
+        admitted = MetricFamily(
+            "admission_in_flight", "gauge", "Requests holding an admission slot.", merge="live"
+        )
+        queued = MetricFamily("admission_queue_depth", "gauge", "Requests waiting for a slot.", merge="live")
+        rejected = MetricFamily("admission_rejected_total", "counter", "Requests shed by admission control.")
+        for name, stats in controller.stats()["classes"].items():
+            admitted.add(stats["in_flight"], route_class=name)
+            queued.add(stats["queue_depth"], route_class=name)
+            rejected.add(stats["rejected"] + stats["timed_out"], route_class=name)
+        families += [admitted, queued, rejected]
+    return families
+
+
+def _cache_hit_ratio(families: Dict[str, MetricFamily]) -> Optional[MetricFamily]:
+    # Derived after merging, since ratios cannot be summed across workers
+    hits, misses = families.get("cache_hits_total"), families.get("cache_misses_total")
+    if hits is None:
+        return None
+    ratio = MetricFamily("cache_hit_ratio", "gauge", "Query cache hit ratio, by Storage method.")
+    for key, hit_count in hits.samples.items():
+        lookups = hit_count + misses.samples.get(key, 0)
+        ratio.samples[key] = hit_count / lookups if lookups else 0.0
+    return ratio
+
+
+def merge(worker_families: Iterable[Tuple[List[MetricFamily], bool]]) -> Dict[str, MetricFamily]:
+    """Combine (families, is_live) from several workers into one set."""
+    merged: Dict[str, MetricFamily] = {}
+    for families, live in worker_families:
+        for family in families:
+            if family.merge == "live" and not live:
+                continue
+            target = merged.get(family.name)
+            if target is None:
+                target = merged[family.name] = MetricFamily(
+                    family.name, family.kind, family.help, family.merge
+                )
+            for key, value in family.samples.items():
+                if family.merge == "max":
+                    target.samples[key] = max(target.samples.get(key, value), value)
+                else:
+                    target.samples[key] = target.samples.get(key, 0) + value
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render(families: Dict[str, MetricFamily]) -> str:
+    ratio = _cache_hit_ratio(families)
+    if ratio is not None:
+        families = {**families, ratio.name: ratio}
+    lines = []
+    for family in families.values():
+        lines.append(f"# HELP {family.name} {family.help}")
+        lines.append(f"# TYPE {family.name} {family.kind}")
+        for (suffix, labels), value in family.samples.items():
+            label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+            lines.append(f"{family.name}{suffix}{{{label_text}}} {value}" if label_text
+                         else f"{family.name}{suffix} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# Samples of workers that have exited, folded together by the launcher
+EXITED_FILE = "metrics-exited.json"
+
+
+def _worker_file(directory: str, pid: int) -> str:
+    return os.path.join(directory, f"metrics-{pid}.json")
+
+
+def _read_families(path: str) -> List[MetricFamily]:
+    with open(path) as f:
+        return [MetricFamily.from_dict(d) for d in json.load(f)]
+
+
+def _write_families(path: str, families: Iterable[MetricFamily]) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump([family.to_dict() for family in families], f)
+    os.replace(tmp, path)
+
+
+def write_worker_snapshot(directory: str) -> None:
+    """Atomically publish this worker's samples to the shared directory."""
+    _write_families(_worker_file(directory, os.getpid()), collect_process())
+
+
+def retire_worker_snapshot(directory: str, pid: int) -> None:
+    """
+    Fold an exited worker's snapshot into EXITED_FILE and remove it, so the
+    directory holds one file per live worker while totals never go
+    backwards. Only the launcher calls this, one worker at a time.
+    """
+    path = _worker_file(directory, pid)
+    exited = os.path.join(directory, EXITED_FILE)
+    try:
+        families = _read_families(path)
+    except (OSError, ValueError):
+        families = []
+    snapshots = [(families, False)]
+    try:
+        snapshots.append((_read_families(exited), False))
+    except (OSError, ValueError):
+        pass
+    if families:
+        _write_families(exited, merge(snapshots).values())
+    for name in (path, f"{path}.tmp"):
+        try:
+            os.remove(name)
+        except FileNotFoundError:
+            pass
+
+
+def clear_worker_snapshots(directory: str) -> None:
+    """Remove every snapshot left in `directory` by an earlier run."""
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name.startswith("metrics-") and (name.endswith(".json") or name.endswith(".json.tmp")):
+            os.remove(os.path.join(directory, name))
+
+
+def read_worker_snapshots(directory: str, live_after: float) -> List[Tuple[List[MetricFamily], bool]]:
+    """
+    Snapshots from every worker, plus the folded EXITED_FILE. Counters of
+    exited workers are kept so totals never go backwards; their gauges are not.
+    """
+    snapshots = []
+    for name in os.listdir(directory):
+        if not (name.startswith("metrics-") and name.endswith(".json")):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            live = os.path.getmtime(path) >= live_after
+            families = _read_families(path)
+        except (OSError, ValueError):
+            continue
+        snapshots.append((families, live))
+    return snapshots
+
+
+def generate_latest(directory: Optional[str] = None, flush_interval: float = 5.0) -> str:
+    """The /metrics payload: this worker only, or all workers sharing `directory`."""
+    if not directory:
+        return render(merge([(collect_process(), True)]))
+    write_worker_snapshot(directory)
+    live_after = time.time() - 3 * flush_interval
+    return render(merge(read_worker_snapshots(directory, live_after)))
+
+
+async def snapshot_loop(directory: str, interval: float) -> None:
+    """Keep this worker's snapshot fresh so other workers can serve it."""
+    os.makedirs(directory, exist_ok=True)
+    while True:
+        try:
+            write_worker_snapshot(directory)
+        except Exception as e:
+            logger.warning(f"Writing metrics snapshot failed: {e}")
+        await asyncio.sleep(interval)
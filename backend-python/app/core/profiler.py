@@ -0,0 +1,247 @@
+"""
+On-demand request profiling.
+
+A request is profiled when an admin sends `X-Profile: cprofile` (or
+`sampler`), or when an admin has switched on sampling for a fraction of
+requests. cProfile output is saved as pstats, the statistical sampler's as
+speedscope JSON. Both observe the whole event loop thread, so concurrent
+requests show up too; only one request is profiled at a time.
+"""
+import asyncio
+import cProfile
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from typing import List, Optional
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.storage import AsyncStorage
+
+MODES = ("cprofile", "sampler")
+
+_SAFE_NAME = re.compile(r"^[\w.-]+$")
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval from a helper thread."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.frames: List[dict] = []
+        self._frame_index: dict = {}
+        self.samples: List[List[int]] = []
+        self.weights: List[float] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                key = (code.co_name, code.co_filename, code.co_firstlineno)
+                index = self._frame_index.get(key)
+                if index is None:
+                    index = self._frame_index[key] = len(self.frames)
+                    self.frames.append({"name": key[0], "file": key[1], "line": key[2]})
+                stack.append(index)
+                frame = frame.f_back
+            stack.reverse()
+            self.samples.append(stack)
+            self.weights.append(now - last)
+            last = now
+
+    def speedscope(self, name: str) -> dict:
+        total = sum(self.weights)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "urbanturban-profiler",
+            "shared": {"frames": self.frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": total,
+                "samples": self.samples,
+                "weights": self.weights,
+            }],
+        }
+
+
+class Profiler:
+    """Profile store plus the admin-controlled sampling toggle."""
+
+    def __init__(self, directory: str, max_files: int, sample_interval: float):
+        self.directory = directory
+        self.max_files = max_files
+        self.sample_interval = sample_interval
+        self.sampling_rate = 0.0
+        self.sampling_mode = "cprofile"
+        self.sampling_path_prefix = ""
+        self.busy = False
+        # Sessions for the admin check, which runs outside FastAPI dependencies
+        self.session_factory = AsyncSessionLocal
+
+    def configure_sampling(self, rate: float, mode: str, path_prefix: str = "") -> None:
+        self.sampling_rate = rate
+        self.sampling_mode = mode
+        self.sampling_path_prefix = path_prefix
+
+    def status(self) -> dict:
+        return {
+            "sampling_rate": self.sampling_rate,
+            "sampling_mode": self.sampling_mode,
+            "sampling_path_prefix": self.sampling_path_prefix,
+            "busy": self.busy,
+        }
+
+    def sampled_mode(self, path: str) -> Optional[str]:
+        """Mode for a request picked by the sampling toggle, if any."""
+        rate = self.sampling_rate
+        if rate <= 0 or not path.startswith(self.sampling_path_prefix):
+            return None
+        if rate < 1 and random.random() >= rate:
+            return None
+        return self.sampling_mode
+
+    def profile_name(self, method: str, path: str, mode: str) -> str:
+        slug = re.sub(r"[^\w]+", "_", path).strip("_")[:60] or "root"
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        extension = "prof" if mode == "cprofile" else "speedscope.json"
+        return f"{stamp}-{method.lower()}-{slug}-{uuid.uuid4().hex[:8]}.{extension}"
+
+    def path_for(self, name: str) -> Optional[str]:
+        if not _SAFE_NAME.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+    def list_profiles(self) -> List[dict]:
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                profiles.append({
+                    "name": entry.name,
+                    "format": "pstats" if entry.name.endswith(".prof") else "speedscope",
+                    "bytes": stat.st_size,
+                    "created_at": stat.st_mtime,
+                })
+        profiles.sort(key=lambda p: p["created_at"], reverse=True)
+        return profiles
+
+    def _prune(self) -> None:
+        for profile in self.list_profiles()[self.max_files:]:
+            try:
+                os.remove(os.path.join(self.directory, profile["name"]))
+            except OSError:
+                pass
+
+    def save_cprofile(self, profile: cProfile.Profile, name: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        profile.dump_stats(os.path.join(self.directory, name))
+        self._prune()
+
+    def save_speedscope(self, sampler: StackSampler, name: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(sampler.speedscope(name), f)
+        os.replace(f"{path}.tmp", path)
+        self._prune()
+
+
+profiler = Profiler(settings.PROFILE_DIR, settings.PROFILER_MAX_FILES, settings.PROFILER_SAMPLE_INTERVAL)
+
+
+async def _is_admin(scope: dict) -> bool:
+    user_id = scope.get("session", {}).get("user_id")
+    if not user_id:
+        return False
+    async with profiler.session_factory() as db:
+        user = await AsyncStorage(db).get_user(user_id)
+    return user is not None and user.role == "admin"
+
+
+class ProfilerMiddleware:
+    """
+    Pure ASGI middleware; must sit inside SessionMiddleware so the session
+    is available for the admin check. Profiled responses carry
+    `X-Profile-Id` with the name to download from /internal/profiles.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.PROFILER_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        mode = self._header_mode(scope)
+        if mode is not None and not await _is_admin(scope):
+            mode = None
+        if mode is None:
+            mode = profiler.sampled_mode(scope["path"])
+        if mode is None or profiler.busy:
+            await self.app(scope, receive, send)
+            return
+
+        name = profiler.profile_name(scope["method"], scope["path"], mode)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-profile-id", name.encode())]
+            await send(message)
+
+        profiler.busy = True
+        try:
+            if mode == "cprofile":
+                profile = cProfile.Profile()
+                profile.enable()
+                try:
+                    await self.app(scope, receive, send_with_id)
+                finally:
+                    profile.disable()
+                await asyncio.to_thread(profiler.save_cprofile, profile, name)
+            else:
+                sampler = StackSampler(threading.get_ident(), profiler.sample_interval)
+                sampler.start()
+                try:
+                    await self.app(scope, receive, send_with_id)
+                finally:
+                    sampler.stop()
+                await asyncio.to_thread(profiler.save_speedscope, sampler, name)
+        finally:
+            profiler.busy = False
+
+    @staticmethod
+    def _header_mode(scope: dict) -> Optional[str]:
+        for key, value in scope["headers"]:
+            if key == b"x-profile":
+                value = value.decode("latin-1").strip().lower()
+                if value in ("1", "true"):
+                    return "cprofile"
+                return value if value in MODES else None
+        return None
@@ -0,0 +1,52 @@
+"""
+Client addresses behind reverse proxies.
+
+X-Forwarded-For is only believed when the connection comes from one of
+TRUSTED_PROXIES. The header is read from the right, skipping trusted hops:
+the first untrusted address is the client, since anything to its left was
+sent by the client itself and may be forged.
+"""
+import ipaddress
+from functools import lru_cache
+from typing import List, Optional, Tuple, Union
+
+from app.config import settings
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+@lru_cache(maxsize=8)
+def trusted_networks(spec: str) -> Tuple[Network, ...]:
+    """Parse a comma-separated list of addresses and CIDR ranges."""
+    return tuple(ipaddress.ip_network(item.strip(), strict=False) for item in spec.split(",") if item.strip())
+
+
+def _is_trusted(address: str, networks: Tuple[Network, ...]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+def _forwarded_for(scope) -> List[str]:
+    hops = []
+    for name, value in scope.get("headers", ()):
+        if name == b"x-forwarded-for":
+            hops += [hop.strip() for hop in value.decode("latin-1").split(",") if hop.strip()]
+    return hops
+
+
+def client_address(scope) -> Optional[str]:
+    """The client's address for an ASGI scope (request.scope in a route)."""
+    client = scope.get("client")
+    address = client[0] if client else None
+    networks = trusted_networks(settings.TRUSTED_PROXIES)
+    if address is None or not networks or not _is_trusted(address, networks):
+        return address
+    # When every hop is trusted, the leftmost is as close to the client as we can tell
+    for hop in reversed(_forwarded_for(scope)):
+        address = hop
+        if not _is_trusted(hop, networks):
+            break
+    return address
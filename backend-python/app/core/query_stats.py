@@ -0,0 +1,114 @@
+"""Per-request SQL statement counting, DB time and N+1 detection."""
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Statements issued while handling one request (or one test block)."""
+
+    __slots__ = ("count", "db_time", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.db_time = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.db_time += elapsed
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """Statements executed at least `threshold` times (likely N+1 loops)."""
+        return {s: n for s, n in self.statements.items() if n >= threshold}
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collect statements executed in the current context (request/task)."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+# AsyncSession.run_sync() executes inside a greenlet that shares the calling
+# task's context, so these engine-level hooks see the request's QueryStats.
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    starts = conn.info.get("query_start")
+    if starts:
+        stats.record(statement, time.perf_counter() - starts.pop())
+
+
+class RouteQueryMetrics:
+    """Process-wide query counts and DB time aggregated per route."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, dict] = {}
+
+    def observe(self, route: str, stats: QueryStats) -> None:
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is None:
+                entry = self._routes[route] = {
+                    "requests": 0, "queries": 0, "queries_max": 0, "db_seconds": 0.0,
+                }
+            entry["requests"] += 1
+            entry["queries"] += stats.count
+            entry["db_seconds"] += stats.db_time
+            if stats.count > entry["queries_max"]:
+                entry["queries_max"] = stats.count
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {route: dict(entry) for route, entry in self._routes.items()}
+
+
+route_query_metrics = RouteQueryMetrics()
+
+
+def route_template(scope: dict) -> str:
+    """Matched route path (e.g. /api/orders/{order_id}), to keep label cardinality low."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def report_request(route: str, stats: QueryStats, n_plus_one_threshold: int) -> None:
+    """Aggregate one request's statements and warn about likely N+1 patterns."""
+    route_query_metrics.observe(route, stats)
+    if n_plus_one_threshold > 0:
+        for statement, times in stats.repeated(n_plus_one_threshold).items():
+            logger.warning(
+                f"Possible N+1 in {route}: statement executed {times} times: "
+                f"{' '.join(statement.split())[:200]}"
+            )
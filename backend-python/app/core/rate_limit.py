@@ -0,0 +1,204 @@
+"""Token-bucket rate limiting for login attempts."""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+
+
+class TokenBucket:
+    """A single token bucket refilled continuously at `refill_rate` tokens/sec."""
+
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, tokens: float, updated_at: float):
+        self.tokens = tokens
+        self.updated_at = updated_at
+
+    def take(self, capacity: float, refill_rate: float, now: float) -> float:
+        """
+        Try to take one token.
+        Returns 0 when allowed, otherwise the number of seconds until a token
+        becomes available.
+        """
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(capacity, self.tokens + elapsed * refill_rate)
+        self.updated_at = now
+
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        if refill_rate <= 0:
+            return float("inf")
+        return (1.0 - self.tokens) / refill_rate
+
+
+class MemoryRateLimiter:
+    """
+    Per-process token buckets keyed by an arbitrary string.
+    The number of tracked keys is bounded so that a spray of unique
+    emails/IPs cannot grow memory without limit.
+    """
+
+    blocking = False
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, capacity: float, refill_rate: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(capacity, now)
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            return bucket.take(capacity, refill_rate, now)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLRateLimiter:
+    """
+    Token buckets stored in the `rate_limit_buckets` table so that every
+    worker process shares the same budget.
+    """
+
+    # Database round trips (and row locks): LoginThrottle.acheck runs them in a thread
+    blocking = True
+
+    def __init__(self, session_factory: sessionmaker):
+        self.session_factory = session_factory
+
+    def _create_bucket(self, db, key: str, capacity: float, now: float) -> None:
+        """Insert a full bucket for `key` unless another worker already has."""
+        from app.models import RateLimitBucket
+
+        values = {"key": key, "tokens": capacity, "updated_at": now}
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            db.execute(insert(RateLimitBucket).values(**values).on_conflict_do_nothing(index_elements=["key"]))
+            return
+        try:
+            with db.begin_nested():
+                db.execute(RateLimitBucket.__table__.insert().values(**values))
+        except IntegrityError:
+            pass
+
+    def hit(self, key: str, capacity: float, refill_rate: float) -> float:
+        from app.models import RateLimitBucket
+
+        # Wall clock: the value is shared between processes.
+        now = time.time()
+        db = self.session_factory()
+        try:
+            # Create-then-lock, so concurrent first attempts on a new key queue
+            # on the same row instead of one failing (and failing open)
+            self._create_bucket(db, key, capacity, now)
+            row = db.query(RateLimitBucket).filter(
+                RateLimitBucket.key == key
+            ).with_for_update().one()
+
+            bucket = TokenBucket(row.tokens, row.updated_at)
+            retry_after = bucket.take(capacity, refill_rate, now)
+            row.tokens = bucket.tokens
+            row.updated_at = bucket.updated_at
+            db.commit()
+            return retry_after
+        except Exception:
+            db.rollback()
+            # Fail open: a broken limiter table must not lock everyone out.
+            return 0.0
+        finally:
+            db.close()
+
+    def reset(self) -> None:
+        from app.models import RateLimitBucket
+
+        db = self.session_factory()
+        try:
+            db.query(RateLimitBucket).delete()
+            db.commit()
+        finally:
+            db.close()
+
+
+class LoginThrottle:
+    """Applies separate per-IP and per-email buckets to login attempts."""
+
+    def __init__(
+        self,
+        limiter,
+        ip_burst: float,
+        ip_per_minute: float,
+        email_burst: float,
+        email_per_minute: float,
+    ):
+        self.limiter = limiter
+        self.ip_burst = ip_burst
+        self.ip_rate = ip_per_minute / 60.0
+        self.email_burst = email_burst
+        self.email_rate = email_per_minute / 60.0
+
+    def check(self, ip: Optional[str], email: str) -> float:
+        """
+        Record a login attempt.
+        Returns 0 when the attempt may proceed, otherwise seconds to wait.
+        """
+        retry_after = self.limiter.hit(
+            f"login:ip:{ip or 'unknown'}", self.ip_burst, self.ip_rate
+        )
+        if retry_after:
+            return retry_after
+        return self.limiter.hit(
+            f"login:email:{email.strip().lower()}", self.email_burst, self.email_rate
+        )
+
+    async def acheck(self, ip: Optional[str], email: str) -> float:
+        """`check` for the event loop: a blocking limiter runs in a worker thread."""
+        if not self.limiter.blocking:
+            return self.check(ip, email)
+        return await asyncio.to_thread(self.check, ip, email)
+
+    def reset(self) -> None:
+        self.limiter.reset()
+
+
+_login_throttle: Optional[LoginThrottle] = None
+
+
+def get_login_throttle() -> Optional[LoginThrottle]:
+    """Get the process-wide login throttle, or None if disabled."""
+    global _login_throttle
+    if not settings.LOGIN_THROTTLE_ENABLED:
+        return None
+    if _login_throttle is None:
+        if settings.LOGIN_THROTTLE_BACKEND == "sql":
+            from app.database import SessionLocal
+            limiter = SQLRateLimiter(SessionLocal)
+        else:
+            limiter = MemoryRateLimiter()
+        _login_throttle = LoginThrottle(
+            limiter,
+            ip_burst=settings.LOGIN_THROTTLE_IP_BURST,
+            ip_per_minute=settings.LOGIN_THROTTLE_IP_PER_MINUTE,
+            email_burst=settings.LOGIN_THROTTLE_EMAIL_BURST,
+            email_per_minute=settings.LOGIN_THROTTLE_EMAIL_PER_MINUTE,
+        )
+    return _login_throttle
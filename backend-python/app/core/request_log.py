@@ -0,0 +1,79 @@
+"""
+Per-request tracing, metrics and access logging.
+
+RequestLogMiddleware is pure ASGI: the app runs in the server's task, and
+response headers are added to the start message as it passes, without the
+extra task and body stream that BaseHTTPMiddleware puts on every request.
+"""
+import logging
+import time
+
+from starlette.datastructures import MutableHeaders
+
+from app.config import settings
+from app.core import logs, metrics
+from app.core.proxies import client_address
+from app.core.query_stats import report_request, route_template, track_queries
+from app.core.telemetry import tracer
+
+logger = logging.getLogger(__name__)
+
+
+class RequestLogMiddleware:
+    """Trace, meter and access-log every request; outermost, so it times the whole stack."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start_time = time.perf_counter()
+        method, path = scope["method"], scope["path"]
+        status_code = 500
+        span = None
+        query_stats = None
+        trace_id = None
+
+        async def send_with_headers(message):
+            nonlocal status_code, trace_id
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                if query_stats is not None and settings.query_stats_headers:
+                    headers["X-DB-Query-Count"] = str(query_stats.count)
+                    headers["X-DB-Time-Ms"] = f"{query_stats.db_time * 1000:.2f}"
+                if span is not None:
+                    headers["X-Trace-Id"] = trace_id = span.trace_id
+            await send(message)
+
+        metrics.request_metrics.in_flight += 1
+        try:
+            with tracer.trace("http.request", method=method, path=path) as span:
+                if settings.QUERY_STATS_ENABLED:
+                    with track_queries() as query_stats:
+                        await self.app(scope, receive, send_with_headers)
+                    report_request(route_template(scope), query_stats, settings.N_PLUS_ONE_THRESHOLD)
+                else:
+                    await self.app(scope, receive, send_with_headers)
+                if span is not None:
+                    span.name = f"{method} {route_template(scope)}"
+                    span.set("http.status_code", status_code)
+        finally:
+            metrics.request_metrics.in_flight -= 1
+            elapsed = time.perf_counter() - start_time
+            if settings.METRICS_ENABLED:
+                metrics.request_metrics.observe(method, route_template(scope), status_code, elapsed)
+
+        if logs.access_log.sink is not None:
+            fields = {"client": client_address(scope)}
+            if query_stats is not None:
+                fields["db_queries"] = query_stats.count
+                fields["db_ms"] = round(query_stats.db_time * 1000, 2)
+            if trace_id:
+                fields["trace_id"] = trace_id
+            logs.access_log.log(method, path, route_template(scope), status_code, elapsed * 1000, **fields)
+
+        if settings.ENABLE_PERFORMANCE_LOGGING and path.startswith("/api"):
+            logger.info(f"{method} {path} {status_code} in {int(elapsed * 1000)}ms")
@@ -0,0 +1,69 @@
+"""
+JSON responses.
+
+FastJSONResponse is the app's default response class: it encodes with orjson
+when available (stdlib json otherwise). Decimal is always written as a
+string, the way Pydantic's JSON mode writes the response schemas, so money
+reads the same from every endpoint.
+
+FastAPI validates what a route returns against its response_model and
+serializes the result to Python objects before the response class encodes
+them. A route whose data is already a schema instance (or a list of them)
+can return `trusted(...)` instead: the models are encoded to bytes by their
+own Pydantic serializer and FastAPI's pass over them is skipped.
+"""
+import json
+from decimal import Decimal
+from typing import Any, Optional
+
+from pydantic import BaseModel
+from starlette.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # stdlib json
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", by_alias=True)
+    if hasattr(value, "isoformat"):
+        text = value.isoformat()
+        # UTC as "Z", as Pydantic writes it
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact JSON bytes for `content`, Decimal as a string."""
+    if isinstance(content, BaseModel):
+        return content.__pydantic_serializer__.to_json(content, by_alias=True)
+    if isinstance(content, list) and content and all(isinstance(item, BaseModel) for item in content):
+        return b"[" + b",".join(dumps(item) for item in content) + b"]"
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+    return json.dumps(
+        content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def trusted(content: Any, status_code: int = 200, response: Optional[Response] = None) -> FastJSONResponse:
+    """
+    Response for data already shaped by the route's response schema. Pass
+    the route's injected `response` to keep cookies and headers that
+    dependencies set on it, which FastAPI only copies onto responses it builds.
+    """
+    result = FastJSONResponse(content, status_code)
+    if response is not None:
+        result.raw_headers.extend(response.raw_headers)
+        if response.status_code:
+            result.status_code = response.status_code
+    return result
@@ -0,0 +1,65 @@
+"""Schema revision checks and migrations (Alembic)."""
+import logging
+import os
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class SchemaOutOfDate(RuntimeError):
+    """The database is not at the migration head."""
+
+
+def get_alembic_config() -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    return config
+
+
+def head_revision(config: Optional[Config] = None) -> str:
+    return ScriptDirectory.from_config(config or get_alembic_config()).get_current_head()
+
+
+def current_revision(engine: Engine) -> Optional[str]:
+    with engine.connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+
+def upgrade_to_head(engine: Engine) -> None:
+    """Run pending migrations against `engine`."""
+    config = get_alembic_config()
+    # Keep the application's logging configuration
+    config.attributes["configure_logger"] = False
+    # No outer transaction: env.py begins and commits its own, which
+    # autocommit_block() (concurrent index builds on Postgres) has to end
+    with engine.connect() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+
+
+def verify_schema(engine: Engine, auto_migrate: bool) -> str:
+    """
+    Check the database is at the migration head.
+    Upgrades it when `auto_migrate` is set, otherwise raises SchemaOutOfDate
+    so a worker never serves traffic against an unexpected schema.
+    """
+    head = head_revision()
+    current = current_revision(engine)
+    if current == head:
+        return current
+    if not auto_migrate:
+        raise SchemaOutOfDate(
+            f"Database schema is at {current or 'no revision'}, expected {head}; "
+            "run `alembic upgrade head`"
+        )
+    logger.info(f"Migrating database schema from {current or 'no revision'} to {head}")
+    upgrade_to_head(engine)
+    return head
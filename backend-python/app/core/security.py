@@ -6,6 +6,10 @@ from passlib.context import CryptContext
 # Use passlib with scrypt for Python 3.9 compatibility
 pwd_context = CryptContext(schemes=["scrypt"], deprecated="auto")
 
+# Well-formed hash that matches no password; verified against when the email is
+# unknown so that the response time does not reveal whether an account exists.
+_DUMMY_HASH = "00" * 64 + "." + "0" * 32
+
 
 def hash_password(password: str) -> str:
     """
@@ -49,3 +53,9 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     except (ValueError, AttributeError):
         return False
 
+
+
+def dummy_verify_password(plain_password: str) -> bool:
+    """Spend the same KDF work as verify_password() and always fail."""
+    verify_password(plain_password, _DUMMY_HASH)
+    return False
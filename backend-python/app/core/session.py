@@ -1,7 +1,12 @@
 """Session management utilities."""
-from typing import Optional
+import json
+from base64 import b64decode
+from collections import UserDict
+from typing import Callable, Optional, Sequence
 from fastapi import Request
 from itsdangerous import URLSafeSerializer, BadSignature
+from starlette.middleware import sessions
+from starlette.requests import HTTPConnection
 
 
 def get_session_serializer(secret_key: str) -> URLSafeSerializer:
@@ -34,3 +39,46 @@ def set_cart_id_in_session(response, cart_id: int, secret_key: str) -> None:
         samesite="lax"
     )
 
+
+
+class LazySession(UserDict):
+    """Session contents, decoded from the cookie on first access."""
+
+    def __init__(self, load: Callable[[], dict]):
+        self._load = load
+        self._data: Optional[dict] = None
+
+    @property
+    def data(self) -> dict:
+        if self._data is None:
+            self._data = self._load()
+        return self._data
+
+
+class SessionMiddleware(sessions.SessionMiddleware):
+    """
+    Starlette's signed-cookie session. Requests under `skip_prefixes` get a
+    LazySession instead: the cookie is only verified if something reads the
+    session (the profiler's admin check), and the session is never signed
+    back into a Set-Cookie, so changes made there are not saved.
+    """
+
+    def __init__(self, app, skip_prefixes: Sequence[str] = (), **kwargs):
+        super().__init__(app, **kwargs)
+        self.skip_prefixes = tuple(skip_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(self.skip_prefixes):
+            scope["session"] = LazySession(lambda: self.load(scope))
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+    def load(self, scope) -> dict:
+        cookie = HTTPConnection(scope).cookies.get(self.session_cookie)
+        if not cookie:
+            return {}
+        try:
+            return json.loads(b64decode(self.signer.unsign(cookie.encode("utf-8"), max_age=self.max_age)))
+        except BadSignature:
+            return {}
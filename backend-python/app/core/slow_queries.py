@@ -0,0 +1,247 @@
+"""
+Slow-query log.
+
+Statements slower than SLOW_QUERY_THRESHOLD_MS are normalized into a
+fingerprint, attributed to the Storage method that issued them and
+aggregated per fingerprint; the first occurrence of each fingerprint also
+captures the plan (EXPLAIN QUERY PLAN on SQLite, EXPLAIN on PostgreSQL).
+Every slow statement is queued for a rotating JSON-lines file. Bound
+parameters are recorded by type only, never by value.
+"""
+import hashlib
+import logging
+import re
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+from app.core.logs import LogSink, file_sink
+
+logger = logging.getLogger(__name__)
+
+# Entries only; never propagated to the application log
+_file_logger = logging.getLogger("app.slow_queries.file")
+_file_logger.propagate = False
+_file_logger.setLevel(logging.INFO)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<![:\w]):\w+")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH|UPDATE|DELETE)\b", re.IGNORECASE)
+_SUBQUERY = re.compile(r"^(?:CO-ROUTINE|MATERIALIZE) (\w+)")
+_FULL_SCAN = re.compile(r"\bSCAN (?:TABLE )?(\w+)$|Seq Scan on (\w+)")
+_EXPLAIN_SAVEPOINT = "slow_query_explain"
+
+
+def normalize(statement: str) -> str:
+    """Statement text with literals and placeholders as `?` and IN-lists collapsed."""
+    sql = " ".join(statement.split())
+    sql = _STRING.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    return _LIST.sub("(?, ...)", sql)
+
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+def _shape(parameters):
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+def parameter_shape(parameters, executemany: bool):
+    """Types of the bound parameters; executemany batches report their size."""
+    if executemany:
+        return {"rows": len(parameters), "row": _shape(parameters[0]) if parameters else None}
+    return _shape(parameters)
+
+
+def storage_method() -> Optional[str]:
+    """
+    Public Storage method on the current stack, if any. Async calls run
+    the sync method in a greenlet, so it is on this stack for both APIs.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        name = frame.f_code.co_name
+        if not name.startswith("_") and type(frame.f_locals.get("self")).__name__ == "Storage":
+            return name
+        frame = frame.f_back
+    return None
+
+
+def explain(conn, statement: str, parameters) -> Optional[List[str]]:
+    """
+    Plan lines for a statement, run on the connection that executed it.
+    On PostgreSQL a failed statement aborts the whole transaction, so
+    EXPLAIN runs inside a savepoint that is rolled back if it fails.
+    """
+    if conn.dialect.name == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    elif conn.dialect.name == "postgresql":
+        prefix = "EXPLAIN "
+    else:
+        return None
+    savepoint = (
+        conn.dialect.name == "postgresql"
+        and conn.get_execution_options().get("isolation_level") != "AUTOCOMMIT"
+    )
+    # The raw DBAPI cursor bypasses engine events, so this is not timed itself
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        if savepoint:
+            cursor.execute(f"SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            rows = cursor.fetchall()
+        except Exception:
+            if savepoint:
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+            raise
+        if savepoint:
+            cursor.execute(f"RELEASE SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+    finally:
+        cursor.close()
+    return [str(row[-1]) for row in rows]
+
+
+def full_scans(plan: List[str]) -> List[str]:
+    """Tables read in full according to a plan; likely missing an index."""
+    subqueries = {m.group(1) for m in map(_SUBQUERY.search, plan) if m}
+    tables = []
+    for match in map(_FULL_SCAN.search, plan):
+        table = match and (match.group(1) or match.group(2))
+        if table and table not in subqueries and table not in tables:
+            tables.append(table)
+    return tables
+
+
+class SlowQueryLog:
+    """Slow statements aggregated by fingerprint."""
+
+    def __init__(self, threshold_ms: float, explain: bool = True, max_fingerprints: int = 500):
+        self.threshold = threshold_ms / 1000
+        self.explain = explain
+        self.max_fingerprints = max_fingerprints
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}
+
+    def record(self, conn, statement: str, parameters, executemany: bool, seconds: float) -> None:
+        sql = normalize(statement)
+        key = fingerprint(sql)
+        method = storage_method()
+        shape = parameter_shape(parameters, executemany)
+        with self._lock:
+            known = key in self._entries
+        plan = None
+        if not known and self.explain and not executemany and _EXPLAINABLE.match(statement):
+            try:
+                plan = explain(conn, statement, parameters)
+            except Exception as e:
+                plan = [f"EXPLAIN failed: {type(e).__name__}: {e}"]
+
+        duration_ms = seconds * 1000
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_fingerprints:
+                    self.dropped += 1
+                else:
+                    entry = self._entries[key] = {
+                        "fingerprint": key, "sql": sql, "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                        "storage_methods": {}, "parameters": shape, "plan": plan,
+                        "full_scans": full_scans(plan or []),
+                    }
+            if entry is not None:
+                entry["count"] += 1
+                entry["total_ms"] += duration_ms
+                entry["max_ms"] = max(entry["max_ms"], duration_ms)
+                entry["last_seen"] = time.time()
+                if method:
+                    entry["storage_methods"][method] = entry["storage_methods"].get(method, 0) + 1
+
+        if _file_logger.handlers:
+            _file_logger.info("", extra={"fields": {
+                "fingerprint": key, "duration_ms": round(duration_ms, 3),
+                "storage_method": method, "sql": sql, "parameters": shape, "plan": plan,
+            }})
+
+    def snapshot(self, limit: int = 50) -> List[dict]:
+        """Fingerprints by total time spent, worst first."""
+        with self._lock:
+            entries = [
+                {**entry, "storage_methods": dict(entry["storage_methods"]),
+                 "avg_ms": round(entry["total_ms"] / entry["count"], 3),
+                 "total_ms": round(entry["total_ms"], 3), "max_ms": round(entry["max_ms"], 3)}
+                for entry in self._entries.values()
+            ]
+        entries.sort(key=lambda e: e["total_ms"], reverse=True)
+        return entries[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.dropped = 0
+
+
+slow_query_log = SlowQueryLog(
+    settings.SLOW_QUERY_THRESHOLD_MS, settings.SLOW_QUERY_EXPLAIN, settings.SLOW_QUERY_MAX_FINGERPRINTS
+)
+
+
+_sink: Optional[LogSink] = None
+
+
+def open_log_file(path: str, max_bytes: int, backups: int) -> None:
+    """Start appending entries to a rotating file, written off the event loop."""
+    global _sink
+    close_log_file()
+    _sink = file_sink(path, max_bytes, backups)
+    _file_logger.addHandler(_sink.handler)
+
+
+def close_log_file() -> None:
+    global _sink
+    if _sink is not None:
+        _file_logger.removeHandler(_sink.handler)
+        _sink.stop()
+        _sink = None
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    if slow_query_log.threshold > 0:
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _check_duration(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("slow_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    if elapsed >= slow_query_log.threshold:
+        try:
+            slow_query_log.record(conn, statement, parameters, executemany, elapsed)
+        except Exception as e:
+            logger.warning(f"Recording slow query failed: {e}")
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_timer(exception_context):
+    conn = exception_context.connection
+    starts = conn.info.get("slow_query_start") if conn is not None else None
+    if starts:
+        starts.pop()
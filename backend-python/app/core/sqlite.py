@@ -0,0 +1,74 @@
+"""SQLite production profile: connection pragmas and WAL checkpointing."""
+import asyncio
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def sqlite_pragmas() -> dict:
+    """PRAGMA name -> value applied to every new SQLite connection."""
+    return {
+        # journal_mode is persistent in the file; the rest are per connection
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "temp_store": settings.SQLITE_TEMP_STORE,
+    }
+
+
+def configure_sqlite_engine(engine: Engine, writer: bool = False) -> None:
+    """
+    Apply the production pragmas whenever the pool opens a connection.
+
+    Each process has two writer engines (sync and async) and every worker
+    has its own, so writes are serialized by SQLite's file lock, not by a
+    pool. Writer transactions therefore start with BEGIN IMMEDIATE: they
+    queue for the lock for up to busy_timeout when they start, instead of
+    failing with "database is locked" when a transaction that has already
+    read tries to write after another connection committed.
+    """
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+        if writer:
+            # The driver's implicit (deferred) BEGIN is replaced by _begin_immediate
+            dbapi_connection.isolation_level = None
+
+    if writer:
+        @event.listens_for(engine, "begin")
+        def _begin_immediate(conn):
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+async def checkpoint_loop(engine: AsyncEngine, interval: float, mode: str) -> None:
+    """
+    Periodically fold the WAL back into the main database file.
+    SQLite's auto-checkpoint can be starved by long readers, which lets the
+    WAL grow and slows every read; this keeps it bounded.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with engine.connect() as conn:
+                result = await conn.exec_driver_sql(f"PRAGMA wal_checkpoint({mode})")
+                busy, log_frames, checkpointed = result.one()
+            logger.debug(
+                f"WAL checkpoint ({mode}): busy={busy} log={log_frames} checkpointed={checkpointed}"
+            )
+        except Exception as e:
+            logger.warning(f"WAL checkpoint failed: {e}")
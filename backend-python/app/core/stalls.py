@@ -0,0 +1,175 @@
+"""
+Blocking-call detection for the event loop.
+
+The loop lag monitor beats a heartbeat from the loop; a watchdog thread
+notices when the heartbeat is overdue by more than the threshold and, while
+the loop is still stuck, captures the loop thread's stack and the route of
+the task that is running. When the loop wakes up the stall is recorded
+under (route, culprit frame), where the culprit is the innermost frame in
+application code.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.core.query_stats import route_template
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_PROJECT_DIR = os.path.dirname(APP_DIR)
+
+
+def _short(filename: str) -> str:
+    if filename.startswith(_PROJECT_DIR):
+        return os.path.relpath(filename, _PROJECT_DIR)
+    marker = filename.rfind("site-packages" + os.sep)
+    return filename[marker + len("site-packages") + 1:] if marker >= 0 else filename
+
+
+def _culprit(stack: List[traceback.FrameSummary]) -> str:
+    """Innermost frame in application code, else the innermost frame."""
+    for frame in reversed(stack):
+        if frame.filename.startswith(APP_DIR) and frame.filename != __file__:
+            break
+    else:
+        if not stack:
+            return "unknown"
+        frame = stack[-1]
+    return f"{_short(frame.filename)}:{frame.lineno} in {frame.name}"
+
+
+class StallDetector:
+    """Captures what blocked the event loop and aggregates it per route and culprit."""
+
+    def __init__(self, threshold: float, max_offenders: int = 200, stack_depth: int = 40):
+        self.threshold = threshold
+        self.max_offenders = max_offenders
+        self.stack_depth = stack_depth
+        self.count = 0
+        self.seconds_total = 0.0
+        self.dropped = 0
+        self.offenders: Dict[Tuple[str, str], dict] = {}
+        # Task running each in-flight request; read by the watchdog thread
+        self.tasks: Dict[asyncio.Task, dict] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread_id: Optional[int] = None
+        self._heartbeat = 0.0
+        self._last_beat = time.perf_counter()
+        self._captured: Optional[Tuple[str, List[traceback.FrameSummary]]] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def start(self, heartbeat: float) -> None:
+        """Call on the loop thread; `heartbeat` is how often beat() runs."""
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._heartbeat = heartbeat
+        self._last_beat = time.perf_counter()
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    def beat(self) -> None:
+        self._last_beat = time.perf_counter()
+
+    def _watch(self) -> None:
+        captured_beat = None
+        while not self._stop.wait(max(self.threshold / 2, 0.001)):
+            beat = self._last_beat
+            if beat == captured_beat or time.perf_counter() - beat < self._heartbeat + self.threshold:
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame, limit=self.stack_depth)
+            self._captured = (self._running_route(), stack)
+            captured_beat = beat
+
+    def _running_route(self) -> str:
+        task = asyncio.current_task(self._loop)
+        if task is None:
+            return "loop callback"
+        scope = self.tasks.get(task)
+        if scope is not None:
+            return route_template(scope)
+        return f"task:{getattr(task.get_coro(), '__qualname__', task.get_name())}"
+
+    def record(self, lag: float) -> None:
+        """Called on the loop thread once a stall of `lag` seconds has ended."""
+        captured, self._captured = self._captured, None
+        route, stack = captured if captured is not None else ("unknown", [])
+        culprit = _culprit(stack)
+        self.count += 1
+        self.seconds_total += lag
+        key = (route, culprit)
+        entry = self.offenders.get(key)
+        if entry is None:
+            if len(self.offenders) >= self.max_offenders:
+                self.dropped += 1
+                return
+            entry = self.offenders[key] = {
+                "route": route, "culprit": culprit, "count": 0, "seconds_total": 0.0, "max_seconds": 0.0,
+            }
+        entry["count"] += 1
+        entry["seconds_total"] += lag
+        if lag >= entry["max_seconds"]:
+            entry["max_seconds"] = lag
+            entry["stack"] = [f"{_short(f.filename)}:{f.lineno} in {f.name}" for f in stack]
+        logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms in {route} at {culprit}")
+
+    def worst(self, limit: int = 20) -> List[dict]:
+        """Offenders by total time blocked, worst first."""
+        entries = sorted(self.offenders.values(), key=lambda e: e["seconds_total"], reverse=True)
+        return [
+            {**entry, "seconds_total": round(entry["seconds_total"], 4), "max_seconds": round(entry["max_seconds"], 4)}
+            for entry in entries[:limit]
+        ]
+
+    def by_route(self) -> Dict[str, Tuple[int, float]]:
+        routes: Dict[str, Tuple[int, float]] = {}
+        for entry in list(self.offenders.values()):
+            count, seconds = routes.get(entry["route"], (0, 0.0))
+            routes[entry["route"]] = (count + entry["count"], seconds + entry["seconds_total"])
+        return routes
+
+
+stall_detector = StallDetector(settings.LOOP_STALL_THRESHOLD_MS / 1000, settings.LOOP_STALL_MAX_OFFENDERS)
+
+
+class TaskRouteMiddleware:
+    """
+    Pure ASGI middleware; registers the task serving each request so a
+    stall can be attributed to its route. Must sit inside any
+    BaseHTTPMiddleware, which runs the rest of the app in a new task.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not stall_detector.enabled:
+            await self.app(scope, receive, send)
+            return
+        task = asyncio.current_task()
+        stall_detector.tasks[task] = scope
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            stall_detector.tasks.pop(task, None)
@@ -0,0 +1,79 @@
+"""Startup phase timings, one-shot database initialization and cache warming."""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.schema import upgrade_to_head
+from app.database import AsyncSessionLocal
+from app.storage import AsyncStorage, Storage
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Wall-clock duration of each named startup phase."""
+
+    def __init__(self, started: Optional[float] = None):
+        self.started = started if started is not None else time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.ready_at: Optional[float] = None
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases[name] = seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def ready(self) -> None:
+        """Mark the worker as accepting traffic and log the breakdown."""
+        self.ready_at = time.perf_counter()
+        phases = ", ".join(f"{name} {seconds * 1000:.1f}ms" for name, seconds in self.phases.items())
+        logger.info(f"Startup complete in {(self.ready_at - self.started) * 1000:.1f}ms ({phases})")
+
+    def summary(self) -> dict:
+        return {
+            "ready": self.ready_at is not None,
+            "total_ms": round((self.ready_at - self.started) * 1000, 2) if self.ready_at else None,
+            "phases_ms": {name: round(seconds * 1000, 2) for name, seconds in self.phases.items()},
+        }
+
+
+def seed_database(engine: Engine) -> None:
+    """Insert the initial catalog and admin user if they are missing."""
+    with Session(engine, expire_on_commit=False) as db:
+        storage = Storage(db)
+        storage.seed_products()
+        storage.seed_users()
+
+
+def init_database(engine: Engine) -> None:
+    """One-shot deploy step: migrate to head, then seed."""
+    upgrade_to_head(engine)
+    seed_database(engine)
+
+
+async def warm_caches() -> None:
+    """
+    Load the catalog into the query cache and open a pooled connection.
+    Runs as a background task after the worker starts accepting traffic.
+    """
+    start = time.perf_counter()
+    try:
+        async with AsyncSessionLocal() as db:
+            storage = AsyncStorage(db)
+            products = await storage.get_products()
+            for product in products:
+                await storage.get_product_by_slug(product.slug)
+    except Exception as e:
+        logger.warning(f"Cache warm-up failed: {e}")
+        return
+    logger.info(f"Caches warmed in {(time.perf_counter() - start) * 1000:.1f}ms")
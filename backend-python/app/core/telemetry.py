@@ -1,57 +1,250 @@
-import time
-import functools
+"""
+Sampled tracing: nested spans for request -> dependency -> Storage method
+-> SQL statement, buffered in memory and exported to local files.
+
+A request is sampled once, at its root span. Unsampled requests carry no
+current span, so every nested span() call is a ContextVar lookup that
+returns a shared no-op scope.
+"""
+import asyncio
+import json
 import logging
 import os
-from typing import Callable, Any
-
-logger = logging.getLogger("performance")
-logger.setLevel(logging.INFO)
-
-# Setup logging handler if enabled
-if os.getenv("ENABLE_PERFORMANCE_LOGGING", "false").lower() == "true":
-    log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "logs")
-    os.makedirs(log_dir, exist_ok=True)
-    log_file = os.path.join(log_dir, "performance.log")
-    
-    # File Handler
-    file_handler = logging.FileHandler(log_file)
-    formatter = logging.Formatter('%(asctime)s - %(message)s')
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
-    
-    # Ensure propogation doesn't duplicate logs if root logger captures them
-    logger.propagate = False
-
-def monitor_performance(func: Callable) -> Callable:
+import random
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: dict):
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+
+    def set(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class _SpanScope:
+    """Makes a span current for the enclosed block and finishes it on exit."""
+
+    __slots__ = ("tracer", "span", "token")
+
+    def __init__(self, tracer: "Tracer", span: Span):
+        self.tracer = tracer
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        _current.reset(self.token)
+        if exc_type is not None:
+            self.span.attributes["error"] = exc_type.__name__
+        self.tracer.finish(self.span)
+        return False
+
+
+class _NoopScope:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP = _NoopScope()
+
+
+class Tracer:
+    """Samples root spans and buffers finished spans until exported."""
+
+    def __init__(self, sample_rate: float = 0.0, max_buffer: int = 10_000):
+        self.sample_rate = sample_rate
+        self._buffer: deque = deque(maxlen=max_buffer)
+        self.dropped = 0
+
+    def trace(self, name: str, **attributes):
+        """Start a root span, subject to sampling."""
+        rate = self.sample_rate
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return _NOOP
+        return _SpanScope(self, Span(name, f"{random.getrandbits(128):032x}", None, attributes))
+
+    def span(self, name: str, **attributes):
+        """Start a child of the current span; a no-op outside a sampled trace."""
+        parent = _current.get()
+        if parent is None:
+            return _NOOP
+        return _SpanScope(self, Span(name, parent.trace_id, parent.span_id, attributes))
+
+    def finish(self, span: Span) -> None:
+        span.end_ns = time.time_ns()
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append(span)
+
+    def drain(self) -> List[Span]:
+        spans = []
+        while self._buffer:
+            spans.append(self._buffer.popleft())
+        return spans
+
+
+tracer = Tracer(settings.TRACING_SAMPLE_RATE, settings.TRACING_BUFFER_SIZE)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+# SQL statements are leaf spans: they are never made current, so a failed
+# statement cannot leave a stale span behind in the context.
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_sql_span(conn, cursor, statement, parameters, context, executemany):
+    parent = _current.get()
+    if parent is not None:
+        span = Span("sql", parent.trace_id, parent.span_id, {"db.statement": statement[:500]})
+        conn.info.setdefault("trace_spans", []).append(span)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_sql_span(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("trace_spans")
+    if spans:
+        tracer.finish(spans.pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _fail_sql_span(exception_context):
+    conn = exception_context.connection
+    spans = conn.info.get("trace_spans") if conn is not None else None
+    if spans:
+        span = spans.pop()
+        span.set("error", type(exception_context.original_exception).__name__)
+        tracer.finish(span)
+
+
+class JsonLinesExporter:
+    """One JSON object per span."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List[Span]) -> None:
+        with open(self.path, "a") as f:
+            for span in spans:
+                f.write(json.dumps({
+                    "trace_id": span.trace_id,
+                    "span_id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "name": span.name,
+                    "start_ns": span.start_ns,
+                    "duration_ms": round(span.duration_ms, 3),
+                    "attributes": span.attributes,
+                }) + "\n")
+
+
+class OtlpFileExporter:
     """
-    Decorator to log execution time of a function.
-    Enabled only if ENABLE_PERFORMANCE_LOGGING env var is set to "true".
+    OTLP/JSON ExportTraceServiceRequest per batch, one per line: the format
+    of the OpenTelemetry Collector file exporter, readable by its receivers.
     """
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs) -> Any:
-        if os.getenv("ENABLE_PERFORMANCE_LOGGING", "false").lower() != "true":
-            return func(*args, **kwargs)
-            
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        duration_ms = (time.time() - start_time) * 1000
-        
-        logger.info(f"[PERF] {func.__module__}.{func.__name__} executed in {duration_ms:.2f}ms")
-        return result
-        
-    @functools.wraps(func)
-    async def async_wrapper(*args, **kwargs) -> Any:
-        if os.getenv("ENABLE_PERFORMANCE_LOGGING", "false").lower() != "true":
-            return await func(*args, **kwargs)
-            
-        start_time = time.time()
-        result = await func(*args, **kwargs)
-        duration_ms = (time.time() - start_time) * 1000
-        
-        logger.info(f"[PERF] {func.__module__}.{func.__name__} executed in {duration_ms:.2f}ms")
-        return result
-
-    import asyncio
-    if asyncio.iscoroutinefunction(func):
-        return async_wrapper
-    return wrapper
+
+    def __init__(self, path: str, service_name: str = "urbanturban-api"):
+        self.path = path
+        self.service_name = service_name
+
+    @staticmethod
+    def _attributes(attributes: dict) -> list:
+        out = []
+        for key, value in attributes.items():
+            if isinstance(value, bool):
+                typed = {"boolValue": value}
+            elif isinstance(value, int):
+                typed = {"intValue": str(value)}
+            elif isinstance(value, float):
+                typed = {"doubleValue": value}
+            else:
+                typed = {"stringValue": str(value)}
+            out.append({"key": key, "value": typed})
+        return out
+
+    def export(self, spans: List[Span]) -> None:
+        otlp_spans = []
+        for span in spans:
+            otlp_span = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 2 if span.parent_id is None else 1,  # SERVER / INTERNAL
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": self._attributes(span.attributes),
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            if "error" in span.attributes:
+                otlp_span["status"] = {"code": 2}
+            otlp_spans.append(otlp_span)
+        request = {"resourceSpans": [{
+            "resource": {"attributes": self._attributes({"service.name": self.service_name})},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": otlp_spans}],
+        }]}
+        with open(self.path, "a") as f:
+            f.write(json.dumps(request) + "\n")
+
+
+def get_exporter(kind: str, path: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if kind == "otlp-file":
+        return OtlpFileExporter(path)
+    return JsonLinesExporter(path)
+
+
+def flush(exporter) -> int:
+    """Export everything buffered so far; returns the number of spans."""
+    spans = tracer.drain()
+    if spans:
+        try:
+            exporter.export(spans)
+        except OSError as e:
+            logger.warning(f"Exporting {len(spans)} spans failed: {e}")
+    return len(spans)
+
+
+async def export_loop(exporter, interval: float) -> None:
+    """Write buffered spans off the event loop every `interval` seconds."""
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(flush, exporter)
+    finally:
+        flush(exporter)
@@ -1,38 +1,257 @@
 """Database connection and session management."""
-from sqlalchemy import create_engine
+import itertools
+import time
+from contextlib import contextmanager
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.dml import UpdateBase
+from typing import AsyncGenerator, Iterator, List, Optional, Sequence
 from app.config import settings
+from app.core.db_pool import (
+    InstrumentedAsyncQueuePool, InstrumentedQueuePool, attach_pool_listeners
+)
+from app.core.session import LazySession
+from app.core.sqlite import configure_sqlite_engine
+
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver (asyncpg / aiosqlite)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "postgresql":
+        return parsed.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    return url
+
+
+def _pool_kwargs(async_driver: bool, **overrides) -> dict:
+    """Pool sizing shared by the sync and async engines."""
+    kwargs = {
+        "poolclass": InstrumentedAsyncQueuePool if async_driver else InstrumentedQueuePool,
+        "pool_logging_name": "async" if async_driver else "sync",
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": True,
+    }
+    kwargs.update(overrides)
+    return kwargs
+
+
+def _postgres_connect_args(async_driver: bool) -> dict:
+    """Per-session statement/lock timeouts (0 leaves the server default)."""
+    server_settings = {}
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+    if settings.DB_LOCK_TIMEOUT_MS:
+        server_settings["lock_timeout"] = str(settings.DB_LOCK_TIMEOUT_MS)
+    if not server_settings:
+        return {}
+    if async_driver:
+        return {"server_settings": server_settings}
+    return {"options": " ".join(f"-c {k}={v}" for k, v in server_settings.items())}
+
+
+class RoutingSession(Session):
+    """
+    Session that sends read-only work to reader engines and everything else
+    to the writer (primary).
+
+    Readers are only used inside replica_reads(), which AsyncStorage enters
+    for Storage methods marked @read_only. Flushes, DML and
+    SELECT ... FOR UPDATE always go to the writer, and a transaction that has
+    written stays there until it ends so it reads its own changes.
+
+    With `sticky_seconds` > 0, a committed write also pins the session to the
+    writer for that long (read-your-writes while replicas catch up). The
+    deadline is mirrored into the HTTP session passed as `http_session`, so
+    the client's next requests stay on the primary too.
+
+    Without readers it behaves like a plain Session.
+    """
+
+    def __init__(
+        self,
+        writer: Optional[Engine] = None,
+        readers: Sequence[Engine] = (),
+        sticky_seconds: float = 0.0,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self._writer = writer
+        self._readers = itertools.cycle(readers) if readers else None
+        self.sticky_seconds = sticky_seconds
+
+    def pin_to_writer_until(self, deadline: float) -> None:
+        if deadline > self.info.get("primary_until", 0.0):
+            self.info["primary_until"] = deadline
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._writer is None or self._readers is None:
+            return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        if (
+            self._flushing
+            or isinstance(clause, UpdateBase)
+            or getattr(clause, "_for_update_arg", None) is not None
+        ):
+            self.info["wrote"] = True
+        if (
+            self.info.get("wrote")
+            or not self.info.get("read_only")
+            or self.info.get("primary_until", 0.0) > time.time()
+        ):
+            return self._writer
+        return next(self._readers)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _start_read_your_writes_window(session):
+    if session.info.get("wrote") and session.sticky_seconds > 0:
+        deadline = time.time() + session.sticky_seconds
+        session.pin_to_writer_until(deadline)
+        http_session = session.info.get("http_session")
+        if http_session is not None:
+            http_session["primary_until"] = deadline
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_write_stickiness(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("wrote", None)
+
+
+@contextmanager
+def replica_reads(session: Session) -> Iterator[None]:
+    """Allow a RoutingSession to serve the enclosed queries from a reader."""
+    previous = session.info.get("read_only")
+    session.info["read_only"] = True
+    try:
+        yield
+    finally:
+        session.info["read_only"] = previous
+
 
 # Create database engine
+sqlite_profile = not settings.DATABASE_URL and settings.SQLITE_PRODUCTION_PROFILE
+
 if settings.DATABASE_URL:
+    database_url = settings.DATABASE_URL
     engine = create_engine(
-        settings.DATABASE_URL,
-        pool_pre_ping=True,
-        echo=settings.ENVIRONMENT == "development"
+        database_url,
+        connect_args=_postgres_connect_args(async_driver=False),
+        echo=settings.DB_ECHO,
+        **_pool_kwargs(async_driver=False)
     )
+    # Async engine used by request handlers; the sync engine above is kept
+    # for startup seeding and one-off scripts.
+    async_engine = create_async_engine(
+        to_async_url(database_url),
+        connect_args=_postgres_connect_args(async_driver=True),
+        echo=settings.DB_ECHO,
+        **_pool_kwargs(async_driver=True)
+    )
+    # Read replicas, used round-robin for @read_only Storage methods
+    async_read_engines: List[AsyncEngine] = [
+        create_async_engine(
+            to_async_url(replica_url),
+            connect_args=_postgres_connect_args(async_driver=True),
+            echo=settings.DB_ECHO,
+            **_pool_kwargs(True, pool_logging_name=f"async-replica-{i}")
+        )
+        for i, replica_url in enumerate(
+            url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()
+        )
+    ]
+    sticky_seconds = settings.DB_REPLICA_STICKY_SECONDS
 else:
     # Fallback to SQLite file database (compatible with PostgreSQL via DATABASE_URL)
     import os
-    db_path = os.path.join(os.path.dirname(__file__), "..", "urbanturban.db")
-    engine = create_engine(f"sqlite:///{db_path}", echo=False)
+    db_path = settings.SQLITE_PATH or os.path.join(os.path.dirname(__file__), "..", "urbanturban.db")
+    database_url = f"sqlite:///{db_path}"
+    if sqlite_profile:
+        # SQLite allows one writer at a time: give async writes a single
+        # pooled connection so they queue in the pool, and serve reads from
+        # a separate pool (WAL lets readers run alongside the writer). The
+        # sync engine and other workers still write through their own
+        # connections; see configure_sqlite_engine.
+        writer_pool = {"pool_size": 1, "max_overflow": 0}
+        engine = create_engine(
+            database_url, echo=settings.DB_ECHO, **_pool_kwargs(False, **writer_pool)
+        )
+        async_engine = create_async_engine(
+            to_async_url(database_url), echo=settings.DB_ECHO, **_pool_kwargs(True, **writer_pool)
+        )
+        async_read_engines = [
+            create_async_engine(
+                to_async_url(database_url),
+                echo=settings.DB_ECHO,
+                **_pool_kwargs(
+                    True,
+                    pool_logging_name="async-read",
+                    pool_size=settings.SQLITE_READ_POOL_SIZE,
+                    max_overflow=0,
+                )
+            )
+        ]
+        # Readers see commits immediately, so no read-your-writes window
+        sticky_seconds = 0.0
+        # The sync engine (startup, the SQL login limiter) is a second writer:
+        # both take the file lock with BEGIN IMMEDIATE and wait up to busy_timeout
+        configure_sqlite_engine(engine, writer=True)
+        configure_sqlite_engine(async_engine.sync_engine, writer=True)
+        for read_engine in async_read_engines:
+            configure_sqlite_engine(read_engine.sync_engine)
+    else:
+        engine = create_engine(database_url, echo=settings.DB_ECHO, **_pool_kwargs(False))
+        async_engine = create_async_engine(
+            to_async_url(database_url), echo=settings.DB_ECHO, **_pool_kwargs(True)
+        )
+        async_read_engines = []
+        sticky_seconds = 0.0
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+for instrumented in [engine, async_engine, *async_read_engines]:
+    attach_pool_listeners(
+        instrumented.sync_engine if isinstance(instrumented, AsyncEngine) else instrumented
+    )
+
+# Create session factories
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    sync_session_class=RoutingSession,
+    writer=async_engine.sync_engine,
+    readers=[e.sync_engine for e in async_read_engines],
+    sticky_seconds=sticky_seconds,
+    autoflush=False,
+    expire_on_commit=False
+)
 
 # Base class for models
 Base = declarative_base()
 
 
-def get_db() -> Generator[Session, None, None]:
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency for getting database session.
-    Yields a database session and closes it after use.
+    Yields an async database session and closes it after use.
     """
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
+        # Carry the read-your-writes window across this client's requests;
+        # session-free public routes read from replicas without decoding it
+        http_session = request.session
+        if not isinstance(http_session, LazySession):
+            db.sync_session.info["http_session"] = http_session
+            primary_until = http_session.get("primary_until")
+            if primary_until:
+                if primary_until > time.time():
+                    db.sync_session.pin_to_writer_until(primary_until)
+                else:
+                    del http_session["primary_until"]
         yield db
-    finally:
-        db.close()
 
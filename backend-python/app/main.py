@@ -1,54 +1,142 @@
 """FastAPI application entry point."""
-from fastapi import FastAPI, Request, Response
+import time
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.sessions import SessionMiddleware
 from contextlib import asynccontextmanager
-import time
+import asyncio
 import logging
+import sys
 
 from app.config import settings
-from app.database import engine, Base
-from app.storage import Storage
-from app.database import SessionLocal
-from app.api.routes import auth, products, cart, orders, users
+from app.database import engine, async_engine, async_read_engines, sqlite_profile
+from app.core.schema import verify_schema
+from app.core import metrics
+from app.core import logs
+from app.core import slow_queries
+from app.core import telemetry
+from app.core.cache import MemoryLRUBackend, get_query_cache
+from app.core.compression import CompressionMiddleware
+from app.core.health import DrainMiddleware, health
+from app.core import invalidation
+from app.core.request_log import RequestLogMiddleware
+from app.core.session import SessionMiddleware
+from app.core.responses import FastJSONResponse
+from app.core.profiler import ProfilerMiddleware
+from app.core.stalls import TaskRouteMiddleware
+from app.core.sqlite import checkpoint_loop
+from app.core.startup import StartupTimer, seed_database, warm_caches
+from app.api.routes import auth, products, cart, orders, users, internal
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan events for startup and shutdown."""
-    # Startup: Create tables and seed products
+    # Queued logging, written by a background thread (already set up by the launcher)
+    logs.configure_logging()
     logger.info("Starting up FastAPI application...")
+    timer = app.state.startup = StartupTimer(started=_import_started)
+    timer.record("import", time.perf_counter() - _import_started)
+    
+    # Check the schema is at the migration head (migrating it when allowed)
+    with timer.phase("schema"):
+        revision = verify_schema(engine, auto_migrate=settings.auto_migrate)
+    logger.info(f"Database schema at revision {revision}")
+    
+    # Production seeds once per deploy via `python -m app.cli init`
+    if settings.seed_on_startup:
+        with timer.phase("seed"):
+            try:
+                seed_database(engine)
+                logger.info("Products and admin user seeded")
+            except Exception as e:
+                logger.error(f"Error seeding data: {e}")
+    
+    checkpoint_task = None
+    if sqlite_profile and settings.SQLITE_CHECKPOINT_INTERVAL > 0:
+        checkpoint_task = asyncio.create_task(checkpoint_loop(
+            async_engine,
+            settings.SQLITE_CHECKPOINT_INTERVAL,
+            settings.SQLITE_CHECKPOINT_MODE
+        ))
     
-    # Create tables if they don't exist (works for both PostgreSQL and SQLite)
-    try:
-        Base.metadata.create_all(bind=engine)
-        logger.info("Database tables created/verified")
-    except Exception as e:
-        logger.warning(f"Could not create tables: {e}")
+    background = []
+    if settings.METRICS_ENABLED:
+        metrics.loop_lag_monitor.interval = settings.EVENT_LOOP_LAG_INTERVAL
+        background.append(asyncio.create_task(metrics.loop_lag_monitor.run()))
+        if settings.METRICS_MULTIPROC_DIR:
+            background.append(asyncio.create_task(metrics.snapshot_loop(
+                settings.METRICS_MULTIPROC_DIR, settings.METRICS_FLUSH_INTERVAL
+            )))
     
-    # Seed products
-    db = SessionLocal()
-    try:
-        storage = Storage(db)
-        storage.seed_products()
-        logger.info("Products seeded")
-        
-        # Seed users (admin)
-        storage.seed_users()
-        logger.info("Admin user seeded")
-    except Exception as e:
-        logger.error(f"Error seeding data: {e}")
-    finally:
-        db.close()
+    if settings.TRACING_SAMPLE_RATE > 0:
+        exporter = telemetry.get_exporter(settings.TRACING_EXPORTER, logs.worker_path(settings.TRACING_EXPORT_PATH))
+        background.append(asyncio.create_task(
+            telemetry.export_loop(exporter, settings.TRACING_FLUSH_INTERVAL)
+        ))
     
+    if settings.ACCESS_LOG_ENABLED:
+        logs.access_log.open(
+            logs.file_sink(
+                logs.worker_path(settings.ACCESS_LOG_PATH), settings.ACCESS_LOG_MAX_BYTES, settings.ACCESS_LOG_BACKUPS
+            )
+            if settings.ACCESS_LOG_PATH else logs.stream_sink(sys.stdout)
+        )
+    
+    if settings.SLOW_QUERY_THRESHOLD_MS > 0:
+        slow_queries.open_log_file(
+            logs.worker_path(settings.SLOW_QUERY_LOG_PATH),
+            settings.SLOW_QUERY_LOG_MAX_BYTES,
+            settings.SLOW_QUERY_LOG_BACKUPS
+        )
+    
+    # Other workers' writes invalidate this worker's memory cache too, and
+    # admin changes made through another worker apply here as well
+    channel = None
+    cache = get_query_cache()
+    if settings.CACHE_INVALIDATION_DIR:
+        channel = invalidation.worker_channel = invalidation.InvalidationChannel(settings.CACHE_INVALIDATION_DIR)
+        handlers = dict(internal.worker_messages)
+        if cache is not None and isinstance(cache.backend, MemoryLRUBackend):
+            cache.channel = channel
+            handlers[invalidation.TAGS] = cache.backend.invalidate_tags
+        channel.open(handlers)
+    
+    warm_task = None
+    if settings.warm_cache_on_startup:
+        # Runs once the server is accepting connections
+        warm_task = asyncio.create_task(warm_caches())
+    
+    timer.ready()
+    health.start(warm_task)
     yield
     
-    # Shutdown
+    # Shutdown: new requests are refused while the ones in flight finish
     logger.info("Shutting down FastAPI application...")
+    await health.drain(settings.SHUTDOWN_DRAIN_TIMEOUT)
+    for task in (checkpoint_task, warm_task, *background):
+        if task:
+            task.cancel()
+    # Let the tracing exporter write its final batch
+    await asyncio.gather(*background, return_exceptions=True)
+    if channel is not None:
+        if cache is not None:
+            cache.channel = None
+        invalidation.worker_channel = None
+        channel.close()
+    if settings.METRICS_ENABLED and settings.METRICS_MULTIPROC_DIR:
+        # Final counts; the launcher folds them into the exited workers' file
+        metrics.write_worker_snapshot(settings.METRICS_MULTIPROC_DIR)
+    slow_queries.close_log_file()
+    logs.access_log.close()
+    for db_engine in [async_engine, *async_read_engines]:
+        await db_engine.dispose()
+    health.stop()
+    logs.flush_logging()
 
 
 # Create FastAPI app
@@ -56,15 +144,23 @@ app = FastAPI(
     title="UrbanTurban API",
     description="FastAPI backend for UrbanTurban e-commerce platform",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
+# Innermost, so it sees the task that runs the endpoint
+app.add_middleware(TaskRouteMiddleware)
+
+# Profiling runs inside the session middleware, which it needs for the admin check
+app.add_middleware(ProfilerMiddleware)
+
 # Add session middleware (matching Express.js session behavior)
 app.add_middleware(
     SessionMiddleware,
     secret_key=settings.SESSION_SECRET,
     max_age=86400,  # 24 hours
-    same_site="lax"
+    same_site="lax",
+    skip_prefixes=[p.strip() for p in settings.SESSION_SKIP_PREFIXES.split(",") if p.strip()],
 )
 
 # Add CORS middleware
@@ -76,30 +172,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compresses the final response body
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, min_size=settings.COMPRESSION_MIN_SIZE)
 
-# Request logging middleware (matching Express.js behavior)
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """Log API requests matching Express.js logging format."""
-    start_time = time.time()
-    path = request.url.path
-    
-    response = await call_next(request)
-    
-    duration = int((time.time() - start_time) * 1000)
-    
-    import os
-    if os.getenv("ENABLE_PERFORMANCE_LOGGING", "false").lower() == "true":
-        if path.startswith("/api"):
-            status_code = response.status_code
-            log_line = f"{request.method} {path} {status_code} in {duration}ms"
-            
-            # Format time like Express.js
-            from datetime import datetime
-            formatted_time = datetime.now().strftime("%I:%M:%S %p").lstrip("0")
-            logger.info(f"{formatted_time} [fastapi] {log_line}")
-    
-    return response
+# Refuses new requests while shutting down; inside the logging, so refusals are logged
+app.add_middleware(DrainMiddleware)
+
+# Request logging (matching Express.js behavior); outermost, so it times the whole stack
+app.add_middleware(RequestLogMiddleware)
 
 
 # Include routers
@@ -108,6 +189,7 @@ app.include_router(products.router)
 app.include_router(cart.router)
 app.include_router(orders.router)
 app.include_router(users.router)
+app.include_router(internal.router)
 
 
 # Root endpoint
@@ -117,13 +199,29 @@ async def root():
     return {"message": "UrbanTurban API", "version": "1.0.0"}
 
 
-# Health check
+# Health checks
 @app.get("/health")
-async def health():
-    """Health check endpoint."""
+@app.get("/health/live")
+async def liveness():
+    """Liveness: the process is serving requests."""
     return {"status": "healthy"}
 
 
+@app.get("/health/ready")
+async def readiness():
+    """Readiness: whether this worker should get traffic (cached briefly)."""
+    report = await health.readiness()
+    return FastJSONResponse(report, status_code=200 if report["ready"] else 503)
+
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Request, DB, cache and event-loop metrics in text exposition format."""
+    payload = metrics.generate_latest(settings.METRICS_MULTIPROC_DIR, settings.METRICS_FLUSH_INTERVAL)
+    return PlainTextResponse(payload, media_type=metrics.CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -1,5 +1,5 @@
 """SQLAlchemy database models matching the original Drizzle schema."""
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Numeric, Text, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Numeric, Text, JSON, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -11,7 +11,7 @@ class User(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
-    password = Column(String, nullable=False)
+    password = Column(String, nullable=False, info={"cache": False})  # never leaves the database via the query cache
     name = Column(String, nullable=False)
     role = Column(String, default="customer", nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
@@ -41,6 +41,9 @@ class Product(Base):
 class ProductVariant(Base):
     """Product variant model matching product_variants table."""
     __tablename__ = "product_variants"
+    __table_args__ = (
+        Index("ix_product_variants_product_id", "product_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
@@ -55,6 +58,9 @@ class ProductVariant(Base):
 class Cart(Base):
     """Cart model matching carts table."""
     __tablename__ = "carts"
+    __table_args__ = (
+        Index("ix_carts_user_id_created_at", "user_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
@@ -67,6 +73,9 @@ class Cart(Base):
 class CartItem(Base):
     """Cart item model matching cart_items table."""
     __tablename__ = "cart_items"
+    __table_args__ = (
+        Index("ix_cart_items_cart_id_variant", "cart_id", "product_variant_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     cart_id = Column(Integer, ForeignKey("carts.id"), nullable=False)
@@ -81,6 +90,10 @@ class CartItem(Base):
 class Order(Base):
     """Order model matching orders table."""
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_user_id_created_at", "user_id", "created_at"),
+        Index("ix_orders_created_at", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -101,6 +114,9 @@ class Order(Base):
 class OrderItem(Base):
     """Order item model matching order_items table."""
     __tablename__ = "order_items"
+    __table_args__ = (
+        Index("ix_order_items_order_id", "order_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
@@ -127,3 +143,12 @@ class Payment(Base):
     # Relationships
     order = relationship("Order", back_populates="payment")
 
+
+
+class RateLimitBucket(Base):
+    """Shared token bucket state for the SQL-backed login throttle."""
+    __tablename__ = "rate_limit_buckets"
+    
+    key = Column(String, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)
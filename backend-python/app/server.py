@@ -0,0 +1,131 @@
+"""
+Production server: gunicorn managing uvicorn workers.
+
+    python -m app.cli serve
+
+Runs one worker per available CPU (WORKERS overrides), importing the app
+once in the master before forking (preload) so workers start warm and share
+its memory pages. Each worker is recycled after WORKER_MAX_REQUESTS
+requests, with jitter so they do not all restart together. SIGHUP starts a
+fresh set of workers and retires the old ones gracefully; because of
+preload it does not pick up new code, which needs a restart.
+
+Workers keep in-process state coherent through shared directories: when
+they are not configured, the launcher creates one for the sockets carrying
+cache invalidations and admin changes (CACHE_INVALIDATION_DIR) and one for merged metrics
+(METRICS_MULTIPROC_DIR); an exited worker's metrics are folded into one
+file there. Each worker writes its own log files, named with
+its pid (LOG_FILES_PER_WORKER).
+"""
+import math
+import os
+import shutil
+import tempfile
+from typing import List
+
+from app.config import settings
+
+# Directories this launcher created, removed when the master exits
+_created: List[str] = []
+
+
+def available_cpus(cpu_max: str = "/sys/fs/cgroup/cpu.max") -> int:
+    """CPUs this process may run on, capped by a cgroup v2 CPU quota (containers)."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open(cpu_max) as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def worker_count() -> int:
+    return settings.WORKERS or available_cpus()
+
+
+def prepare_shared_state(workers: int) -> None:
+    """Shared directories for worker coordination; call before the app is loaded."""
+    if workers >= 2:
+        settings.LOG_FILES_PER_WORKER = True
+        if not settings.CACHE_INVALIDATION_DIR:
+            settings.CACHE_INVALIDATION_DIR = tempfile.mkdtemp(prefix="urbanturban-cache-")
+            _created.append(settings.CACHE_INVALIDATION_DIR)
+        if settings.METRICS_ENABLED and not settings.METRICS_MULTIPROC_DIR:
+            settings.METRICS_MULTIPROC_DIR = tempfile.mkdtemp(prefix="urbanturban-metrics-")
+            _created.append(settings.METRICS_MULTIPROC_DIR)
+    if settings.METRICS_MULTIPROC_DIR:
+        from app.core import metrics
+
+        # A previous run's snapshots would be merged into this one's totals
+        metrics.clear_worker_snapshots(settings.METRICS_MULTIPROC_DIR)
+
+
+def post_fork(server, worker) -> None:
+    from app.core import logs
+    from app.database import async_engine, async_read_engines, engine
+
+    logs.restart_after_fork()
+    # Connections opened by the master must not be shared with the children
+    for db_engine in [engine, async_engine.sync_engine, *(e.sync_engine for e in async_read_engines)]:
+        db_engine.dispose(close=False)
+
+
+def child_exit(server, worker) -> None:
+    if settings.METRICS_ENABLED and settings.METRICS_MULTIPROC_DIR:
+        from app.core import metrics
+
+        metrics.retire_worker_snapshot(settings.METRICS_MULTIPROC_DIR, worker.pid)
+
+
+def on_exit(server) -> None:
+    for directory in _created:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def options(workers: int) -> dict:
+    return {
+        "bind": f"{settings.HOST}:{settings.PORT}",
+        "workers": workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "max_requests": settings.WORKER_MAX_REQUESTS,
+        "max_requests_jitter": settings.WORKER_MAX_REQUESTS_JITTER,
+        "timeout": settings.WORKER_TIMEOUT,
+        "graceful_timeout": settings.WORKER_GRACEFUL_TIMEOUT,
+        "keepalive": 5,
+        # The app writes its own access log (app.core.logs)
+        "accesslog": None,
+        # The app resolves X-Forwarded-For itself (TRUSTED_PROXIES, app.core.proxies)
+        "forwarded_allow_ips": "",
+        "post_fork": post_fork,
+        "child_exit": child_exit,
+        "on_exit": on_exit,
+    }
+
+
+def run(workers: int = 0) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    from app.core import logs
+
+    workers = workers or worker_count()
+    prepare_shared_state(workers)
+    # Before the app is imported, so the master's own records are queued too
+    logs.configure_logging()
+
+    class Server(BaseApplication):
+        def load_config(self):
+            for key, value in options(workers).items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app.main import app
+            return app
+
+    Server().run()
@@ -1,78 +1,190 @@
 """Data access layer matching the original MemStorage implementation."""
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_
-from typing import Optional, List
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, delete, inspect, insert, update
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, Optional, List, Callable, TypeVar
 from decimal import Decimal
 from datetime import datetime
 
+from app.config import settings
+from app.core.cache import QueryCache, get_query_cache
+from app.core.telemetry import tracer
+from app.database import replica_reads
 from app.models import (
     User, Product, ProductVariant, Cart, CartItem, Order, OrderItem, Payment
 )
 from app.schemas import UserCreate, ProductResponse, CartItemResponse, OrderResponse
 
+T = TypeVar("T")
+
+
+def read_only(method: Callable[..., T]) -> Callable[..., T]:
+    """Mark a Storage method as safe to serve from a read replica."""
+    method.read_only = True
+    return method
+
+
+def cached(entity: str, tags: Callable[..., List[str]]) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """
+    Let AsyncStorage serve a read from the query cache for CACHE_TTL_<entity>
+    seconds. `tags(result, *args)` names what a write must invalidate.
+    """
+    def mark(method: Callable[..., T]) -> Callable[..., T]:
+        method.cache_entity = entity
+        method.cache_tags = tags
+        return method
+    return mark
+
+
+def invalidates(tags: Callable[..., List[str]]) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Mark a write method; `tags(result, *args)` are dropped from the query cache."""
+    def mark(method: Callable[..., T]) -> Callable[..., T]:
+        method.invalidates = tags
+        return method
+    return mark
+
+
+# Eager-load paths for everything the response schemas serialize, so no
+# attribute is lazy-loaded after the session hands objects back to a route.
+_VARIANT_PRODUCT = (
+    joinedload(CartItem.variant)
+    .joinedload(ProductVariant.product)
+    .selectinload(Product.variants)
+)
+_ORDER_ITEMS = (
+    joinedload(Order.items)
+    .joinedload(OrderItem.variant)
+    .joinedload(ProductVariant.product)
+    .selectinload(Product.variants)
+)
+
+
+def _order_tags(orders: List[Order]) -> List[str]:
+    # List entries are tagged with each order so a status change drops them too
+    return [f"order:{order.id}" for order in orders]
+
 
 class Storage:
-    """Storage class matching IStorage interface from Express backend."""
+    """
+    Storage class matching IStorage interface from Express backend.
+
+    Write methods commit on their own by default. Inside transaction() they
+    only flush, so the caller decides where the commit goes and a multi-step
+    write (e.g. checkout) costs one COMMIT. Inserts get generated keys and
+    server defaults back through RETURNING, so no write re-reads its row.
+    """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, autocommit: bool = True):
         self.db = db
+        self.autocommit = autocommit
+    
+    @contextmanager
+    def transaction(self) -> Iterator["Storage"]:
+        """Group the enclosed write methods into a single commit."""
+        if not self.autocommit:
+            # Already inside an outer transaction()
+            yield self
+            return
+        self.autocommit = False
+        try:
+            yield self
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        finally:
+            self.autocommit = True
+    
+    def _commit(self) -> None:
+        if self.autocommit:
+            self.db.commit()
+        else:
+            self.db.flush()
+    
+    def _returning_supported(self, mapper) -> bool:
+        dialect = self.db.get_bind(mapper).dialect
+        return dialect.insert_executemany_returning and dialect.update_returning
     
     # === User Methods ===
     
+    @read_only
+    @cached("user", lambda user, user_id: [f"user:{user_id}"])
     def get_user(self, user_id: int) -> Optional[User]:
         """Get user by ID."""
         return self.db.query(User).filter(User.id == user_id).first()
     
+    # Not cached: the login path needs the password hash
+    @read_only
     def get_user_by_email(self, email: str) -> Optional[User]:
         return self.db.query(User).filter(User.email == email).first()
 
-    def create_user(self, user: UserCreate) -> User:
+    @read_only
+    def get_users(self) -> List[User]:
+        """Get all users."""
+        return self.db.query(User).all()
+
+    @invalidates(lambda user, *args: ["users"])
+    def create_user(
+        self,
+        user: UserCreate,
+        hashed_password: Optional[str] = None,
+        role: str = "customer"
+    ) -> User:
         db_user = User(
             email=user.email,
-            password=user.password,
+            password=hashed_password if hashed_password is not None else user.password,
             name=user.name,
-            role="customer" # Default role
+            role=role
         )
         self.db.add(db_user)
-        self.db.commit()
-        self.db.refresh(db_user)
+        self._commit()
         return db_user
     
+    @invalidates(lambda deleted, user_id: ["users", f"user:{user_id}"])
     def delete_user(self, user_id: int) -> bool:
         """Delete user by ID."""
-        user = self.db.query(User).filter(User.id == user_id).first()
-        if user:
-            self.db.delete(user)
-            self.db.commit()
-            return True
-        return False
+        result = self.db.execute(delete(User).where(User.id == user_id))
+        self._commit()
+        return result.rowcount > 0
     
     # === Product Methods ===
     
+    @read_only
+    @cached("catalog", lambda *args: ["catalog"])
     def get_products(self) -> List[Product]:
         """Get all products with variants."""
         return self.db.query(Product).options(
             joinedload(Product.variants)
         ).filter(Product.is_active == True).all()
     
+    @read_only
+    @cached("catalog", lambda *args: ["catalog"])
     def get_product(self, product_id: int) -> Optional[Product]:
         """Get product by ID with variants."""
         return self.db.query(Product).options(
             joinedload(Product.variants)
         ).filter(Product.id == product_id).first()
     
+    @read_only
+    @cached("catalog", lambda *args: ["catalog"])
     def get_product_by_slug(self, slug: str) -> Optional[Product]:
         """Get product by slug with variants."""
         return self.db.query(Product).options(
             joinedload(Product.variants)
         ).filter(Product.slug == slug).first()
     
+    # Not cached: the cart checks stock_quantity against it, which changes
+    # outside the catalog writers (checkout, imports)
+    @read_only
     def get_product_variant(self, variant_id: int) -> Optional[ProductVariant]:
         """Get product variant by ID."""
         return self.db.query(ProductVariant).filter(ProductVariant.id == variant_id).first()
     
     # === Cart Methods ===
     
+    @read_only
+    @cached("cart", lambda cart, user_id=None: [f"cart-owner:{user_id}"])
     def get_cart(self, user_id: Optional[int] = None) -> Optional[Cart]:
         """Get user's most recent cart."""
         if not user_id:
@@ -81,33 +193,47 @@ class Storage:
             Cart.user_id == user_id
         ).order_by(Cart.created_at.desc()).first()
     
+    @invalidates(lambda cart, user_id=None: [f"cart-owner:{user_id}"] if user_id else [])
     def create_cart(self, user_id: Optional[int] = None) -> Cart:
         """Create a new cart."""
         cart = Cart(user_id=user_id)
         self.db.add(cart)
-        self.db.commit()
-        self.db.refresh(cart)
+        self._commit()
         return cart
     
+    @read_only
     def get_cart_items(self, cart_id: int) -> List[CartItem]:
         """Get cart items with variant and product details."""
         return self.db.query(CartItem).options(
-            joinedload(CartItem.variant).joinedload(ProductVariant.product)
+            _VARIANT_PRODUCT
         ).filter(CartItem.cart_id == cart_id).all()
     
     def add_item_to_cart(self, cart_id: int, variant_id: int, quantity: int) -> CartItem:
         """Add item to cart or update quantity if exists."""
-        existing = self.db.query(CartItem).filter(
-            and_(
-                CartItem.cart_id == cart_id,
-                CartItem.product_variant_id == variant_id
-            )
-        ).first()
+        if self._returning_supported(CartItem):
+            # Increment in place; one statement when the line already exists
+            existing = self.db.scalars(
+                update(CartItem)
+                .where(
+                    CartItem.cart_id == cart_id,
+                    CartItem.product_variant_id == variant_id
+                )
+                .values(quantity=CartItem.quantity + quantity)
+                .returning(CartItem),
+                execution_options={"synchronize_session": False, "populate_existing": True}
+            ).first()
+        else:
+            existing = self.db.query(CartItem).filter(
+                and_(
+                    CartItem.cart_id == cart_id,
+                    CartItem.product_variant_id == variant_id
+                )
+            ).first()
+            if existing:
+                existing.quantity += quantity
         
         if existing:
-            existing.quantity += quantity
-            self.db.commit()
-            self.db.refresh(existing)
+            self._commit()
             return existing
         
         item = CartItem(
@@ -116,117 +242,128 @@ class Storage:
             quantity=quantity
         )
         self.db.add(item)
-        self.db.commit()
-        self.db.refresh(item)
+        self._commit()
         return item
     
     def update_cart_item(self, item_id: int, quantity: int) -> CartItem:
         """Update cart item quantity."""
-        item = self.db.query(CartItem).filter(CartItem.id == item_id).first()
+        if self._returning_supported(CartItem):
+            item = self.db.scalars(
+                update(CartItem)
+                .where(CartItem.id == item_id)
+                .values(quantity=quantity)
+                .returning(CartItem),
+                execution_options={"synchronize_session": False, "populate_existing": True}
+            ).first()
+        else:
+            item = self.db.query(CartItem).filter(CartItem.id == item_id).first()
+            if item:
+                item.quantity = quantity
         if not item:
             raise ValueError("Item not found")
-        item.quantity = quantity
-        self.db.commit()
-        self.db.refresh(item)
+        self._commit()
         return item
     
     def remove_cart_item(self, item_id: int) -> None:
         """Remove cart item."""
-        item = self.db.query(CartItem).filter(CartItem.id == item_id).first()
-        if item:
-            self.db.delete(item)
-            self.db.commit()
+        self.db.execute(delete(CartItem).where(CartItem.id == item_id))
+        self._commit()
     
     def clear_cart(self, cart_id: int) -> None:
         """Clear all items from cart."""
         self.db.query(CartItem).filter(CartItem.cart_id == cart_id).delete()
-        self.db.commit()
+        self._commit()
     
+    @invalidates(lambda none, cart_id, user_id: [f"cart-owner:{user_id}"])
     def assign_cart_to_user(self, cart_id: int, user_id: int) -> None:
         """Assign cart to user."""
-        cart = self.db.query(Cart).filter(Cart.id == cart_id).first()
-        if cart:
-            cart.user_id = user_id
-            self.db.commit()
+        self.db.execute(
+            update(Cart).where(Cart.id == cart_id).values(user_id=user_id)
+        )
+        self._commit()
 
     def merge_carts(self, guest_cart_id: int, user_cart_id: int) -> None:
         """Merge guest cart items into user cart."""
-        guest_items = self.get_cart_items(guest_cart_id)
+        # Two reads for the whole merge instead of one probe per guest item
+        guest_items = self.db.query(CartItem).filter(CartItem.cart_id == guest_cart_id).all()
+        user_items = {
+            item.product_variant_id: item
+            for item in self.db.query(CartItem).filter(CartItem.cart_id == user_cart_id)
+        }
         
         for item in guest_items:
-            # Check if item exists in user cart
-            existing = self.db.query(CartItem).filter(
-                and_(
-                    CartItem.cart_id == user_cart_id,
-                    CartItem.product_variant_id == item.product_variant_id
-                )
-            ).first()
-            
+            existing = user_items.get(item.product_variant_id)
             if existing:
                 existing.quantity += item.quantity
+                self.db.delete(item)
             else:
-                new_item = CartItem(
-                    cart_id=user_cart_id,
-                    product_variant_id=item.product_variant_id,
-                    quantity=item.quantity
-                )
-                self.db.add(new_item)
+                # Move the line instead of copying it
+                item.cart_id = user_cart_id
+                user_items[item.product_variant_id] = item
         
-        # Delete guest cart and its items (cascade should handle items but being explicit is safe)
-        # Note: Cascade defined in model: items = relationship(..., cascade="all, delete-orphan")
-        # So deleting cart is enough.
-        guest_cart = self.db.query(Cart).filter(Cart.id == guest_cart_id).first()
-        if guest_cart:
-            self.db.delete(guest_cart)
-            
-        self.db.commit()
+        # Lines must leave the guest cart before it is deleted (FK)
+        self.db.flush()
+        self.db.execute(delete(Cart).where(Cart.id == guest_cart_id))
+        self._commit()
     
     # === Order Methods ===
     
+    @invalidates(lambda order, order_data: ["orders", f"orders:user:{order.user_id}"])
     def create_order(self, order_data: dict) -> Order:
         """Create a new order."""
         order = Order(**order_data)
         self.db.add(order)
-        self.db.commit()
-        self.db.refresh(order)
+        self._commit()
         return order
     
+    @invalidates(lambda items, items_data: list({f"order:{d['order_id']}" for d in items_data}))
     def create_order_items(self, items_data: List[dict]) -> List[OrderItem]:
         """Create order items."""
-        items = [OrderItem(**data) for data in items_data]
-        self.db.add_all(items)
-        self.db.commit()
-        for item in items:
-            self.db.refresh(item)
+        if not items_data:
+            return []
+        if self._returning_supported(OrderItem):
+            # One multi-row INSERT ... RETURNING for the whole order
+            items = list(self.db.scalars(insert(OrderItem).returning(OrderItem), items_data))
+        else:
+            items = [OrderItem(**data) for data in items_data]
+            self.db.add_all(items)
+        self._commit()
         return items
     
+    @invalidates(lambda payment, payment_data: [f"order:{payment.order_id}"])
     def create_payment(self, payment_data: dict) -> Payment:
         """Create payment record."""
         payment = Payment(**payment_data)
         self.db.add(payment)
-        self.db.commit()
-        self.db.refresh(payment)
+        self._commit()
         return payment
     
+    @read_only
+    @cached("order", lambda orders, user_id: [f"orders:user:{user_id}", *_order_tags(orders)])
     def get_orders(self, user_id: int) -> List[Order]:
         """Get all orders for user with items."""
         return self.db.query(Order).options(
-            joinedload(Order.items).joinedload(OrderItem.variant).joinedload(ProductVariant.product)
+            _ORDER_ITEMS
         ).filter(Order.user_id == user_id).order_by(Order.created_at.desc()).all()
     
+    @read_only
+    @cached("order", lambda orders: ["orders", *_order_tags(orders)])
     def get_all_orders(self) -> List[Order]:
         """Get all orders (Admin only) with user details."""
         return self.db.query(Order).options(
-            joinedload(Order.items).joinedload(OrderItem.variant).joinedload(ProductVariant.product),
+            _ORDER_ITEMS,
             joinedload(Order.user)
         ).order_by(Order.created_at.desc()).all()
     
+    @read_only
+    @cached("order", lambda order, order_id: [f"order:{order_id}"])
     def get_order(self, order_id: int) -> Optional[Order]:
         """Get order by ID with items."""
         return self.db.query(Order).options(
-            joinedload(Order.items).joinedload(OrderItem.variant).joinedload(ProductVariant.product)
+            _ORDER_ITEMS
         ).filter(Order.id == order_id).first()
     
+    @invalidates(lambda order, order_id, *args: [f"order:{order_id}"])
     def update_order_status(
         self, 
         order_id: int, 
@@ -234,7 +371,8 @@ class Storage:
         additional_data: Optional[dict] = None
     ) -> Order:
         """Update order status and additional fields."""
-        order = self.db.query(Order).filter(Order.id == order_id).first()
+        # Identity-map hit when the caller has just loaded the order
+        order = self.db.get(Order, order_id)
         if not order:
             raise ValueError("Order not found")
         
@@ -243,13 +381,16 @@ class Storage:
             for key, value in additional_data.items():
                 setattr(order, key, value)
         
-        self.db.commit()
-        self.db.refresh(order)
+        self._commit()
+        if "items" in inspect(order).unloaded:
+            # Load items so the caller never triggers a lazy load
+            return self.get_order(order_id)
         return order
     
     # === Seeding ===
     
 
+    @invalidates(lambda *args: ["catalog"])
     def seed_products(self) -> None:
         """Seed initial products (matching Express implementation)."""
         # Check if products already exist
@@ -295,6 +436,7 @@ class Storage:
             # If table doesn't exist or query fails, continue
              pass
 
+    @invalidates(lambda *args: ["users"])
     def seed_users(self) -> None:
         """Seed initial admin user."""
         try:
@@ -323,3 +465,179 @@ class Storage:
             pass
 
 
+
+
+class AsyncStorage:
+    """
+    Async facade over Storage for request handlers.
+
+    Every method runs the matching Storage method through
+    AsyncSession.run_sync(), so queries execute on the asyncio driver
+    (asyncpg / aiosqlite) without blocking the event loop, and the query
+    logic lives in one place. Methods marked @read_only may be served by a
+    read replica; everything else, including reads nested inside write
+    methods, stays on the primary. Methods marked @cached are answered from
+    the query cache until a write marked @invalidates drops their tags.
+    """
+    
+    def __init__(self, db: AsyncSession, cache: Optional[QueryCache] = None):
+        self.db = db
+        self.cache = cache if cache is not None else get_query_cache()
+        self._autocommit = True
+        self._pending_tags: List[str] = []
+    
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator["AsyncStorage"]:
+        """Group the enclosed write methods into a single commit."""
+        if not self._autocommit:
+            yield self
+            return
+        self._autocommit = False
+        try:
+            yield self
+            with tracer.span("storage.commit"):
+                await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        finally:
+            self._autocommit = True
+            # Readers may have re-cached pre-commit rows in the meantime
+            if self._pending_tags and self.cache is not None:
+                await self.cache.ainvalidate(self._pending_tags)
+            self._pending_tags = []
+    
+    async def _run(self, method: Callable[..., T], *args, **kwargs) -> T:
+        with tracer.span(f"storage.{method.__name__}") as span:
+            return await self._run_cached(method, span, *args, **kwargs)
+    
+    async def _run_cached(self, method: Callable[..., T], span, *args, **kwargs) -> T:
+        cache = self.cache
+        # Reads inside transaction() must see its uncommitted writes
+        use_cache = cache is not None and self._autocommit and hasattr(method, "cache_entity")
+        if use_cache:
+            key = cache.make_key(method.__name__, args, kwargs)
+            hit, value = await cache.aget(method.__name__, key)
+            if span is not None:
+                span.set("cache", "hit" if hit else "miss")
+            if hit:
+                return value
+        
+        def call(session: Session) -> T:
+            storage = Storage(session, autocommit=self._autocommit)
+            if getattr(method, "read_only", False):
+                with replica_reads(session):
+                    return method(storage, *args, **kwargs)
+            return method(storage, *args, **kwargs)
+        result = await self.db.run_sync(call)
+        
+        if use_cache and result is not None:
+            ttl = getattr(settings, f"CACHE_TTL_{method.cache_entity.upper()}")
+            await cache.aset(method.__name__, key, result, ttl, method.cache_tags(result, *args, **kwargs))
+        elif cache is not None and hasattr(method, "invalidates"):
+            tags = method.invalidates(result, *args, **kwargs)
+            await cache.ainvalidate(tags)
+            if not self._autocommit:
+                self._pending_tags.extend(tags)
+        return result
+    
+    # === User Methods ===
+    
+    async def get_user(self, user_id: int) -> Optional[User]:
+        return await self._run(Storage.get_user, user_id)
+    
+    async def get_user_by_email(self, email: str) -> Optional[User]:
+        return await self._run(Storage.get_user_by_email, email)
+    
+    async def get_users(self) -> List[User]:
+        return await self._run(Storage.get_users)
+    
+    async def create_user(
+        self,
+        user: UserCreate,
+        hashed_password: Optional[str] = None,
+        role: str = "customer"
+    ) -> User:
+        return await self._run(Storage.create_user, user, hashed_password, role)
+    
+    async def delete_user(self, user_id: int) -> bool:
+        return await self._run(Storage.delete_user, user_id)
+    
+    # === Product Methods ===
+    
+    async def get_products(self) -> List[Product]:
+        return await self._run(Storage.get_products)
+    
+    async def get_product(self, product_id: int) -> Optional[Product]:
+        return await self._run(Storage.get_product, product_id)
+    
+    async def get_product_by_slug(self, slug: str) -> Optional[Product]:
+        return await self._run(Storage.get_product_by_slug, slug)
+    
+    async def get_product_variant(self, variant_id: int) -> Optional[ProductVariant]:
+        return await self._run(Storage.get_product_variant, variant_id)
+    
+    # === Cart Methods ===
+    
+    async def get_cart(self, user_id: Optional[int] = None) -> Optional[Cart]:
+        return await self._run(Storage.get_cart, user_id)
+    
+    async def create_cart(self, user_id: Optional[int] = None) -> Cart:
+        return await self._run(Storage.create_cart, user_id)
+    
+    async def get_cart_items(self, cart_id: int) -> List[CartItem]:
+        return await self._run(Storage.get_cart_items, cart_id)
+    
+    async def add_item_to_cart(self, cart_id: int, variant_id: int, quantity: int) -> CartItem:
+        return await self._run(Storage.add_item_to_cart, cart_id, variant_id, quantity)
+    
+    async def update_cart_item(self, item_id: int, quantity: int) -> CartItem:
+        return await self._run(Storage.update_cart_item, item_id, quantity)
+    
+    async def remove_cart_item(self, item_id: int) -> None:
+        return await self._run(Storage.remove_cart_item, item_id)
+    
+    async def clear_cart(self, cart_id: int) -> None:
+        return await self._run(Storage.clear_cart, cart_id)
+    
+    async def assign_cart_to_user(self, cart_id: int, user_id: int) -> None:
+        return await self._run(Storage.assign_cart_to_user, cart_id, user_id)
+    
+    async def merge_carts(self, guest_cart_id: int, user_cart_id: int) -> None:
+        return await self._run(Storage.merge_carts, guest_cart_id, user_cart_id)
+    
+    # === Order Methods ===
+    
+    async def create_order(self, order_data: dict) -> Order:
+        return await self._run(Storage.create_order, order_data)
+    
+    async def create_order_items(self, items_data: List[dict]) -> List[OrderItem]:
+        return await self._run(Storage.create_order_items, items_data)
+    
+    async def create_payment(self, payment_data: dict) -> Payment:
+        return await self._run(Storage.create_payment, payment_data)
+    
+    async def get_orders(self, user_id: int) -> List[Order]:
+        return await self._run(Storage.get_orders, user_id)
+    
+    async def get_all_orders(self) -> List[Order]:
+        return await self._run(Storage.get_all_orders)
+    
+    async def get_order(self, order_id: int) -> Optional[Order]:
+        return await self._run(Storage.get_order, order_id)
+    
+    async def update_order_status(
+        self,
+        order_id: int,
+        status: str,
+        additional_data: Optional[dict] = None
+    ) -> Order:
+        return await self._run(Storage.update_order_status, order_id, status, additional_data)
+    
+    # === Seeding ===
+    
+    async def seed_products(self) -> None:
+        return await self._run(Storage.seed_products)
+    
+    async def seed_users(self) -> None:
+        return await self._run(Storage.seed_users)
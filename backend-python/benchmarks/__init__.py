@@ -0,0 +1 @@
+"""Storage micro-benchmarks with JSON baselines (see README)."""
@@ -0,0 +1,120 @@
+"""
+Storage benchmark command line.
+
+    python -m benchmarks run --sizes 1k,100k                # SQLite
+    python -m benchmarks run --backend postgres --postgres-url postgresql://...
+    python -m benchmarks run --update-baseline              # accept current timings
+
+A run fails (exit status 1) when any method's median and fastest round
+are both more than --tolerance slower than the stored baseline for the same
+backend and size; one noisy statistic alone does not fail it.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+from sqlalchemy import create_engine
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _engine(args: argparse.Namespace, size: str):
+    if args.backend == "postgres":
+        url = args.postgres_url or os.environ.get("BENCH_POSTGRES_URL")
+        if not url:
+            raise SystemExit("--backend postgres needs --postgres-url or BENCH_POSTGRES_URL")
+        return create_engine(url)
+    os.makedirs(args.data_dir, exist_ok=True)
+    return create_engine(f"sqlite:///{os.path.join(args.data_dir, f'sqlite-{size}.db')}")
+
+
+def cmd_run(args: argparse.Namespace) -> None:
+    from benchmarks.cases import CASES, CASES_BY_NAME
+    from benchmarks.datasets import SIZES, build_dataset, dataset_matches
+    from benchmarks.runner import find_regressions, run_cases
+
+    cases = [CASES_BY_NAME[name] for name in args.cases.split(",")] if args.cases else CASES
+    report = {
+        "backend": args.backend,
+        "machine": {"python": platform.python_version(), "platform": platform.platform()},
+        "results": {},
+    }
+    for size in args.sizes.split(","):
+        rows = SIZES[size]
+        engine = _engine(args, size)
+        if args.rebuild or not dataset_matches(engine, rows):
+            start = time.perf_counter()
+            print(f"[{size}] building dataset ({rows} rows)...", flush=True)
+            build_dataset(engine, rows)
+            print(f"[{size}] built in {time.perf_counter() - start:.1f}s", flush=True)
+        results = run_cases(engine, cases, min_time=args.min_time)
+        engine.dispose()
+        report["results"][size] = results
+        for name, result in results.items():
+            print(f"[{size}] {name:22} median {result['median_ms']:10.3f}ms  p95 {result['p95_ms']:10.3f}ms")
+
+    if args.output:
+        _write(args.output, report)
+
+    baseline_path = args.baseline or os.path.join(BENCH_DIR, "baselines", f"{args.backend}.json")
+    if args.update_baseline:
+        baseline = _read(baseline_path) or {"backend": args.backend, "results": {}}
+        baseline["machine"] = report["machine"]
+        for size, results in report["results"].items():
+            baseline["results"].setdefault(size, {}).update(results)
+        _write(baseline_path, baseline)
+        print(f"Baseline updated: {baseline_path}")
+        return
+
+    baseline = _read(baseline_path)
+    if baseline is None:
+        print(f"No baseline at {baseline_path}; run with --update-baseline to create one")
+        return
+    regressions = find_regressions(baseline, report, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions against {baseline_path} (tolerance {args.tolerance:.0%})")
+
+
+def _read(path: str):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write(path: str, data: dict) -> None:
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Time every Storage method")
+    run.add_argument("--backend", choices=["sqlite", "postgres"], default="sqlite")
+    run.add_argument("--postgres-url", help="Database to load (its contents are replaced)")
+    run.add_argument("--sizes", default="1k,100k", help="Comma-separated: 1k, 100k, 1m")
+    run.add_argument("--cases", help="Comma-separated Storage method names (default: all)")
+    run.add_argument("--min-time", type=float, default=0.5, help="Seconds of samples per method")
+    run.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown of the median and fastest round (fraction)")
+    run.add_argument("--baseline", help="Default: benchmarks/baselines/<backend>.json")
+    run.add_argument("--update-baseline", action="store_true")
+    run.add_argument("--rebuild", action="store_true", help="Reload the dataset even if it matches")
+    run.add_argument("--data-dir", default=os.path.join(BENCH_DIR, ".data"))
+    run.add_argument("--output", help="Also write this run's results here")
+    run.set_defaults(func=cmd_run)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
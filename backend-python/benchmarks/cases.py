@@ -0,0 +1,102 @@
+"""
+One benchmark case per Storage method.
+
+Every round runs in a fresh session, like a request. Write methods run
+with autocommit off (they flush instead of committing) and the round is
+rolled back, so the dataset stays identical across rounds and runs.
+The seeding helpers are not benchmarked: they commit on their own.
+"""
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import Cart, CartItem, Order, Product, User
+from app.schemas import UserCreate
+from app.storage import Storage
+
+
+class Context(NamedTuple):
+    """Ids of representative rows in the loaded dataset."""
+    user_id: int
+    email: str
+    product_id: int
+    slug: str
+    variant_id: int
+    cart_id: int
+    guest_cart_id: int
+    cart_item_id: int
+    order_id: int
+
+
+def load_context(db: Session) -> Context:
+    order = db.scalars(select(Order).order_by(Order.id).limit(1)).one()
+    user = db.get(User, order.user_id)
+    cart = db.scalars(select(Cart).where(Cart.user_id.is_not(None)).order_by(Cart.id).limit(1)).one()
+    guest_cart = db.scalars(select(Cart).where(Cart.user_id.is_(None)).order_by(Cart.id).limit(1)).one()
+    item = db.scalars(select(CartItem).where(CartItem.cart_id == cart.id).limit(1)).one()
+    product = db.get(Product, 1)
+    return Context(
+        user_id=user.id, email=user.email, product_id=product.id, slug=product.slug, variant_id=1,
+        cart_id=cart.id, guest_cart_id=guest_cart.id, cart_item_id=item.id, order_id=order.id,
+    )
+
+
+class Case(NamedTuple):
+    name: str
+    run: Callable[[Storage, Context, tuple], object]
+    writes: bool = False
+    # Untimed preparation inside the same (rolled back) transaction
+    setup: Optional[Callable[[Storage, Context], tuple]] = None
+
+
+def _new_order(storage: Storage, ctx: Context) -> tuple:
+    order = storage.create_order({
+        "user_id": ctx.user_id, "status": "paid", "total_amount": 799, "payment_provider": "upi_mock"
+    })
+    return (order.id,)
+
+
+def _new_user(storage: Storage, ctx: Context) -> tuple:
+    user = storage.create_user(UserCreate(email="bench-delete@example.com", password="x", name="Bench"))
+    return (user.id,)
+
+
+CASES: List[Case] = [
+    Case("get_user", lambda s, c, a: s.get_user(c.user_id)),
+    Case("get_user_by_email", lambda s, c, a: s.get_user_by_email(c.email)),
+    Case("get_users", lambda s, c, a: s.get_users()),
+    Case("create_user", lambda s, c, a: s.create_user(
+        UserCreate(email="bench-new@example.com", password="x", name="Bench")
+    ), writes=True),
+    Case("delete_user", lambda s, c, a: s.delete_user(a[0]), writes=True, setup=_new_user),
+    Case("get_products", lambda s, c, a: s.get_products()),
+    Case("get_product", lambda s, c, a: s.get_product(c.product_id)),
+    Case("get_product_by_slug", lambda s, c, a: s.get_product_by_slug(c.slug)),
+    Case("get_product_variant", lambda s, c, a: s.get_product_variant(c.variant_id)),
+    Case("get_cart", lambda s, c, a: s.get_cart(c.user_id)),
+    Case("create_cart", lambda s, c, a: s.create_cart(c.user_id), writes=True),
+    Case("get_cart_items", lambda s, c, a: s.get_cart_items(c.cart_id)),
+    Case("add_item_to_cart", lambda s, c, a: s.add_item_to_cart(c.cart_id, c.variant_id, 1), writes=True),
+    Case("update_cart_item", lambda s, c, a: s.update_cart_item(c.cart_item_id, 2), writes=True),
+    Case("remove_cart_item", lambda s, c, a: s.remove_cart_item(c.cart_item_id), writes=True),
+    Case("clear_cart", lambda s, c, a: s.clear_cart(c.cart_id), writes=True),
+    Case("assign_cart_to_user", lambda s, c, a: s.assign_cart_to_user(c.guest_cart_id, c.user_id), writes=True),
+    Case("merge_carts", lambda s, c, a: s.merge_carts(c.guest_cart_id, c.cart_id), writes=True),
+    Case("create_order", lambda s, c, a: _new_order(s, c), writes=True),
+    Case("create_order_items", lambda s, c, a: s.create_order_items([
+        {"order_id": a[0], "product_variant_id": c.variant_id, "quantity": 1, "price_at_purchase": 799},
+        {"order_id": a[0], "product_variant_id": c.variant_id + 1, "quantity": 2, "price_at_purchase": 799},
+    ]), writes=True, setup=_new_order),
+    Case("create_payment", lambda s, c, a: s.create_payment({
+        "order_id": a[0], "provider": "upi_mock", "status": "completed", "external_id": "bench"
+    }), writes=True, setup=_new_order),
+    Case("get_orders", lambda s, c, a: s.get_orders(c.user_id)),
+    Case("get_all_orders", lambda s, c, a: s.get_all_orders()),
+    Case("get_order", lambda s, c, a: s.get_order(c.order_id)),
+    Case("update_order_status", lambda s, c, a: s.update_order_status(
+        c.order_id, "shipped", {"tracking_number": "BENCH123"}
+    ), writes=True),
+]
+
+CASES_BY_NAME: Dict[str, Case] = {case.name: case for case in CASES}
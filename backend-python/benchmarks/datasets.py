@@ -0,0 +1,27 @@
+"""
+Benchmark datasets.
+
+A dataset of size N is the synthetic store from `app.core.datagen` with
+volumes totalling roughly N rows, so per-method timings can be compared
+as tables grow. Datasets are identical for a given size and seed.
+"""
+from sqlalchemy.engine import Engine
+
+from app.core.datagen import Volumes, generate, table_counts
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+
+def dataset_matches(engine: Engine, rows: int) -> bool:
+    """Whether the database already holds the dataset for `rows`."""
+    volumes = Volumes.for_rows(rows)
+    try:
+        counts = table_counts(engine)
+    except Exception:
+        return False
+    return all(counts[table] == getattr(volumes, table) for table in Volumes._fields)
+
+
+def build_dataset(engine: Engine, rows: int, seed: int = 42) -> dict:
+    """Migrate `engine` to head and replace its contents with the dataset."""
+    return generate(engine, Volumes.for_rows(rows), seed=seed)
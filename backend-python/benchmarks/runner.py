@@ -0,0 +1,81 @@
+"""Timing loop, result files and baseline comparison."""
+import statistics
+import time
+from typing import Dict, Iterable, List
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.storage import Storage
+from benchmarks.cases import Case, Context, load_context
+
+# Differences below this are timer noise, whatever the relative change
+NOISE_FLOOR_MS = 0.05
+
+
+def time_case(
+    engine: Engine,
+    case: Case,
+    ctx: Context,
+    min_rounds: int = 5,
+    max_rounds: int = 200,
+    min_time: float = 0.5,
+    warmup_rounds: int = 2,
+) -> dict:
+    """Run `case` until it has `min_rounds` and `min_time` seconds of samples."""
+    samples: List[float] = []
+    spent = 0.0
+    rounds = 0
+    while len(samples) < max_rounds and (len(samples) < min_rounds or spent < min_time):
+        with Session(engine, expire_on_commit=False) as db:
+            storage = Storage(db, autocommit=not case.writes)
+            try:
+                args = case.setup(storage, ctx) if case.setup else ()
+                start = time.perf_counter()
+                case.run(storage, ctx, args)
+                elapsed = time.perf_counter() - start
+            finally:
+                db.rollback()
+        rounds += 1
+        # Leave out statement-cache and connection warm-up
+        if rounds <= warmup_rounds:
+            continue
+        samples.append(elapsed)
+        spent += elapsed
+    samples.sort()
+    return {
+        "rounds": len(samples),
+        "median_ms": round(statistics.median(samples) * 1000, 4),
+        "p95_ms": round(samples[max(0, int(len(samples) * 0.95) - 1)] * 1000, 4),
+        "min_ms": round(samples[0] * 1000, 4),
+    }
+
+
+def run_cases(engine: Engine, cases: Iterable[Case], **timing) -> Dict[str, dict]:
+    with Session(engine) as db:
+        ctx = load_context(db)
+    return {case.name: time_case(engine, case, ctx, **timing) for case in cases}
+
+
+def find_regressions(baseline: dict, current: dict, tolerance: float) -> List[str]:
+    """
+    Cases whose median and best round both grew by more than `tolerance`
+    (and the noise floor); requiring both filters out scheduler noise.
+    """
+    regressions = []
+    for size, results in current["results"].items():
+        base_results = baseline.get("results", {}).get(size, {})
+        for name, result in results.items():
+            base = base_results.get(name)
+            if base is None:
+                continue
+            slower = all(
+                result[stat] > base[stat] * (1 + tolerance) and result[stat] - base[stat] > NOISE_FLOOR_MS
+                for stat in ("median_ms", "min_ms")
+            )
+            if slower:
+                regressions.append(
+                    f"{size} {name}: median {base['median_ms']}ms -> {result['median_ms']}ms "
+                    f"(+{(result['median_ms'] / base['median_ms'] - 1):.0%})"
+                )
+    return regressions
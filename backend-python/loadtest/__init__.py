@@ -0,0 +1 @@
+"""Load-test harness replaying weighted shopping scenarios (see README)."""
@@ -0,0 +1,142 @@
+"""
+Load-test command line.
+
+    python -m loadtest run --users 20 --duration 60 --output report.json
+    python -m loadtest run --url http://localhost:5000 --users 50
+    python -m loadtest compare baseline.json report.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from typing import Dict, Optional
+
+import httpx
+
+
+def _parse_weights(text: Optional[str]) -> Optional[Dict[str, float]]:
+    if not text:
+        return None
+    from loadtest.scenarios import SCENARIOS
+    weights = {name: 0.0 for name in SCENARIOS}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        weights[name.strip()] = float(weight)
+    return weights
+
+
+def _configure_in_process(database_url: Optional[str]) -> None:
+    """
+    Environment for the in-process app: a fresh, migrated and seeded database
+    unless one is given, and no login throttle (every virtual user shares
+    one client address). SQLite files go through SQLITE_PATH so the run uses
+    the SQLite production profile (WAL, single writer) that ships.
+    """
+    if database_url and not database_url.startswith("sqlite:///"):
+        os.environ["DATABASE_URL"] = database_url
+    else:
+        # Empty rather than unset, so a DATABASE_URL in .env cannot take over
+        os.environ["DATABASE_URL"] = ""
+        os.environ["SQLITE_PATH"] = (
+            database_url[len("sqlite:///"):] if database_url
+            else os.path.join(tempfile.mkdtemp(prefix="loadtest-"), "loadtest.db")
+        )
+    os.environ.setdefault("DB_AUTO_MIGRATE", "true")
+    os.environ.setdefault("SEED_ON_STARTUP", "true")
+    os.environ.setdefault("LOGIN_THROTTLE_ENABLED", "false")
+
+
+async def _run(args: argparse.Namespace) -> dict:
+    from loadtest.runner import run_load
+
+    options = dict(
+        users=args.users,
+        duration=None if args.iterations else args.duration,
+        iterations=args.iterations,
+        weights=_parse_weights(args.weights),
+        seed=args.seed,
+        accounts=args.accounts,
+    )
+    if args.url:
+        def make_client() -> httpx.AsyncClient:
+            return httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+        return await run_load(make_client, meta={"target": args.url}, **options)
+
+    _configure_in_process(args.database_url)
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+
+    def make_client() -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout)
+
+    async with app.router.lifespan_context(app):
+        return await run_load(make_client, meta={"target": "in-process"}, **options)
+
+
+def cmd_run(args: argparse.Namespace) -> None:
+    report = asyncio.run(_run(args))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    total = report["total"]
+    print(
+        f"{total['requests']} requests, {total['throughput_rps']} req/s, "
+        f"p50 {total['p50_ms']}ms p95 {total['p95_ms']}ms p99 {total['p99_ms']}ms, "
+        f"error rate {total['error_rate']:.2%} -> {args.output}"
+    )
+    for step, stats in report["steps"].items():
+        print(
+            f"  {step:45} {stats['requests']:6} req  p95 {stats['p95_ms']:9.2f}ms  "
+            f"errors {stats['errors']}"
+        )
+
+
+def cmd_compare(args: argparse.Namespace) -> None:
+    from loadtest.runner import compare
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        sys.exit(1)
+    print("No regressions")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m loadtest")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Replay weighted shopping scenarios")
+    run.add_argument("--url", help="Target base URL; runs the app in-process when omitted")
+    run.add_argument("--database-url", help="In-process only; defaults to a fresh SQLite file (SQLite production profile)")
+    run.add_argument("--users", type=int, default=10, help="Concurrent virtual users")
+    run.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    run.add_argument("--iterations", type=int, help="Scenarios per user (overrides --duration)")
+    run.add_argument("--weights", help="e.g. browse_catalog=50,checkout=10 (others become 0)")
+    run.add_argument("--seed", type=int, default=1)
+    run.add_argument("--accounts", type=int, default=20, help="Shopper accounts registered up front")
+    run.add_argument("--timeout", type=float, default=30.0)
+    run.add_argument("--output", default="loadtest-report.json")
+    run.set_defaults(func=cmd_run)
+
+    diff = commands.add_parser("compare", help="Fail on p95 or error-rate regressions")
+    diff.add_argument("baseline")
+    diff.add_argument("current")
+    diff.add_argument("--tolerance", type=float, default=0.10, help="Allowed p95 increase (fraction)")
+    diff.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Virtual users, latency recording and the JSON report."""
+import asyncio
+import math
+import random
+import time
+import uuid
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from loadtest.scenarios import ACCOUNT_PASSWORD, SCENARIOS, Fixtures
+
+REPORT_VERSION = 1
+
+
+class StepFailed(Exception):
+    """A step got an unexpected status; the rest of the scenario is skipped."""
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _latency_summary(latencies: List[float]) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+class Recorder:
+    """Collects per-step latencies and outcomes for the whole run."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Counter = Counter()
+        self.statuses: Dict[str, Counter] = {}
+        self.scenarios: Counter = Counter()
+        self.scenario_failures: Counter = Counter()
+
+    def record(self, step: str, seconds: float, status: str, ok: bool) -> None:
+        self.latencies.setdefault(step, []).append(seconds)
+        self.statuses.setdefault(step, Counter())[status] += 1
+        if not ok:
+            self.errors[step] += 1
+
+    def scenario_done(self, name: str, ok: bool) -> None:
+        self.scenarios[name] += 1
+        if not ok:
+            self.scenario_failures[name] += 1
+
+    def report(self, elapsed: float, meta: dict) -> dict:
+        steps = {}
+        for step in sorted(self.latencies):
+            latencies = self.latencies[step]
+            steps[step] = {
+                "requests": len(latencies),
+                "errors": self.errors[step],
+                "error_rate": round(self.errors[step] / len(latencies), 4),
+                "throughput_rps": round(len(latencies) / elapsed, 3),
+                **_latency_summary(latencies),
+                "statuses": dict(sorted(self.statuses[step].items())),
+            }
+        all_latencies = [s for values in self.latencies.values() for s in values]
+        total_errors = sum(self.errors.values())
+        return {
+            "version": REPORT_VERSION,
+            "meta": {**meta, "elapsed_seconds": round(elapsed, 3)},
+            "total": {
+                "requests": len(all_latencies),
+                "errors": total_errors,
+                "error_rate": round(total_errors / len(all_latencies), 4) if all_latencies else 0.0,
+                "throughput_rps": round(len(all_latencies) / elapsed, 3),
+                **_latency_summary(all_latencies),
+            },
+            "scenarios": {
+                name: {"runs": self.scenarios[name], "failed": self.scenario_failures[name]}
+                for name in sorted(self.scenarios)
+            },
+            "steps": steps,
+        }
+
+
+class VirtualUser:
+    """One scenario run's view of the HTTP client; times and checks every call."""
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, scenario: str, index: int = 0):
+        self.client = client
+        self.index = index
+        self.recorder = recorder
+        self.scenario = scenario
+
+    async def request(self, step: str, method: str, url: str, expect: int = 200, **kwargs) -> httpx.Response:
+        name = f"{self.scenario}.{step}"
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.recorder.record(name, time.perf_counter() - start, type(e).__name__, False)
+            raise StepFailed(name) from e
+        ok = response.status_code == expect
+        self.recorder.record(name, time.perf_counter() - start, str(response.status_code), ok)
+        if not ok:
+            raise StepFailed(f"{name}: {response.status_code}")
+        return response
+
+    async def get(self, step: str, url: str, **kwargs) -> httpx.Response:
+        return await self.request(step, "GET", url, **kwargs)
+
+    async def post(self, step: str, url: str, **kwargs) -> httpx.Response:
+        return await self.request(step, "POST", url, **kwargs)
+
+
+async def prepare(client: httpx.AsyncClient, accounts: int) -> Fixtures:
+    """Discover the catalog and register the shopper accounts used for logins."""
+    response = await client.get("/api/products")
+    response.raise_for_status()
+    products = response.json()
+    slugs = [p["slug"] for p in products]
+    variant_ids = [v["id"] for p in products for v in p["variants"] if v["stock_quantity"] > 0]
+    if not slugs or not variant_ids:
+        raise RuntimeError("The catalog has no products in stock; seed the database first")
+
+    run_id = uuid.uuid4().hex[:8]
+    emails = []
+    for i in range(accounts):
+        email = f"loadtest-{run_id}-{i}@example.com"
+        response = await client.post("/api/auth/register", json={
+            "email": email, "password": ACCOUNT_PASSWORD, "name": f"Load Tester {i}"
+        })
+        response.raise_for_status()
+        client.cookies.clear()
+        emails.append(email)
+    return Fixtures(slugs, variant_ids, emails)
+
+
+async def run_load(
+    make_client: Callable[[], httpx.AsyncClient],
+    users: int = 10,
+    duration: Optional[float] = 30.0,
+    iterations: Optional[int] = None,
+    weights: Optional[Dict[str, float]] = None,
+    seed: int = 1,
+    accounts: int = 20,
+    meta: Optional[dict] = None,
+) -> dict:
+    """
+    Run `users` concurrent virtual users, each picking scenarios by weight
+    until `duration` seconds pass or it has run `iterations` scenarios.
+    The scenario sequence is deterministic per seed.
+    """
+    weights = weights or {name: weight for name, (_, weight) in SCENARIOS.items()}
+    names = [name for name, weight in weights.items() if weight > 0]
+    cumulative = [weights[name] for name in names]
+    recorder = Recorder()
+
+    async with make_client() as client:
+        fixtures = await prepare(client, accounts)
+
+    start = time.perf_counter()
+    deadline = start + duration if duration else None
+
+    async def virtual_user(index: int) -> None:
+        rng = random.Random(seed * 100_003 + index)
+        runs = 0
+        async with make_client() as client:
+            while iterations is None or runs < iterations:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                name = rng.choices(names, weights=cumulative)[0]
+                # Every scenario run is a new visitor
+                client.cookies.clear()
+                try:
+                    await SCENARIOS[name][0](VirtualUser(client, recorder, name, index), fixtures, rng)
+                    recorder.scenario_done(name, True)
+                except StepFailed:
+                    recorder.scenario_done(name, False)
+                runs += 1
+
+    await asyncio.gather(*(virtual_user(i) for i in range(users)))
+    elapsed = time.perf_counter() - start
+    return recorder.report(elapsed, {
+        **(meta or {}),
+        "users": users,
+        "duration": duration,
+        "iterations": iterations,
+        "seed": seed,
+        "weights": {name: weights[name] for name in names},
+    })
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> List[str]:
+    """Steps whose p95 latency or error rate got worse than `tolerance` allows."""
+    regressions = []
+    for step, new in current["steps"].items():
+        old = baseline["steps"].get(step)
+        if old is None:
+            continue
+        if old["p95_ms"] > 0 and new["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{step}: p95 {old['p95_ms']}ms -> {new['p95_ms']}ms")
+        if new["error_rate"] > old["error_rate"] + 0.01:
+            regressions.append(f"{step}: error rate {old['error_rate']} -> {new['error_rate']}")
+    return regressions
@@ -0,0 +1,84 @@
+"""
+Shopping flows replayed by the load generator.
+
+Each scenario receives a fresh, cookie-isolated virtual user and records
+every HTTP call under "<scenario>.<step>".
+"""
+import random
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+ACCOUNT_PASSWORD = "loadtest-password"
+ADMIN_EMAIL = "admin@urbanturban.com"
+ADMIN_PASSWORD = "admin123"
+
+
+class Fixtures:
+    """Data discovered or created once before the run."""
+
+    def __init__(self, slugs: List[str], variant_ids: List[int], accounts: List[str]):
+        self.slugs = slugs
+        self.variant_ids = variant_ids
+        self.accounts = accounts
+
+    def account_for(self, user) -> str:
+        # One account per virtual user (while there are enough), so two users
+        # never check out the same cart concurrently
+        return self.accounts[user.index % len(self.accounts)]
+
+
+async def browse_catalog(user, fixtures: Fixtures, rng: random.Random) -> None:
+    await user.get("list_products", "/api/products")
+
+
+async def view_product(user, fixtures: Fixtures, rng: random.Random) -> None:
+    await user.get("list_products", "/api/products")
+    await user.get("product_detail", f"/api/products/{rng.choice(fixtures.slugs)}")
+
+
+async def guest_add_to_cart(user, fixtures: Fixtures, rng: random.Random) -> None:
+    await user.get("product_detail", f"/api/products/{rng.choice(fixtures.slugs)}")
+    await user.post("add_item", "/api/cart/items", json={
+        "variantId": rng.choice(fixtures.variant_ids), "quantity": 1
+    })
+    await user.get("view_cart", "/api/cart")
+
+
+async def login_with_cart_merge(user, fixtures: Fixtures, rng: random.Random) -> None:
+    await user.post("add_item", "/api/cart/items", json={
+        "variantId": rng.choice(fixtures.variant_ids), "quantity": 1
+    })
+    await user.post("login", "/api/auth/login", json={
+        "email": fixtures.account_for(user), "password": ACCOUNT_PASSWORD
+    })
+    await user.get("view_cart", "/api/cart")
+
+
+async def checkout(user, fixtures: Fixtures, rng: random.Random) -> None:
+    await user.post("login", "/api/auth/login", json={
+        "email": fixtures.account_for(user), "password": ACCOUNT_PASSWORD
+    })
+    await user.post("add_item", "/api/cart/items", json={
+        "variantId": rng.choice(fixtures.variant_ids), "quantity": 1
+    })
+    await user.post("place_order", "/api/orders", json={"paymentProvider": "upi_mock"}, expect=201)
+    await user.get("list_orders", "/api/orders")
+
+
+async def admin_order_listing(user, fixtures: Fixtures, rng: random.Random) -> None:
+    await user.post("login", "/api/auth/login", json={
+        "email": ADMIN_EMAIL, "password": ADMIN_PASSWORD
+    })
+    await user.get("list_all_orders", "/api/orders")
+
+
+Scenario = Callable[..., Awaitable[None]]
+
+# name -> (flow, default weight)
+SCENARIOS: Dict[str, Tuple[Scenario, float]] = {
+    "browse_catalog": (browse_catalog, 40),
+    "view_product": (view_product, 25),
+    "guest_add_to_cart": (guest_add_to_cart, 15),
+    "login_with_cart_merge": (login_with_cart_merge, 8),
+    "checkout": (checkout, 8),
+    "admin_order_listing": (admin_order_listing, 4),
+}
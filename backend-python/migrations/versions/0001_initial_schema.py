@@ -0,0 +1,132 @@
+"""Initial schema matching app/models.py
+
+Databases created by the old create_all() startup already have some or all
+of these tables; only missing tables (and their indexes) are created, so
+such databases adopt the migration history without a manual stamp.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _create_table(name: str, *columns, indexes=()) -> None:
+    if sa.inspect(op.get_bind()).has_table(name):
+        return
+    op.create_table(name, *columns)
+    for index_name, index_columns, unique in indexes:
+        op.create_index(index_name, name, index_columns, unique=unique)
+
+
+def upgrade() -> None:
+    _create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("password", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("role", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        indexes=[("ix_users_id", ["id"], False), ("ix_users_email", ["email"], True)],
+    )
+    _create_table(
+        "products",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("slug", sa.String(), nullable=False),
+        sa.Column("price", sa.Numeric(10, 2), nullable=False),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("micro_story", sa.Text(), nullable=False),
+        sa.Column("images", sa.JSON(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        indexes=[("ix_products_id", ["id"], False), ("ix_products_slug", ["slug"], True)],
+    )
+    _create_table(
+        "product_variants",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id"), nullable=False),
+        sa.Column("color", sa.String(), nullable=False),
+        sa.Column("sku", sa.String(), nullable=False),
+        sa.Column("stock_quantity", sa.Integer(), nullable=False),
+        indexes=[
+            ("ix_product_variants_id", ["id"], False),
+            ("ix_product_variants_sku", ["sku"], True),
+        ],
+    )
+    _create_table(
+        "carts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        indexes=[("ix_carts_id", ["id"], False)],
+    )
+    _create_table(
+        "cart_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("cart_id", sa.Integer(), sa.ForeignKey("carts.id"), nullable=False),
+        sa.Column(
+            "product_variant_id", sa.Integer(), sa.ForeignKey("product_variants.id"), nullable=False
+        ),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        indexes=[("ix_cart_items_id", ["id"], False)],
+    )
+    _create_table(
+        "orders",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("total_amount", sa.Numeric(10, 2), nullable=False),
+        sa.Column("payment_provider", sa.String(), nullable=False),
+        sa.Column("tracking_number", sa.String(), nullable=True),
+        sa.Column("cancellation_reason", sa.String(), nullable=True),
+        sa.Column("refund_status", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        indexes=[("ix_orders_id", ["id"], False)],
+    )
+    _create_table(
+        "order_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("order_id", sa.Integer(), sa.ForeignKey("orders.id"), nullable=False),
+        sa.Column(
+            "product_variant_id", sa.Integer(), sa.ForeignKey("product_variants.id"), nullable=False
+        ),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("price_at_purchase", sa.Numeric(10, 2), nullable=False),
+        indexes=[("ix_order_items_id", ["id"], False)],
+    )
+    _create_table(
+        "payments",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("order_id", sa.Integer(), sa.ForeignKey("orders.id"), nullable=False, unique=True),
+        sa.Column("provider", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("external_id", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        indexes=[("ix_payments_id", ["id"], False)],
+    )
+    _create_table(
+        "rate_limit_buckets",
+        sa.Column("key", sa.String(), primary_key=True),
+        sa.Column("tokens", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.Float(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    for table in [
+        "rate_limit_buckets", "payments", "order_items", "orders",
+        "cart_items", "carts", "product_variants", "products", "users",
+    ]:
+        op.drop_table(table)
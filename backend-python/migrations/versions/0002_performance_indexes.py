@@ -0,0 +1,48 @@
+"""Indexes for hot foreign keys and sort orders
+
+- cart_items (cart_id, product_variant_id): get_cart_items, and the
+  add_item_to_cart / merge_carts "is this variant already in the cart" probe
+- carts (user_id, created_at): get_cart's newest-cart-for-user lookup
+- orders (user_id, created_at): get_orders history sorted newest first
+- orders (created_at): get_all_orders admin listing
+- order_items (order_id) and product_variants (product_id): eager loads
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_cart_items_cart_id_variant", "cart_items", ["cart_id", "product_variant_id"]),
+    ("ix_carts_user_id_created_at", "carts", ["user_id", "created_at"]),
+    ("ix_orders_user_id_created_at", "orders", ["user_id", "created_at"]),
+    ("ix_orders_created_at", "orders", ["created_at"]),
+    ("ix_order_items_order_id", "order_items", ["order_id"]),
+    ("ix_product_variants_product_id", "product_variants", ["product_id"]),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # Build without blocking writes on live tables
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(
+                    name, table, columns, postgresql_concurrently=True, if_not_exists=True
+                )
+        return
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
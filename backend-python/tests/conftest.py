@@ -1,46 +1,139 @@
+import os
+import shutil
+import tempfile
+
 import pytest
 from fastapi.testclient import TestClient
-from app.main import app
+
+# Settings are read when the app is imported: point the app's own engines
+# (lifespan migration, seeding, readiness) and its log files at a throwaway
+# directory, so tests never touch the checked-in urbanturban.db or logs/
+_state_dir = tempfile.mkdtemp(prefix="urbanturban-tests-")
+os.environ["SQLITE_PATH"] = os.path.join(_state_dir, "urbanturban.db")
+for _setting, _name in [
+    ("ACCESS_LOG_PATH", "access.jsonl"),
+    ("SLOW_QUERY_LOG_PATH", "slow_queries.jsonl"),
+    ("TRACING_EXPORT_PATH", "traces.jsonl"),
+    ("PROFILE_DIR", "profiles"),
+]:
+    os.environ[_setting] = os.path.join(_state_dir, "logs", _name)
+
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _remove_state_dir():
+    yield
+    shutil.rmtree(_state_dir, ignore_errors=True)
+
 
 @pytest.fixture
-def client():
-    # Setup - Use in-memory SQLite
+def client(tmp_path):
+    # Setup - Use a throwaway SQLite file shared by the sync (seeding) and
+    # async (request handling) engines
     from sqlalchemy import create_engine
     from sqlalchemy.orm import sessionmaker
-    from app.database import Base, get_db
-    
-    from sqlalchemy.pool import StaticPool
-    
-    SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
-    
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, 
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool
-    )
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from sqlalchemy.pool import NullPool
+    from app.database import AsyncSessionLocal, Base, get_db
+    from app.core.cache import get_query_cache
+    from app.core.profiler import profiler
+
+    db_file = tmp_path / "test.db"
+    SQLALCHEMY_DATABASE_URL = f"sqlite:///{db_file}"
+
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    
+
     Base.metadata.create_all(bind=engine)
-    
-    def override_get_db():
-        try:
-            db = TestingSessionLocal()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_file}", poolclass=NullPool)
+    AsyncTestingSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
+    async def override_get_db():
+        async with AsyncTestingSessionLocal() as db:
             yield db
-        finally:
-            db.close()
-            
+
     app.dependency_overrides[get_db] = override_get_db
-    
+    profiler.session_factory = AsyncTestingSessionLocal
+
+    # Every test starts from a fresh database whose ids repeat
+    cache = get_query_cache()
+    if cache is not None:
+        cache.clear()
+
     # Seed data if needed
     db = TestingSessionLocal()
     from app.storage import Storage
     storage = Storage(db)
     storage.seed_products()
     db.close()
-    
+
     with TestClient(app) as test_client:
         yield test_client
-    
+
     # Teardown
     app.dependency_overrides.clear()
+    profiler.session_factory = AsyncSessionLocal
+    engine.dispose()
+
+
+@pytest.fixture
+def admin_client(client, tmp_path):
+    """`client`, logged in as a newly registered admin."""
+    import uuid
+    from sqlalchemy import create_engine, text
+    from app.core.cache import get_query_cache
+
+    email = f"admin_{uuid.uuid4()}@example.com"
+    client.post("/api/auth/register", json={"email": email, "password": "password", "name": "Ops"})
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE users SET role = 'admin' WHERE email = :email"), {"email": email})
+    engine.dispose()
+    # The user was cached as a customer when they registered
+    get_query_cache().clear()
+    return client
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Fail the test when the enclosed requests issue more SQL statements than
+    the declared budget:
+
+        with query_budget(3):
+            client.get("/api/products")
+    """
+    from collections import Counter
+    from contextlib import contextmanager
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    @contextmanager
+    def budget(max_queries: int):
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(Engine, "after_cursor_execute", count)
+        try:
+            yield statements
+        finally:
+            event.remove(Engine, "after_cursor_execute", count)
+
+        if len(statements) > max_queries:
+            repeated = "\n".join(
+                f"  {n}x {' '.join(s.split())[:160]}"
+                for s, n in Counter(statements).most_common(3)
+            )
+            pytest.fail(
+                f"{len(statements)} SQL statements issued, budget is {max_queries}. "
+                f"Most repeated:\n{repeated}",
+                pytrace=False
+            )
 
+    return budget
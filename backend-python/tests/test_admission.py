@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from app.core.admission import AdmissionController, AdmissionRejected, RouteClass
+
+
+def make_controller(capacity=1, queue_timeout=1.0, max_queue=10):
+    return AdmissionController(
+        capacity=capacity,
+        classes=[
+            RouteClass("checkout", capacity, 0, max_queue),
+            RouteClass("catalog", capacity, 3, max_queue),
+        ],
+        queue_timeout=queue_timeout,
+    )
+
+
+def test_checkout_is_served_before_queued_catalog():
+    async def scenario():
+        controller = make_controller(capacity=1)
+        await controller.acquire("catalog")
+        order = []
+
+        async def worker(name):
+            await controller.acquire(name)
+            order.append(name)
+            controller.release(name)
+
+        tasks = [asyncio.create_task(worker("catalog")), asyncio.create_task(worker("checkout"))]
+        await asyncio.sleep(0)
+        assert controller.stats()["queue_depth"] == 2
+
+        controller.release("catalog")
+        await asyncio.gather(*tasks)
+        return order, controller.stats()
+
+    order, stats = asyncio.run(scenario())
+    assert order == ["checkout", "catalog"]
+    assert stats["in_flight"] == 0
+    assert stats["classes"]["checkout"]["admitted"] == 1
+
+
+def test_queue_timeout_and_full_queue_are_rejected():
+    async def scenario():
+        controller = make_controller(capacity=1, queue_timeout=0.01, max_queue=1)
+        await controller.acquire("catalog")
+
+        with pytest.raises(AdmissionRejected) as exc:
+            await controller.acquire("catalog")
+        assert exc.value.reason == "queue timeout"
+
+        waiter = asyncio.create_task(controller.acquire("catalog"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as exc:
+            await controller.acquire("catalog")
+        assert exc.value.reason == "queue full"
+        with pytest.raises(AdmissionRejected):
+            await waiter
+        return controller.stats()
+
+    stats = asyncio.run(scenario())
+    catalog = stats["classes"]["catalog"]
+    assert catalog["timed_out"] == 2
+    assert catalog["rejected"] == 3
+    assert catalog["queue_depth"] == 0
+    assert stats["in_flight"] == 1
+
+
+def test_shed_request_returns_503(client, monkeypatch):
+    from app.core import admission
+
+    controller = make_controller(capacity=1, queue_timeout=0.01)
+    controller.in_flight = 1
+    monkeypatch.setattr(admission, "_controller", controller)
+    response = client.get("/api/products")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
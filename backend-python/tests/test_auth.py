@@ -54,3 +54,47 @@ def test_auth_flow(client):
     # Verify we are logged out
     response = client.get("/api/auth/me")
     assert response.json() is None
+
+
+def test_login_throttled_before_password_check(client, monkeypatch):
+    from app.core import rate_limit, security
+    throttle = rate_limit.get_login_throttle()
+    throttle.reset()
+
+    calls = []
+    real_verify = security.verify_password
+    monkeypatch.setattr(security, "verify_password", lambda *a: calls.append(a) or real_verify(*a))
+
+    login_data = {"email": "nobody@example.com", "password": "wrong"}
+    for _ in range(throttle.email_burst):
+        response = client.post("/api/auth/login", json=login_data)
+        assert response.status_code == 401
+
+    calls.clear()
+    response = client.post("/api/auth/login", json=login_data)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert calls == []
+
+    # Another email from the same IP still has budget
+    response = client.post("/api/auth/login", json={"email": "other@example.com", "password": "x"})
+    assert response.status_code == 401
+    throttle.reset()
+
+
+def test_internal_endpoints_are_admin_only(client):
+    import uuid
+    endpoints = [
+        (method, route.path.replace("{name}", "x.prof"))
+        for route in app.routes if route.path.startswith("/internal/")
+        for method in route.methods
+    ]
+    assert len(endpoints) == 12
+    for method, path in endpoints:
+        assert client.request(method, path).status_code == 401, path
+
+    client.post("/api/auth/register", json={
+        "email": f"customer_{uuid.uuid4()}@example.com", "password": "password", "name": "Customer"
+    })
+    for method, path in endpoints:
+        assert client.request(method, path).status_code == 403, path
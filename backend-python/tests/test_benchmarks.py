@@ -0,0 +1,30 @@
+from sqlalchemy import create_engine
+
+from benchmarks.cases import CASES
+from app.core.datagen import table_counts
+from benchmarks.datasets import build_dataset, dataset_matches
+from benchmarks.runner import find_regressions, run_cases
+
+
+def test_every_storage_method_benchmarks_without_changing_the_dataset(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bench.db'}")
+    counts = build_dataset(engine, 500)
+    assert dataset_matches(engine, 500)
+
+    results = run_cases(engine, CASES, min_rounds=1, min_time=0, warmup_rounds=0)
+    assert set(results) == {case.name for case in CASES}
+    assert all(r["median_ms"] > 0 for r in results.values())
+    # Write methods are rolled back each round
+    assert table_counts(engine) == counts
+    engine.dispose()
+
+
+def test_regressions_need_median_and_best_round_slower():
+    def report(median, best):
+        return {"results": {"1k": {"get_cart_items": {"median_ms": median, "min_ms": best}}}}
+
+    baseline = report(1.0, 0.8)
+    assert find_regressions(baseline, report(1.2, 0.9), 0.25) == []
+    assert find_regressions(baseline, report(2.0, 0.9), 0.25) == []
+    assert len(find_regressions(baseline, report(2.0, 1.6), 0.25)) == 1
+
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import uuid
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.exc import DetachedInstanceError
+
+from app.core.cache import MemoryLRUBackend, QueryCache, decode, encode, get_query_cache
+from app.core.startup import init_database
+from app.models import Product, User
+
+
+def test_memory_backend_evicts_and_invalidates_by_tag():
+    backend = MemoryLRUBackend(max_entries=2)
+    backend.set("a", b"1", 60, ["catalog"])
+    backend.set("b", b"2", 60, ["order:1"])
+    backend.get("a")
+    backend.set("c", b"3", 60, ["order:1"])
+    # "b" was least recently used
+    assert backend.get("b") is None
+    assert backend.get("a") == b"1"
+
+    backend.invalidate_tags(["order:1"])
+    assert backend.get("c") is None
+    assert backend.get("a") == b"1"
+
+    backend.set("d", b"4", -1, [])
+    assert backend.get("d") is None
+
+
+def test_query_cache_counts_hits_per_method():
+    cache = QueryCache(MemoryLRUBackend())
+    key = cache.make_key("get_user", (1,), {})
+    assert cache.get("get_user", key) == (False, None)
+    cache.set("get_user", key, {"id": 1}, 60, ["user:1"])
+    assert cache.get("get_user", key) == (True, {"id": 1})
+    assert cache.stats()["get_user"] == {"hits": 1, "misses": 1, "sets": 1, "hit_ratio": 0.5}
+
+
+def test_cached_values_are_json_and_rebuild_detached_models(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'codec.db'}")
+    init_database(engine)
+    with Session(engine) as db:
+        products = db.scalars(select(Product).options(selectinload(Product.variants))).all()
+        user = db.scalar(select(User))
+        payload = encode([products, user, {"identity": b"\x00{}"}, products[0].variants[0]])
+    engine.dispose()
+
+    assert b"password" not in payload
+    (product,), cached_user, variants, variant = decode(payload)
+    assert isinstance(product.price, Decimal) and product.price == products[0].price
+    assert product.created_at == products[0].created_at
+    # Objects reached twice decode to one copy
+    assert variant is product.variants[0]
+    assert cached_user.email == user.email
+    with pytest.raises(DetachedInstanceError):
+        cached_user.password
+    assert variants == {"identity": b"\x00{}"}
+
+
+def test_cache_payloads_only_build_mapped_models():
+    with pytest.raises(ValueError):
+        decode(b'{"@": "model", "class": "Popen", "ref": 0, "v": {}}')
+    cache = QueryCache(MemoryLRUBackend())
+    cache.backend.set("k", b"\x80\x04K\x01.", 60, [])  # a pickle
+    assert cache.get("get_user", "k") == (False, None)
+    # Values the codec cannot represent are simply not cached
+    cache.set("get_user", "k2", object(), 60, [])
+    assert cache.get("get_user", "k2") == (False, None)
+
+
+def test_blocking_backend_is_called_off_the_event_loop():
+    class RecordingBackend(MemoryLRUBackend):
+        blocking = True
+
+        def __init__(self):
+            super().__init__()
+            self.threads = set()
+
+        def get(self, key):
+            self.threads.add(threading.get_ident())
+            return super().get(key)
+
+        def set(self, key, value, ttl, tags):
+            self.threads.add(threading.get_ident())
+            super().set(key, value, ttl, tags)
+
+        def invalidate_tags(self, tags):
+            self.threads.add(threading.get_ident())
+            super().invalidate_tags(tags)
+
+    cache = QueryCache(RecordingBackend())
+
+    async def scenario():
+        await cache.aset("get_user", "k", {"id": 1}, 60, ["user:1"])
+        hit = await cache.aget("get_user", "k")
+        await cache.ainvalidate(["user:1"])
+        return hit, await cache.aget("get_user", "k")
+
+    assert asyncio.run(scenario()) == ((True, {"id": 1}), (False, None))
+    assert cache.backend.threads and threading.get_ident() not in cache.backend.threads
+    assert cache.stats()["get_user"]["sets"] == 1
+
+
+def test_order_reads_are_cached_and_invalidated(client, query_budget):
+    client.post("/api/auth/register", json={
+        "email": f"cache_{uuid.uuid4()}@example.com",
+        "password": "password",
+        "name": "Cache Tester"
+    })
+    variant_id = client.get("/api/products").json()[0]["variants"][0]["id"]
+    client.post("/api/cart/items", json={"variantId": variant_id, "quantity": 1})
+    order = client.post("/api/orders", json={"paymentProvider": "upi_mock"}).json()
+
+    client.get(f"/api/orders/{order['id']}")
+    # Catalog and the session user come from the cache now
+    with query_budget(0):
+        client.get("/api/products")
+    with query_budget(0):
+        response = client.get(f"/api/orders/{order['id']}")
+    assert response.json()["status"] == "paid"
+
+    client.post(f"/api/orders/{order['id']}/cancel", json={"reason": "Changed mind"})
+    assert client.get(f"/api/orders/{order['id']}").json()["status"] == "cancelled"
+    assert client.get("/api/orders").json()[0]["status"] == "cancelled"
+
+    stats = get_query_cache().stats()
+    assert stats["get_order"]["hits"] >= 1
+    assert stats["get_user"]["hits"] >= 1
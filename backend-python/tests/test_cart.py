@@ -1,3 +1,6 @@
+from sqlalchemy import create_engine, text
+
+
 def test_cart_operations(client):
     # 1. Get initial cart (should be empty session cart)
     # Note: SessionMiddleware depends on cookies. TestClient handles this.
@@ -32,3 +35,24 @@ def test_cart_operations(client):
     assert response.status_code == 200
     cart = response.json()
     assert len(cart["items"]) == 0
+
+
+def test_stock_check_reads_current_stock(client, tmp_path):
+    variant_id = client.get("/api/products").json()[0]["variants"][0]["id"]
+    assert client.post("/api/cart/items", json={"variantId": variant_id, "quantity": 1}).status_code == 200
+
+    # Sold out by a write the catalog cache never hears about
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    with engine.begin() as conn:
+        stock = conn.scalar(text("SELECT stock_quantity FROM product_variants WHERE id = :id"), {"id": variant_id})
+        conn.execute(text("UPDATE product_variants SET stock_quantity = 0 WHERE id = :id"), {"id": variant_id})
+    try:
+        response = client.post("/api/cart/items", json={"variantId": variant_id, "quantity": 1})
+        assert response.status_code == 400
+    finally:
+        with engine.begin() as conn:
+            conn.execute(
+                text("UPDATE product_variants SET stock_quantity = :stock WHERE id = :id"),
+                {"stock": stock, "id": variant_id},
+            )
+        engine.dispose()
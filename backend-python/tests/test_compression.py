@@ -0,0 +1,70 @@
+import gzip
+
+from sqlalchemy import create_engine, text
+
+from app.core import compression
+from app.core.cache import get_query_cache
+from app.core.compression import accepted_encoding
+
+
+def _add_products(tmp_path, count):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    with engine.begin() as conn:
+        for i in range(count):
+            conn.execute(text(
+                "INSERT INTO products (name, slug, price, description, micro_story, images, is_active) "
+                "VALUES (:name, :slug, 999, 'Cotton twill cap.', 'Made for the city.', '[]', 1)"
+            ), {"name": f"Cap {i}", "slug": f"cap-{i}"})
+    engine.dispose()
+    get_query_cache().clear()
+
+
+def test_accept_encoding_negotiation(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert accepted_encoding("gzip, deflate, br") == "gzip"
+    assert accepted_encoding("gzip;q=0, deflate") is None
+    assert accepted_encoding("*") == "gzip"
+    assert accepted_encoding("") is None
+    monkeypatch.setattr(compression, "brotli", object())
+    assert accepted_encoding("gzip, br") == "br"
+    assert accepted_encoding("gzip;q=1.0, br;q=0.5") == "gzip"
+
+
+def test_catalog_is_compressed_once_per_version(client, tmp_path):
+    _add_products(tmp_path, 20)
+    plain = client.get("/api/products", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    response = client.get("/api/products", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.content == plain.content  # httpx decodes it
+    assert int(response.headers["content-length"]) < len(plain.content) / 3
+
+    # Rendered once; the gzip request read only its own entry
+    encodings = 3 if compression.brotli is not None else 2
+    stats = get_query_cache().stats()["catalog_response"]
+    assert stats["misses"] == 1 and stats["sets"] == encodings and stats["hits"] == 1
+    hit, entry = get_query_cache().get("catalog_response", "response:products:gzip")
+    assert hit and entry[0] == "gzip" and gzip.decompress(entry[1]) == plain.content
+
+    # A catalog write drops the encoded payloads with the rest of the catalog
+    get_query_cache().invalidate(["catalog"])
+    client.get("/api/products", headers={"Accept-Encoding": "gzip"})
+    assert get_query_cache().stats()["catalog_response"]["sets"] == 2 * encodings
+
+
+def test_missing_product_is_not_cached(client):
+    assert client.get("/api/products/no-such-cap").status_code == 404
+    assert client.get("/api/products/no-such-cap").status_code == 404
+    assert get_query_cache().stats()["catalog_response"]["sets"] == 0
+
+
+def test_middleware_compresses_large_responses_only(client):
+    response = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    raw = client.get("/openapi.json", headers={"Accept-Encoding": "identity"}).content
+    assert response.content == raw
+
+    small = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
@@ -0,0 +1,49 @@
+from decimal import Decimal
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app.core.datagen import GENERATED_PASSWORD, Volumes, generate, table_counts
+from app.core.security import verify_password
+from app.models import Order, OrderItem, Payment, User
+
+
+def _dump(engine):
+    with Session(engine) as db:
+        orders = db.execute(select(Order.id, Order.user_id, Order.status, Order.total_amount).order_by(Order.id)).all()
+        users = db.execute(select(User.email, User.password).order_by(User.id)).all()
+    return orders, users
+
+
+def test_generate_is_deterministic_per_seed(tmp_path):
+    volumes = Volumes(users=40, products=8, orders=120, carts=10)
+    engines = [create_engine(f"sqlite:///{tmp_path / f'{name}.db'}") for name in ("a", "b", "c")]
+    counts = [generate(engine, volumes, seed=seed) for engine, seed in zip(engines, (7, 7, 8))]
+
+    assert counts[0] == table_counts(engines[0])
+    assert {k: counts[0][k] for k in Volumes._fields} == volumes._asdict()
+    assert _dump(engines[0]) == _dump(engines[1])
+    assert _dump(engines[0]) != _dump(engines[2])
+    for engine in engines:
+        engine.dispose()
+
+
+def test_generated_orders_are_consistent(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'gen.db'}")
+    generate(engine, Volumes(users=30, products=6, orders=80, carts=5))
+    with Session(engine) as db:
+        item_totals = dict(db.execute(
+            select(OrderItem.order_id, func.sum(OrderItem.price_at_purchase * OrderItem.quantity))
+            .group_by(OrderItem.order_id)
+        ).all())
+        for order in db.scalars(select(Order)):
+            assert Decimal(str(item_totals[order.id])) == order.total_amount
+        # As at checkout: one payment per order except cash on delivery
+        payments = db.execute(select(Order.payment_provider, Payment.status).join(Payment.order)).all()
+        cod_orders = db.scalar(select(func.count()).select_from(Order).where(Order.payment_provider == "cod"))
+        assert len(payments) == 80 - cod_orders
+        assert "cod" not in {provider for provider, status in payments}
+        assert {status for provider, status in payments} == {"success"}
+        admin = db.scalar(select(User).where(User.role == "admin"))
+        assert verify_password(GENERATED_PASSWORD, admin.password)
+    engine.dispose()
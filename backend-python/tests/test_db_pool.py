@@ -0,0 +1,36 @@
+from sqlalchemy import create_engine, text
+
+from app.core.db_pool import InstrumentedQueuePool, attach_pool_listeners, pool_status
+
+
+def test_instrumented_pool_reports_checkouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name="test-pool",
+        pool_size=1,
+        max_overflow=1,
+    )
+    attach_pool_listeners(engine)
+
+    with engine.connect() as first, engine.connect() as second:
+        first.execute(text("SELECT 1"))
+        second.execute(text("SELECT 1"))
+        status = pool_status(engine.pool)
+        assert status["in_use"] == 2
+        assert status["overflow"] == 1
+
+    status = pool_status(engine.pool)
+    assert status["in_use"] == 0
+    assert status["checkouts"] >= 2
+    assert status["connects"] == 2
+    assert status["peak_in_use"] == 2
+    engine.dispose()
+
+
+def test_pool_endpoint(admin_client):
+    response = admin_client.get("/internal/db/pool")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["sync"]["class"] == "InstrumentedQueuePool"
+    assert "wait_seconds_max" in data["async"]
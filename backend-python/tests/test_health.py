@@ -0,0 +1,74 @@
+import asyncio
+
+from app.core import health as health_module
+from app.core.health import DrainMiddleware, Health, health
+
+
+def test_readiness_checks_are_cached(client, monkeypatch):
+    assert client.get("/health/live").json() == {"status": "healthy"}
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json()["checks"] == {"database": "ok", "pool": "ok", "cache": "ok"}
+
+    pings = []
+
+    async def failing_ping():
+        pings.append(1)
+        raise ConnectionError("database is down")
+
+    monkeypatch.setattr(health, "_ping", failing_ping)
+    # Served from the cached result
+    assert client.get("/health/ready").status_code == 200
+    assert pings == []
+
+    monkeypatch.setattr(health, "cache_seconds", 0)
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["database"] == "error: ConnectionError"
+    assert pings == [1]
+
+
+def test_readiness_fails_without_pool_headroom(client, monkeypatch):
+    monkeypatch.setattr(health, "cache_seconds", 0)
+    monkeypatch.setattr(health_module, "pool_status", lambda pool: {
+        "size": 5, "max_overflow": 10, "in_use": 15,
+    })
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["pool"] == "exhausted: 15 connections in use"
+
+
+def test_draining_refuses_new_requests(client):
+    health.begin_drain()
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json() == {"ready": False, "status": "draining"}
+
+    response = client.get("/api/products")
+    assert response.status_code == 503
+    assert response.headers["connection"] == "close"
+    assert response.headers["retry-after"] == "1"
+    assert client.get("/health/live").status_code == 200
+
+
+def test_drain_waits_for_requests_in_flight(monkeypatch):
+    monkeypatch.setattr(health_module, "health", Health())
+
+    async def checkout(scope, receive, send):
+        await asyncio.sleep(0.2)
+
+    middleware = DrainMiddleware(checkout)
+    scope = {"type": "http", "method": "POST", "path": "/api/orders"}
+
+    async def scenario(timeout):
+        health_module.health.draining = False
+        request = asyncio.create_task(middleware(scope, None, None))
+        await asyncio.sleep(0)
+        remaining = await health_module.health.drain(timeout)
+        await request
+        return remaining
+
+    async def both():
+        return await scenario(0.01), await scenario(2.0)
+
+    assert asyncio.run(both()) == (["POST unmatched"], [])
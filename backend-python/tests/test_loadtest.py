@@ -0,0 +1,57 @@
+import asyncio
+
+import httpx
+
+from app.config import Settings
+from app.main import app
+from loadtest.__main__ import _configure_in_process
+from loadtest.runner import compare, percentile, run_load
+from loadtest.scenarios import SCENARIOS
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 95) == 0.0
+
+
+def test_shopping_scenarios_run_in_process(client):
+    transport = httpx.ASGITransport(app=app)
+
+    def make_client():
+        return httpx.AsyncClient(transport=transport, base_url="http://loadtest")
+
+    # The test database has no admin account
+    weights = {name: 1 for name in SCENARIOS if name != "admin_order_listing"}
+    report = asyncio.run(run_load(
+        make_client, users=2, duration=None, iterations=10, weights=weights, seed=7, accounts=2
+    ))
+
+    assert report["total"]["requests"] > 0
+    assert report["total"]["errors"] == 0
+    assert set(report["scenarios"]) == set(weights)
+    place_order = report["steps"]["checkout.place_order"]
+    assert place_order["statuses"] == {"201": place_order["requests"]}
+    assert place_order["p50_ms"] <= place_order["p95_ms"] <= place_order["p99_ms"]
+
+    slower = {**report, "steps": {
+        step: {**stats, "p95_ms": stats["p95_ms"] * 2 + 1} for step, stats in report["steps"].items()
+    }}
+    assert compare(report, report, 0.1) == []
+    assert len(compare(report, slower, 0.1)) == len(report["steps"])
+
+
+def test_in_process_runs_use_the_sqlite_profile(tmp_path, monkeypatch):
+    for name in ("DATABASE_URL", "SQLITE_PATH", "DB_AUTO_MIGRATE", "SEED_ON_STARTUP", "LOGIN_THROTTLE_ENABLED"):
+        # Recorded even when unset, so teardown removes what the run sets
+        monkeypatch.setenv(name, "")
+        monkeypatch.delenv(name)
+
+    _configure_in_process(f"sqlite:///{tmp_path / 'load.db'}")
+    settings = Settings()
+    assert not settings.DATABASE_URL and settings.SQLITE_PRODUCTION_PROFILE
+    assert settings.SQLITE_PATH == str(tmp_path / "load.db")
+
+    _configure_in_process("postgresql://localhost/loadtest")
+    assert Settings().DATABASE_URL == "postgresql://localhost/loadtest"
@@ -0,0 +1,89 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+
+from app.core import logs
+from app.core.logs import AccessLog, BatchRotatingFileHandler, JsonFormatter, LogSink, file_sink
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_access_log_samples_2xx_on_hot_routes(tmp_path):
+    access = AccessLog(["/api/products"], sample_rate=0.0, slow_ms=500)
+    access.open(file_sink(str(tmp_path / "access.jsonl"), 1_000_000, 1))
+    assert not access.log("GET", "/api/products", "/api/products", 200, 3.0)
+    assert access.log("GET", "/api/products/x", "/api/products/{slug}", 404, 3.0)
+    assert access.log("GET", "/api/products", "/api/products", 200, 900.0)
+    assert access.log("GET", "/api/cart", "/api/cart", 200, 3.0, db_queries=2)
+    access.close()
+
+    lines = _lines(tmp_path / "access.jsonl")
+    assert [(line["path"], line["status"]) for line in lines] == [
+        ("/api/products/x", 404), ("/api/products", 200), ("/api/cart", 200)
+    ]
+    assert lines[2]["db_queries"] == 2 and lines[2]["sample_rate"] == 1.0
+    assert lines[0]["logger"] == "app.access" and lines[0]["ts"].endswith("+00:00")
+
+
+def test_full_queue_drops_instead_of_blocking():
+    sink = LogSink(logging.NullHandler(), max_queue=2)  # never started, so nothing drains
+    logger = logging.getLogger("test.logs.dropping")
+    logger.propagate = False
+    logger.addHandler(sink.handler)
+    try:
+        for i in range(5):
+            logger.warning(f"record {i}")
+    finally:
+        logger.removeHandler(sink.handler)
+    assert sink.handler.dropped == 3
+
+
+def test_file_sink_rotates_by_size(tmp_path):
+    target = BatchRotatingFileHandler(str(tmp_path / "app.jsonl"), maxBytes=2_000, backupCount=2)
+    target.setFormatter(JsonFormatter())
+    sink = LogSink(target, batch_size=10).start()
+    logger = logging.getLogger("test.logs.rotation")
+    logger.propagate = False
+    logger.addHandler(sink.handler)
+    try:
+        for i in range(200):
+            logger.warning(f"record {i}")
+    finally:
+        logger.removeHandler(sink.handler)
+        sink.stop()
+    assert (tmp_path / "app.jsonl.1").exists()
+    assert not (tmp_path / "app.jsonl.3").exists()
+    assert _lines(tmp_path / "app.jsonl")[-1]["message"] == "record 199"
+
+
+def test_requests_are_access_logged(client, tmp_path):
+    logs.access_log.open(file_sink(str(tmp_path / "access.jsonl"), 1_000_000, 1))
+    client.get("/api/cart")
+    client.get("/api/orders")
+    logs.access_log.close()
+
+    by_route = {line["route"]: line for line in _lines(tmp_path / "access.jsonl")}
+    assert by_route["/api/cart"]["status"] == 200
+    assert by_route["/api/cart"]["db_queries"] >= 1
+    assert by_route["/api/orders"]["status"] == 401
+
+
+def test_worker_log_files_are_named_by_pid(monkeypatch):
+    assert logs.worker_path("logs/access.jsonl") == "logs/access.jsonl"
+    monkeypatch.setattr(logs.settings, "LOG_FILES_PER_WORKER", True)
+    assert logs.worker_path("logs/access.jsonl") == f"logs/access.{os.getpid()}.jsonl"
+    # Empty means stdout
+    assert logs.worker_path("") == ""
+
+
+def test_importing_the_app_leaves_logging_alone():
+    script = "import logging, app.main; print(len(logging.getLogger().handlers))"
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    assert result.stdout.strip() == "0"
@@ -0,0 +1,75 @@
+import json
+import os
+import time
+
+from app.core import metrics
+
+
+def _sample(payload: str, prefix: str) -> float:
+    for line in payload.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"no sample {prefix!r} in:\n{payload}")
+
+
+def test_metrics_endpoint_exposes_route_histograms(client):
+    slug = client.get("/api/products").json()[0]["slug"]
+    client.get(f"/api/products/{slug}")
+    client.get(f"/api/products/{slug}")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    payload = response.text
+
+    labels = 'method="GET",route="/api/products/{slug}",status="200"'
+    assert _sample(payload, f"http_requests_total{{{labels}}}") >= 2
+    assert _sample(payload, f'http_request_duration_seconds_bucket{{le="+Inf",{labels}}}') >= 2
+    assert _sample(payload, 'db_queries_total{route="/api/products/{slug}"}') >= 1
+    assert _sample(payload, 'cache_hit_ratio{method="catalog_response"}') > 0
+    assert "# TYPE event_loop_lag_seconds gauge" in payload
+
+
+def test_worker_snapshots_merge(tmp_path):
+    metrics.request_metrics.observe("GET", "/health", 200, 0.002)
+    metrics.write_worker_snapshot(str(tmp_path))
+    own = tmp_path / f"metrics-{os.getpid()}.json"
+    families = json.loads(own.read_text())
+    # A second worker that exited a while ago
+    exited = tmp_path / "metrics-1.json"
+    exited.write_text(json.dumps(families))
+    os.utime(exited, (time.time() - 3600, time.time() - 3600))
+
+    single = metrics.merge([(metrics.collect_process(), True)])
+    merged = metrics.merge(metrics.read_worker_snapshots(str(tmp_path), time.time() - 15))
+
+    # Counters keep the exited worker's totals, live gauges drop them
+    requests = single["http_requests_total"].samples
+    for key, value in requests.items():
+        assert merged["http_requests_total"].samples[key] == 2 * value
+    assert merged["http_requests_in_flight"].samples == single["http_requests_in_flight"].samples
+
+
+def test_exited_workers_are_folded_into_one_file(tmp_path):
+    metrics.request_metrics.observe("GET", "/health", 200, 0.002)
+    metrics.write_worker_snapshot(str(tmp_path))
+    own = json.loads((tmp_path / f"metrics-{os.getpid()}.json").read_text())
+    for pid in (101, 102):
+        (tmp_path / f"metrics-{pid}.json").write_text(json.dumps(own))
+    before = metrics.merge(metrics.read_worker_snapshots(str(tmp_path), 0))
+
+    metrics.retire_worker_snapshot(str(tmp_path), 101)
+    metrics.retire_worker_snapshot(str(tmp_path), 102)
+    # Already gone, e.g. a worker killed before its first snapshot
+    metrics.retire_worker_snapshot(str(tmp_path), 103)
+
+    assert {p.name for p in tmp_path.iterdir()} == {metrics.EXITED_FILE, f"metrics-{os.getpid()}.json"}
+    after = metrics.merge(metrics.read_worker_snapshots(str(tmp_path), 0))
+    assert after["http_requests_total"].samples == before["http_requests_total"].samples
+    # Exited workers' live gauges are dropped
+    assert after["http_requests_in_flight"].samples == metrics.merge(
+        [(metrics.collect_process(), True)]
+    )["http_requests_in_flight"].samples
+
+    metrics.clear_worker_snapshots(str(tmp_path))
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,32 @@
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine
+
+import pytest
+
+from app.core.schema import SchemaOutOfDate, head_revision, upgrade_to_head, verify_schema
+from app.database import Base
+
+
+def test_migrations_match_models(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    upgrade_to_head(engine)
+
+    with engine.connect() as connection:
+        context = MigrationContext.configure(connection)
+        assert context.get_current_revision() == head_revision()
+        diff = compare_metadata(context, Base.metadata)
+    assert diff == []
+    engine.dispose()
+
+
+def test_verify_schema_refuses_stale_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    # A database created by the old create_all() startup
+    Base.metadata.create_all(bind=engine)
+
+    with pytest.raises(SchemaOutOfDate):
+        verify_schema(engine, auto_migrate=False)
+    assert verify_schema(engine, auto_migrate=True) == head_revision()
+    engine.dispose()
+
@@ -48,3 +48,23 @@ def test_create_order_empty_cart(client):
     order_data = {"paymentProvider": "cod"}
     response = client.post("/api/orders", json=order_data)
     assert response.status_code == 400
+
+def test_cancel_order(client):
+    email = f"cancel_{uuid.uuid4()}@example.com"
+    client.post("/api/auth/register", json={
+        "email": email,
+        "password": "password",
+        "name": "Cancel Tester"
+    })
+    products = client.get("/api/products").json()
+    variant_id = products[0]["variants"][0]["id"]
+    client.post("/api/cart/items", json={"variantId": variant_id, "quantity": 1})
+    order = client.post("/api/orders", json={"paymentProvider": "upi_mock"}).json()
+    assert order["status"] == "paid"
+
+    response = client.post(f"/api/orders/{order['id']}/cancel", json={"reason": "Changed mind"})
+    assert response.status_code == 200
+    cancelled = response.json()
+    assert cancelled["status"] == "cancelled"
+    assert cancelled["refund_status"] == "processing"
+    assert len(cancelled["items"]) == 1
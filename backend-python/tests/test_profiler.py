@@ -0,0 +1,51 @@
+import pstats
+import uuid
+
+from app.core.profiler import profiler
+
+
+def test_profile_header_requires_admin(client):
+    client.post("/api/auth/register", json={
+        "email": f"customer_{uuid.uuid4()}@example.com", "password": "password", "name": "Customer"
+    })
+    response = client.get("/api/products", headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert client.get("/internal/profiles").status_code == 403
+
+
+def test_admin_profiles_are_stored_and_downloadable(admin_client, tmp_path, monkeypatch):
+    client = admin_client
+    monkeypatch.setattr(profiler, "directory", str(tmp_path / "profiles"))
+
+    response = client.get("/api/products", headers={"X-Profile": "cprofile"})
+    assert response.status_code == 200
+    cprofile_name = response.headers["X-Profile-Id"]
+
+    response = client.get("/api/products", headers={"X-Profile": "sampler"})
+    sampler_name = response.headers["X-Profile-Id"]
+
+    listed = {p["name"]: p["format"] for p in client.get("/internal/profiles").json()}
+    assert listed == {cprofile_name: "pstats", sampler_name: "speedscope"}
+
+    download = client.get(f"/internal/profiles/{cprofile_name}")
+    path = tmp_path / "download.prof"
+    path.write_bytes(download.content)
+    assert pstats.Stats(str(path)).total_calls > 0
+
+    speedscope = client.get(f"/internal/profiles/{sampler_name}").json()
+    assert speedscope["profiles"][0]["type"] == "sampled"
+    assert client.get("/internal/profiles/..%2Fconfig.py").status_code == 404
+
+
+def test_sampling_toggle(admin_client, tmp_path, monkeypatch):
+    client = admin_client
+    monkeypatch.setattr(profiler, "directory", str(tmp_path / "profiles"))
+
+    response = client.put("/internal/profiler", json={"rate": 1.0, "path_prefix": "/api/cart"})
+    assert response.json()["sampling_rate"] == 1.0
+    try:
+        assert "X-Profile-Id" not in client.get("/api/products").headers
+        assert "X-Profile-Id" in client.get("/api/cart").headers
+    finally:
+        client.put("/internal/profiler", json={"rate": 0})
@@ -0,0 +1,51 @@
+from app.config import settings
+from app.core.proxies import client_address
+
+
+def _scope(peer, *forwarded_for):
+    return {
+        "client": (peer, 51000) if peer else None,
+        "headers": [(b"x-forwarded-for", value.encode()) for value in forwarded_for],
+    }
+
+
+def test_forwarded_for_ignored_without_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", "")
+    assert client_address(_scope("203.0.113.7", "198.51.100.1")) == "203.0.113.7"
+    assert client_address(_scope(None)) is None
+
+
+def test_forwarded_for_read_from_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", "10.0.0.0/8, 192.0.2.10")
+    # Direct connections and untrusted peers keep their own address
+    assert client_address(_scope("203.0.113.7", "198.51.100.1")) == "203.0.113.7"
+    # The client's own entry on the left is forged; the proxies' are not
+    assert client_address(_scope("10.0.0.5", "1.2.3.4, 198.51.100.1")) == "198.51.100.1"
+    assert client_address(_scope("10.0.0.5", "1.2.3.4, 198.51.100.1", "192.0.2.10")) == "198.51.100.1"
+    # Only trusted hops, or no header at all
+    assert client_address(_scope("10.0.0.5", "10.1.1.1")) == "10.1.1.1"
+    assert client_address(_scope("10.0.0.5")) == "10.0.0.5"
+
+
+def test_login_throttle_buckets_by_forwarded_client(client, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.core import rate_limit
+    from app.main import app
+
+    async def behind_proxy(scope, receive, send):
+        scope["client"] = ("10.0.0.5", 51000)
+        await app(scope, receive, send)
+
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", "10.0.0.0/8")
+    throttle = rate_limit.get_login_throttle()
+    seen = []
+    monkeypatch.setattr(throttle, "check", lambda ip, email: seen.append(ip) or 0.0)
+    # The session's client already ran the lifespan
+    proxied = TestClient(behind_proxy)
+    for address in ("198.51.100.1", "198.51.100.2"):
+        proxied.post(
+            "/api/auth/login", json={"email": "nobody@example.com", "password": "x"},
+            headers={"X-Forwarded-For": address},
+        )
+    assert seen == ["198.51.100.1", "198.51.100.2"]
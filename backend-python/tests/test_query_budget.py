@@ -0,0 +1,71 @@
+import uuid
+
+# Declared SQL statement budgets per endpoint. Raise one only together with
+# a justification in the change that needs it.
+
+
+def test_catalog_query_budget(client, query_budget):
+    with query_budget(1):
+        products = client.get("/api/products").json()
+    with query_budget(1):
+        client.get(f"/api/products/{products[0]['slug']}")
+
+
+def test_cart_query_budget(client, query_budget):
+    variant_id = client.get("/api/products").json()[0]["variants"][0]["id"]
+    with query_budget(2):
+        client.get("/api/cart")
+    with query_budget(5):
+        response = client.post("/api/cart/items", json={"variantId": variant_id, "quantity": 1})
+    assert response.headers["X-DB-Query-Count"] == "5"
+    # Existing line: a single UPDATE ... RETURNING, no read-modify-write
+    with query_budget(4):
+        client.post("/api/cart/items", json={"variantId": variant_id, "quantity": 1})
+
+
+def test_checkout_query_budget(client, query_budget):
+    client.post("/api/auth/register", json={
+        "email": f"budget_{uuid.uuid4()}@example.com",
+        "password": "password",
+        "name": "Budget Tester"
+    })
+    variant_id = client.get("/api/products").json()[0]["variants"][0]["id"]
+    client.post("/api/cart/items", json={"variantId": variant_id, "quantity": 1})
+
+    with query_budget(10):
+        response = client.post("/api/orders", json={"paymentProvider": "upi_mock"})
+    assert response.status_code == 201
+    with query_budget(3):
+        client.get("/api/orders")
+
+
+def test_query_stats_flag_repeated_statements():
+    from app.core.query_stats import QueryStats
+
+    stats = QueryStats()
+    for _ in range(5):
+        stats.record("SELECT * FROM cart_items WHERE id = ?", 0.001)
+    stats.record("SELECT 1", 0.001)
+    assert stats.count == 6
+    assert stats.repeated(5) == {"SELECT * FROM cart_items WHERE id = ?": 5}
+
+
+def test_login_cart_merge_query_budget(client, query_budget):
+    email = f"merge_{uuid.uuid4()}@example.com"
+    client.post("/api/auth/register", json={"email": email, "password": "password", "name": "Merger"})
+    variants = client.get("/api/products").json()[0]["variants"]
+    client.post("/api/cart/items", json={"variantId": variants[0]["id"], "quantity": 1})
+    client.post("/api/auth/logout")
+
+    # Guest cart with several lines, one of which is already in the user's cart
+    client.cookies.clear()
+    for variant in variants[:2]:
+        client.post("/api/cart/items", json={"variantId": variant["id"], "quantity": 1})
+
+    with query_budget(8):
+        response = client.post("/api/auth/login", json={"email": email, "password": "password"})
+    assert response.status_code == 200
+
+    cart = client.get("/api/cart").json()
+    quantities = {item["product_variant_id"]: item["quantity"] for item in cart["items"]}
+    assert quantities == {variants[0]["id"]: 2, variants[1]["id"]: 1}
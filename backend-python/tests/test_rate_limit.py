@@ -0,0 +1,52 @@
+import asyncio
+import threading
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.rate_limit import LoginThrottle, SQLRateLimiter
+from app.models import RateLimitBucket
+
+
+def _first_hits(limiter, attempts, capacity):
+    """`attempts` simultaneous hits on a key nobody has used; returns how many were allowed."""
+    barrier = threading.Barrier(attempts)
+    allowed = []
+
+    def attempt():
+        barrier.wait()
+        allowed.append(limiter.hit("login:ip:203.0.113.9", capacity, 0.0) == 0.0)
+
+    threads = [threading.Thread(target=attempt) for _ in range(attempts)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(allowed)
+
+
+def test_sql_limiter_holds_under_concurrent_first_hits(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'limits.db'}", connect_args={"timeout": 30})
+    RateLimitBucket.__table__.create(engine)
+    limiter = SQLRateLimiter(sessionmaker(bind=engine))
+
+    assert _first_hits(limiter, attempts=12, capacity=5) == 5
+    engine.dispose()
+
+
+def test_sql_limiter_runs_off_the_event_loop(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'limits.db'}")
+    RateLimitBucket.__table__.create(engine)
+    limiter = SQLRateLimiter(sessionmaker(bind=engine))
+    throttle = LoginThrottle(limiter, ip_burst=5, ip_per_minute=1, email_burst=5, email_per_minute=1)
+    threads = []
+    real_hit = limiter.hit
+
+    def hit(*args):
+        threads.append(threading.current_thread())
+        return real_hit(*args)
+
+    limiter.hit = hit
+    assert asyncio.run(throttle.acheck("203.0.113.9", "a@example.com")) == 0.0
+    assert threads and threading.main_thread() not in threads
+    engine.dispose()
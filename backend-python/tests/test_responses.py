@@ -0,0 +1,52 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from fastapi import Response
+
+from app.core import responses
+from app.core.responses import dumps, trusted
+from app.schemas import OrderResponse
+
+
+def _order(order_id=1):
+    return OrderResponse(
+        id=order_id, user_id=2, status="paid", total_amount=Decimal("1598.00"), payment_provider="cod",
+        created_at=datetime(2026, 1, 1, 12, 30, tzinfo=timezone.utc),
+    )
+
+
+def test_decimals_match_schema_serialization(monkeypatch):
+    order = _order()
+    expected = order.model_dump_json().encode()
+    assert dumps(order) == expected
+    assert dumps([order, _order(2)]) == b"[" + expected + b"," + _order(2).model_dump_json().encode() + b"]"
+    # Plain structures encode Decimal and datetimes the way the schemas do
+    assert dumps(order.model_dump()) == expected
+    assert json.loads(dumps({"price": Decimal("799.00")})) == {"price": "799.00"}
+
+    monkeypatch.setattr(responses, "orjson", None)
+    assert dumps(order.model_dump()) == expected
+
+
+def test_trusted_keeps_dependency_headers():
+    # As FastAPI injects it into routes and dependencies
+    sub_response = Response()
+    del sub_response.headers["content-length"]
+    sub_response.status_code = None
+    sub_response.set_cookie("cart_id", "signed")
+    response = trusted(_order(), status_code=201, response=sub_response)
+    assert response.status_code == 201
+    assert response.headers["set-cookie"].startswith("cart_id=signed")
+    assert response.headers["content-length"] == str(len(response.body))
+
+
+def test_guest_cart_cookie_survives_trusted_response(client):
+    response = client.get("/api/cart")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["total"] == "0"
+    assert "cart_id" in response.cookies
+
+    # The cookie brings the guest back to the same cart
+    assert client.get("/api/cart").json()["id"] == response.json()["id"]
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+
+from app import server
+from app.config import settings
+from app.core import logs
+from app.core.cache import MemoryLRUBackend, QueryCache
+from app.core.invalidation import TAGS, InvalidationChannel
+
+
+def test_worker_count_follows_cpu_quota(tmp_path, monkeypatch):
+    monkeypatch.setattr(server.os, "sched_getaffinity", lambda pid: {0, 1, 2, 3, 4, 5, 6, 7})
+    cpu_max = tmp_path / "cpu.max"
+    cpu_max.write_text("max 100000\n")
+    assert server.available_cpus(str(cpu_max)) == 8
+    cpu_max.write_text("250000 100000\n")
+    assert server.available_cpus(str(cpu_max)) == 3
+    assert server.available_cpus(str(tmp_path / "missing")) == 8
+
+    monkeypatch.setattr(settings, "WORKERS", 2)
+    assert server.worker_count() == 2
+
+
+def test_launcher_options(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_INVALIDATION_DIR", None)
+    monkeypatch.setattr(settings, "METRICS_MULTIPROC_DIR", None)
+    monkeypatch.setattr(settings, "LOG_FILES_PER_WORKER", False)
+    server.prepare_shared_state(1)
+    assert settings.CACHE_INVALIDATION_DIR is None
+    assert not settings.LOG_FILES_PER_WORKER
+
+    server.prepare_shared_state(4)
+    try:
+        assert settings.CACHE_INVALIDATION_DIR and settings.METRICS_MULTIPROC_DIR
+        assert settings.LOG_FILES_PER_WORKER
+        options = server.options(4)
+        assert options["workers"] == 4 and options["preload_app"]
+        assert options["max_requests"] == settings.WORKER_MAX_REQUESTS
+        assert options["child_exit"] is server.child_exit
+    finally:
+        server.on_exit(None)
+        server._created.clear()
+
+
+def test_launcher_clears_stale_metrics(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_MULTIPROC_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "LOG_FILES_PER_WORKER", False)
+    (tmp_path / "metrics-4242.json").write_text("[]")
+    (tmp_path / "metrics-exited.json").write_text("[]")
+    (tmp_path / "notes.txt").write_text("kept")
+    server.prepare_shared_state(1)
+    assert [p.name for p in tmp_path.iterdir()] == ["notes.txt"]
+
+
+def test_invalidations_reach_other_workers(tmp_path):
+    async def scenario():
+        workers = []
+        for name in ("a", "b", "c"):
+            cache = QueryCache(MemoryLRUBackend())
+            cache.channel = InvalidationChannel(str(tmp_path), name)
+            cache.channel.open({TAGS: cache.backend.invalidate_tags})
+            cache.set("get_products", "k", [1, 2], 60, ["catalog"])
+            workers.append(cache)
+        # A worker that exited without removing its socket
+        dead = InvalidationChannel(str(tmp_path), "dead")
+        dead.open({})
+        dead._loop.remove_reader(dead._sock.fileno())
+        dead._sock.close()
+
+        workers[0].invalidate(["catalog"])
+        await asyncio.sleep(0.05)
+        hits = [cache.get("get_products", "k")[0] for cache in workers]
+        stats = [cache.channel.stats() for cache in workers]
+        for cache in workers:
+            cache.channel.close()
+        return hits, stats
+
+    hits, stats = asyncio.run(scenario())
+    assert hits == [False, False, False]
+    assert stats[0]["sent"] == 2 and stats[1]["received"] == 1
+    assert not (tmp_path / "dead.sock").exists()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_admin_changes_reach_other_workers(tmp_path, monkeypatch):
+    from app.api.routes import internal
+    from app.core import invalidation
+    from app.core.profiler import profiler
+    from app.core.slow_queries import slow_query_log
+
+    monkeypatch.setattr(profiler, "sampling_rate", 0.0)
+    monkeypatch.setattr(slow_query_log, "dropped", 3)
+
+    async def scenario():
+        here = InvalidationChannel(str(tmp_path), "here")
+        here.open({})
+        other = InvalidationChannel(str(tmp_path), "other")
+        other.open(internal.worker_messages)
+        monkeypatch.setattr(invalidation, "worker_channel", here)
+        reached = invalidation.broadcast(
+            internal.PROFILER_SAMPLING, {"rate": 0.5, "mode": "sampler", "path_prefix": "/api/cart"}
+        )
+        invalidation.broadcast(internal.SLOW_QUERIES_RESET)
+        # Topics a worker does not handle are ignored
+        invalidation.broadcast("unknown", [1])
+        await asyncio.sleep(0.05)
+        here.close()
+        other.close()
+        return reached, other.stats()
+
+    reached, stats = asyncio.run(scenario())
+    assert reached == 1 and stats["received"] == 3
+    assert profiler.status()["sampling_rate"] == 0.5 and profiler.sampling_path_prefix == "/api/cart"
+    assert slow_query_log.dropped == 0
+    profiler.configure_sampling(0.0, "cprofile")
+
+
+def test_log_sink_restarts_in_forked_worker():
+    logs.configure_logging()
+    old = logs._app_sink
+    logs.restart_after_fork()
+    try:
+        root = logging.getLogger()
+        assert logs._app_sink is not old and logs._app_sink.target is old.target
+        assert logs._app_sink.handler in root.handlers and old.handler not in root.handlers
+    finally:
+        # Here the old thread did survive; stop it without closing the shared target
+        old.queue.put(None)
+        old._thread.join()
@@ -0,0 +1,29 @@
+from app.core.session import SessionMiddleware
+
+
+def test_public_routes_skip_the_session(client, monkeypatch):
+    response = client.post("/api/auth/register", json={
+        "email": "session@example.com", "password": "password123", "name": "Session User"
+    })
+    assert response.status_code == 201
+
+    loads = []
+    load = SessionMiddleware.load
+
+    def counting_load(self, scope):
+        loads.append(scope["path"])
+        return load(self, scope)
+
+    monkeypatch.setattr(SessionMiddleware, "load", counting_load)
+
+    # The cookie is neither verified nor re-signed on catalog and health routes
+    for path in ("/api/products", "/health"):
+        response = client.get(path)
+        assert response.status_code == 200
+        assert "set-cookie" not in response.headers
+    assert loads == []
+
+    # Everywhere else the session works as before
+    response = client.get("/api/auth/me")
+    assert response.json()["email"] == "session@example.com"
+    assert "set-cookie" in response.headers
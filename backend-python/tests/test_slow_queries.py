@@ -0,0 +1,86 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core import slow_queries
+from app.core.slow_queries import explain, full_scans, normalize, slow_query_log
+from app.core.startup import init_database
+from app.storage import Storage
+
+
+def test_normalize_collapses_literals_and_lists():
+    a = normalize("SELECT * FROM users WHERE id IN (?, ?, ?) AND email = 'a@b.c' LIMIT 10")
+    b = normalize("SELECT *  FROM users\n WHERE id IN (?, ?) AND email = 'x' LIMIT 5")
+    assert a == b == "SELECT * FROM users WHERE id IN (?, ...) AND email = ? LIMIT ?"
+    assert normalize("SELECT * FROM t WHERE id = %(id_1)s") == normalize("SELECT * FROM t WHERE id = $1")
+
+
+def test_postgres_explain_is_contained_in_a_savepoint():
+    executed = []
+
+    class Cursor:
+        def execute(self, sql, parameters=None):
+            executed.append(sql)
+            if sql.startswith("EXPLAIN"):
+                raise RuntimeError("relation does not exist")
+
+        def close(self):
+            pass
+
+    conn = SimpleNamespace(
+        dialect=SimpleNamespace(name="postgresql"),
+        connection=SimpleNamespace(dbapi_connection=SimpleNamespace(cursor=Cursor)),
+        get_execution_options=dict,
+    )
+    with pytest.raises(RuntimeError):
+        explain(conn, "SELECT * FROM missing", {})
+    # The failure is rolled back to the savepoint, not left aborting the transaction
+    assert executed == [
+        "SAVEPOINT slow_query_explain",
+        "EXPLAIN SELECT * FROM missing",
+        "ROLLBACK TO SAVEPOINT slow_query_explain",
+    ]
+
+
+def test_slow_statements_are_attributed_and_explained(tmp_path, monkeypatch):
+    monkeypatch.setattr(slow_query_log, "threshold", 1e-9)
+    slow_query_log.reset()
+    log_path = tmp_path / "slow.jsonl"
+    slow_queries.open_log_file(str(log_path), 1_000_000, 1)
+    engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+    try:
+        init_database(engine)
+        slow_query_log.reset()
+        with Session(engine) as db:
+            Storage(db).get_products()
+    finally:
+        slow_queries.close_log_file()
+        engine.dispose()
+        slow_query_log.reset()
+
+    lines = [json.loads(line) for line in log_path.read_text().splitlines()]
+    entry = next(line for line in lines if line["storage_method"] == "get_products")
+    assert entry["sql"].startswith("SELECT products.")
+    assert full_scans(entry["plan"]) == ["products"]
+
+
+def test_slow_query_endpoint_groups_by_fingerprint(admin_client, monkeypatch):
+    client = admin_client
+    monkeypatch.setattr(slow_query_log, "threshold", 1e-9)
+    slow_query_log.reset()
+    slug = client.get("/api/products").json()[0]["slug"]
+    client.get(f"/api/products/{slug}")
+    monkeypatch.setattr(slow_query_log, "threshold", 0.1)
+
+    body = client.get("/internal/db/slow-queries").json()
+    by_method = {m: e for e in body["fingerprints"] for m in e["storage_methods"]}
+    entry = by_method["get_product_by_slug"]
+    assert entry["parameters"] and entry["plan"]
+    assert entry["full_scans"] == []
+    # No other workers under the test client
+    assert client.delete("/internal/db/slow-queries").json() == {"reset": True, "workers": 1}
+    assert client.get("/internal/db/slow-queries").json()["fingerprints"] == []
@@ -0,0 +1,159 @@
+import threading
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.sqlite import configure_sqlite_engine
+from app.database import Base, RoutingSession, replica_reads
+from app.models import Cart
+from app.storage import Storage
+
+
+def _count_statements(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, stmt, *a: statements.append(stmt))
+    return statements
+
+
+def test_pragmas_and_read_write_routing(tmp_path):
+    url = f"sqlite:///{tmp_path / 'profile.db'}"
+    writer = create_engine(url, pool_size=1, max_overflow=0)
+    reader = create_engine(url)
+    configure_sqlite_engine(writer)
+    configure_sqlite_engine(reader)
+    Base.metadata.create_all(bind=writer)
+
+    with reader.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+
+    written = _count_statements(writer)
+    read = _count_statements(reader)
+    Session = sessionmaker(class_=RoutingSession, writer=writer, readers=[reader], autoflush=False)
+
+    with Session() as db:
+        storage = Storage(db)
+        cart = storage.create_cart()
+        assert any(s.startswith("INSERT") for s in written)
+        assert not any(s.startswith("INSERT") for s in read)
+
+        written.clear()
+        read.clear()
+        with replica_reads(db):
+            assert storage.get_cart_items(cart.id) == []
+        assert read and not written
+
+        # Reads outside replica_reads() stay on the writer
+        read.clear()
+        storage.get_cart(1)
+        assert not read
+
+        # A transaction that has written keeps reading from the writer
+        db.add(Cart())
+        db.flush()
+        read.clear()
+        with replica_reads(db):
+            db.execute(text("SELECT count(*) FROM carts"))
+        assert not read
+        db.commit()
+        assert "wrote" not in db.info
+
+    writer.dispose()
+    reader.dispose()
+
+
+def test_read_your_writes_window(tmp_path):
+    url = f"sqlite:///{tmp_path / 'sticky.db'}"
+    writer = create_engine(url)
+    replica = create_engine(url)
+    Base.metadata.create_all(bind=writer)
+    read = _count_statements(replica)
+
+    http_session = {}
+    Session = sessionmaker(
+        class_=RoutingSession, writer=writer, readers=[replica], sticky_seconds=30
+    )
+    with Session() as db:
+        db.info["http_session"] = http_session
+        with replica_reads(db):
+            Storage(db).get_cart_items(1)
+        assert read
+        db.rollback()
+
+        Storage(db).create_cart()
+        assert http_session["primary_until"] > 0
+
+        read.clear()
+        with replica_reads(db):
+            Storage(db).get_cart_items(1)
+        assert not read
+
+    # A later request carrying the same HTTP session is pinned as well
+    with Session() as db:
+        db.pin_to_writer_until(http_session["primary_until"])
+        with replica_reads(db):
+            Storage(db).get_cart_items(1)
+        assert not read
+
+    writer.dispose()
+    replica.dispose()
+
+
+def test_second_writer_waits_instead_of_failing(tmp_path):
+    url = f"sqlite:///{tmp_path / 'writers.db'}"
+    # The sync engine and the async writer, as in the SQLite profile
+    first, second = create_engine(url), create_engine(url)
+    for writer in (first, second):
+        configure_sqlite_engine(writer, writer=True)
+    with first.begin() as conn:
+        conn.execute(text("CREATE TABLE counters (n INTEGER)"))
+        conn.execute(text("INSERT INTO counters VALUES (0)"))
+
+    began = threading.Event()
+    errors = []
+
+    def read_then_write():
+        try:
+            with first.begin() as conn:
+                n = conn.scalar(text("SELECT n FROM counters"))
+                began.set()
+                threading.Event().wait(0.2)
+                conn.execute(text("UPDATE counters SET n = :n"), {"n": n + 1})
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=read_then_write)
+    thread.start()
+    began.wait()
+    with second.begin() as conn:
+        conn.execute(text("UPDATE counters SET n = n + 1"))
+    thread.join()
+
+    # With deferred transactions the first writer's UPDATE fails with "database is locked"
+    assert errors == []
+    with second.connect() as conn:
+        assert conn.scalar(text("SELECT n FROM counters")) == 2
+    first.dispose()
+    second.dispose()
+
+
+def test_async_writer_begins_immediate(tmp_path):
+    import asyncio
+
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+        configure_sqlite_engine(engine.sync_engine, writer=True)
+        statements = _count_statements(engine.sync_engine)
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE t (n INTEGER)"))
+            await conn.execute(text("INSERT INTO t VALUES (1)"))
+        async with engine.connect() as conn:
+            count = await conn.scalar(text("SELECT count(*) FROM t"))
+        await engine.dispose()
+        return statements, count
+
+    statements, count = asyncio.run(scenario())
+    assert statements[0] == "BEGIN IMMEDIATE" and count == 1
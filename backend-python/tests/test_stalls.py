@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+from app.api.routes import auth
+from app.core.metrics import LoopLagMonitor
+from app.core.stalls import StallDetector, stall_detector
+
+
+def _blocking_helper():
+    time.sleep(0.3)
+
+
+def test_stall_captures_the_blocking_frame():
+    detector = StallDetector(threshold=0.05)
+    monitor = LoopLagMonitor(interval=0.5, stalls=detector)
+
+    async def scenario():
+        probe = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0.05)
+        _blocking_helper()
+        await asyncio.sleep(0.1)
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+    assert detector.count == 1
+    (offender,) = detector.worst()
+    assert offender["route"] == "task:test_stall_captures_the_blocking_frame.<locals>.scenario"
+    assert "in _blocking_helper" in offender["culprit"]
+    assert offender["max_seconds"] >= 0.25
+
+
+def test_stalls_are_attributed_to_routes(admin_client, monkeypatch):
+    client = admin_client
+    verify = auth.dummy_verify_password
+    monkeypatch.setattr(auth, "dummy_verify_password", lambda *args: _blocking_helper() or verify(*args))
+    # A failed login; the admin stays logged in
+    response = client.post("/api/auth/login", json={"email": "nobody@example.com", "password": "password"})
+    assert response.status_code == 401
+
+    body = client.get("/internal/loop").json()
+    routes = {o["route"] for o in body["offenders"]}
+    assert "/api/auth/login" in routes
+    assert 'event_loop_stalls_total{route="/api/auth/login"}' in client.get("/metrics").text
+    stall_detector.offenders.clear()
@@ -0,0 +1,26 @@
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from app.core.schema import head_revision, verify_schema
+from app.core.startup import init_database
+from app.models import Product, User
+
+
+def test_init_migrates_and_seeds_once(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'init.db'}")
+    init_database(engine)
+    # Safe to run on every deploy
+    init_database(engine)
+
+    assert verify_schema(engine, auto_migrate=False) == head_revision()
+    with Session(engine) as db:
+        assert db.scalar(select(func.count()).select_from(Product)) == 1
+        assert db.scalar(select(User.role).where(User.email == "admin@urbanturban.com")) == "admin"
+    engine.dispose()
+
+
+def test_startup_reports_phase_timings(admin_client):
+    summary = admin_client.get("/internal/startup").json()
+    assert summary["ready"] is True
+    assert {"import", "schema"} <= set(summary["phases_ms"])
+    assert summary["total_ms"] >= summary["phases_ms"]["schema"]
@@ -0,0 +1,64 @@
+import json
+import uuid
+
+from app.core import telemetry
+from app.core.telemetry import tracer
+
+
+def test_unsampled_requests_record_nothing(client):
+    tracer.drain()
+    response = client.get("/api/products")
+    assert "X-Trace-Id" not in response.headers
+    assert tracer.drain() == []
+
+
+def test_checkout_trace_nests_storage_and_sql_spans(client, tmp_path):
+    client.post("/api/auth/register", json={
+        "email": f"trace_{uuid.uuid4()}@example.com",
+        "password": "password",
+        "name": "Trace Tester"
+    })
+    variant_id = client.get("/api/products").json()[0]["variants"][0]["id"]
+    client.post("/api/cart/items", json={"variantId": variant_id, "quantity": 1})
+
+    tracer.drain()
+    tracer.sample_rate = 1.0
+    try:
+        response = client.post("/api/orders", json={"paymentProvider": "upi_mock"})
+    finally:
+        tracer.sample_rate = 0.0
+    assert response.status_code == 201
+
+    path = tmp_path / "traces.jsonl"
+    assert telemetry.flush(telemetry.get_exporter("json", str(path))) > 0
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    by_id = {span["span_id"]: span for span in spans}
+
+    root = next(span for span in spans if span["parent_id"] is None)
+    assert root["name"] == "POST /api/orders"
+    assert root["trace_id"] == response.headers["X-Trace-Id"]
+    assert {span["trace_id"] for span in spans} == {root["trace_id"]}
+
+    create_order = next(span for span in spans if span["name"] == "storage.create_order")
+    assert any(span["parent_id"] == create_order["span_id"] and span["name"] == "sql" for span in spans)
+    user = next(span for span in spans if span["name"] == "storage.get_user")
+    assert by_id[user["parent_id"]]["name"] == "dependency.get_current_user"
+    assert any(span["name"] == "storage.commit" for span in spans)
+
+
+def test_otlp_file_exporter_writes_resource_spans(tmp_path):
+    tracer.sample_rate = 1.0
+    try:
+        with tracer.trace("root") as root:
+            with tracer.span("child", rows=3):
+                pass
+    finally:
+        tracer.sample_rate = 0.0
+
+    path = tmp_path / "otlp.jsonl"
+    telemetry.flush(telemetry.get_exporter("otlp-file", str(path)))
+    request = json.loads(path.read_text())
+    spans = request["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    child = next(span for span in spans if span["name"] == "child")
+    assert child["parentSpanId"] == root.span_id
+    assert child["attributes"] == [{"key": "rows", "value": {"intValue": "3"}}]